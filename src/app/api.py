@@ -1,18 +1,112 @@
 from __future__ import annotations
 
-from aws_lambda_powertools import Logger, Tracer
-from aws_lambda_powertools.metrics import Metrics, MetricUnit
-from fastapi import FastAPI, HTTPException
-from starlette.responses import Response
+import os
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime
+from itertools import islice
+from typing import Annotated, Any, TypeVar, cast
 
-from app import dal
-from app.models import Booking, BookingCreate, BookingUpdate
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.metrics import MetricUnit
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.exception_handlers import http_exception_handler
+from pydantic_core import to_json
+from starlette.responses import Response, StreamingResponse
+
+from app import dal, dal_async, idempotency, instrumentation, user_summary
+from app.models import (
+    Availability,
+    Booking,
+    BookingBatchCreate,
+    BookingBatchCreateResult,
+    BookingBatchError,
+    BookingBatchGet,
+    BookingBatchGetResult,
+    BookingCreate,
+    BookingSeries,
+    BookingSeriesCreate,
+    BookingStatus,
+    BookingSummary,
+    BookingUpdate,
+    FreeSlot,
+)
+from app.telemetry import get_metrics, get_tracer
 
 logger = Logger()
-tracer = Tracer()
-metrics = Metrics(namespace="BookingAPI")
+tracer = get_tracer()
+metrics = get_metrics(namespace="BookingAPI")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+ETAG_HEADER = "ETag"
+NDJSON = "application/x-ndjson"
+# Bookings per export response where the body cannot be streamed (under Lambda, Mangum buffers it)
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "1000"))
+# NDJSON lines per chunk of a streamed export: each chunk is a write, and a threadpool hop, for the server
+_EXPORT_LINES_PER_WRITE = 100
+IDEMPOTENCY_KEY_REUSED = "Idempotency-Key was already used for a different request"
+IDEMPOTENCY_IN_PROGRESS = "A request with this Idempotency-Key is still in progress"
+# Optional "Idempotency-Key" request header on POST /bookings and POST /bookings/{booking_id}/cancel
+IdempotencyKey = Annotated[str | None, Header(min_length=1, max_length=255)]
+# Optional conditional-request headers ("If-Match", "If-None-Match") carrying booking ETags
+EntityTags = Annotated[str | None, Header()]
+# Serve the read routes from app.dal_async under an event loop (uvicorn, containers); see that module
+ASYNC_DAL = os.environ.get("ASYNC_DAL", "false").strip().lower() in ("1", "true")
+
+F = TypeVar("F", bound=Callable[..., Any])
 
 app = FastAPI(title="Serverless Booking API", version="0.1.0")
+if instrumentation.ENABLED:
+    app.add_middleware(instrumentation.RouteMiddleware, metrics=metrics)
+
+
+def unavailable(exc: dal.BatchUnprocessedError) -> HTTPException:
+    """The 503 a throttled batch read is reported as, so clients retry instead of treating it as a bug."""
+    return HTTPException(status_code=503, detail=str(exc), headers={"retry-after": "1"})
+
+
+@app.exception_handler(dal.BatchUnprocessedError)
+async def _batch_unprocessed(request: Request, exc: dal.BatchUnprocessedError) -> Response:
+    return await http_exception_handler(request, unavailable(exc))
+
+
+class ModelJSONResponse(Response):
+    """JSON rendered straight from pydantic models (or lists of them) into bytes.
+
+    Returning a Response skips FastAPI's response_model pass (dump to dicts, validate again, encode), which
+    dominates list endpoints. Only use it for models built from our own table; response_model stays on the
+    route for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def _record_cache_event(event: str) -> None:
+    instrumentation.add_metric(metrics, name=f"BookingCache{event}", unit=MetricUnit.Count, value=1)
+
+
+if dal.booking_cache is not None:
+    dal.booking_cache.listener = _record_cache_event
+
+
+def _idempotent(operation: str, key: str | None, request: dict[str, Any], call: Callable[[], Booking]) -> Booking:
+    if key is None:
+        return call()
+    try:
+        return idempotency.run(operation, key, request, call)
+    except idempotency.IdempotencyKeyReusedError as exc:
+        raise HTTPException(status_code=422, detail=IDEMPOTENCY_KEY_REUSED) from exc
+    except idempotency.IdempotencyInProgressError as exc:
+        raise HTTPException(status_code=409, detail=IDEMPOTENCY_IN_PROGRESS) from exc
+
+
+def _route_if(enabled: bool, route: Callable[[F], F]) -> Callable[[F], F]:
+    """Apply the ``app`` route decorator only when ``enabled``; either way the function stays callable."""
+    return route if enabled else lambda func: func
 
 
 @app.get("/health")
@@ -20,46 +114,340 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
-@tracer.capture_method
 @app.post("/bookings", response_model=Booking, status_code=201)
-def create_booking(payload: BookingCreate) -> Booking:
-    metrics.add_metric(name="CreateBooking", value=1, unit=MetricUnit.Count)
-    return dal.create_booking(payload)
+@tracer.capture_method
+def create_booking(payload: BookingCreate, idempotency_key: IdempotencyKey = None) -> Booking:
+    def create() -> Booking:
+        # Replayed responses are not new bookings
+        instrumentation.add_metric(metrics, name="CreateBooking", unit=MetricUnit.Count, value=1)
+        return dal.create_booking(payload)
+
+    try:
+        return _idempotent("create_booking", idempotency_key, payload.model_dump(mode="json"), create)
+    except dal.BookingConflictError as exc:
+        raise HTTPException(status_code=409, detail=dal.BOOKING_CONFLICT) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@app.post("/bookings:batch", response_model=BookingBatchCreateResult)
+@tracer.capture_method
+def create_bookings(payload: BookingBatchCreate) -> BookingBatchCreateResult:
+    # Items succeed or fail independently, so the request itself is always a 200
+    result = dal.create_bookings(payload.bookings)
+    instrumentation.add_metric(metrics, name="CreateBooking", unit=MetricUnit.Count, value=len(result.created))
+    errors = [BookingBatchError(index=index, detail=detail) for index, detail in result.errors.items()]
+    return BookingBatchCreateResult(created=result.created, errors=errors)
+
+
+def _batch_get_response(result: dal.BatchGetResult) -> ModelJSONResponse:
+    return ModelJSONResponse(
+        BookingBatchGetResult.model_construct(bookings=result.bookings, not_found=result.not_found)
+    )
+
+
+@_route_if(not ASYNC_DAL, app.post("/bookings:batchGet", response_model=BookingBatchGetResult))
+@tracer.capture_method
+def get_bookings(payload: BookingBatchGet) -> ModelJSONResponse:
+    return _batch_get_response(dal.get_bookings(payload.booking_ids))
+
+
+@_route_if(ASYNC_DAL, app.post("/bookings:batchGet", response_model=BookingBatchGetResult))
+@tracer.capture_method
+async def get_bookings_async(payload: BookingBatchGet) -> ModelJSONResponse:
+    return _batch_get_response(await dal_async.get_bookings(payload.booking_ids))
+
+
+@app.post("/series", response_model=BookingSeries, status_code=201)
+@tracer.capture_method
+def create_series(payload: BookingSeriesCreate) -> BookingSeries:
+    instrumentation.add_metric(metrics, name="CreateSeries", unit=MetricUnit.Count, value=1)
+    try:
+        return dal.create_series(payload)
+    except dal.BookingConflictError as exc:
+        raise HTTPException(status_code=409, detail=dal.BOOKING_CONFLICT) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+@_route_if(not ASYNC_DAL, app.get("/series/{series_id}", response_model=BookingSeries))
+@tracer.capture_method
+def get_series(series_id: str) -> BookingSeries:
+    try:
+        return dal.get_series(series_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=dal.SERIES_NOT_FOUND) from exc
+
+
+@_route_if(ASYNC_DAL, app.get("/series/{series_id}", response_model=BookingSeries))
+@tracer.capture_method
+async def get_series_async(series_id: str) -> BookingSeries:
+    try:
+        return await dal_async.get_series(series_id)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=dal.SERIES_NOT_FOUND) from exc
+
+
+@app.delete("/series/{series_id}")
+@tracer.capture_method
+def delete_series(series_id: str) -> Response:
+    try:
+        dal.delete_series(series_id)
+    except dal.BookingConflictError as exc:
+        raise HTTPException(status_code=409, detail=dal.BOOKING_CONFLICT) from exc
+    return Response(status_code=204)
+
+
+def _wants_consistent(cache_control: str | None) -> bool:
+    # "Cache-Control: no-cache" asks for the current stored state: skip the cache, read strongly consistent
+    return cache_control is not None and "no-cache" in cache_control.lower()
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _not_modified(if_none_match: str | None, version: int | None) -> bool:
+    if if_none_match is None or version is None:
+        return False
+    # Weak comparison, as If-None-Match uses: W/"3" matches "3"
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or _etag(version) in tags
+
+
+def _expected_version(if_match: str | None) -> int | None:
+    """The version an If-Match header asks for; None when any version will do (no header, or "*")."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    for tag in [tag.strip() for tag in if_match.split(",")]:
+        # Strong comparison: weak tags never match
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            return int(tag[1:-1])
+    # No version we ever hand out, so the write fails with a 412 (or 404 when there is no booking)
+    return -1
+
+
+def _booking_response(booking: Booking, if_none_match: str | None = None) -> Response:
+    """The booking with its version as ETag, so the client can make its next write conditional on it."""
+    etag = {ETAG_HEADER: _etag(booking.version)}
+    if _not_modified(if_none_match, booking.version):
+        return Response(status_code=304, headers=etag)
+    return ModelJSONResponse(booking, headers=etag)
 
 
+@_route_if(not ASYNC_DAL, app.get("/bookings/{booking_id}", response_model=Booking))
 @tracer.capture_method
-@app.get("/bookings/{booking_id}", response_model=Booking)
-def get_booking(booking_id: str) -> Booking:
+def get_booking(
+    booking_id: str, cache_control: Annotated[str | None, Header()] = None, if_none_match: EntityTags = None
+) -> Response:
+    consistent = _wants_consistent(cache_control)
+    if if_none_match is not None:
+        # Polling clients mostly hold the current ETag: settle that from the version alone, without the body
+        version = dal.get_booking_version(booking_id, consistent=consistent)
+        if _not_modified(if_none_match, version):
+            return Response(status_code=304, headers={ETAG_HEADER: _etag(cast(int, version))})
     try:
-        return dal.get_booking(booking_id)
+        booking = dal.get_booking(booking_id, consistent=consistent)
     except KeyError as exc:
         raise HTTPException(status_code=404, detail="Booking not found") from exc
+    return _booking_response(booking, if_none_match)
+
+
+@_route_if(ASYNC_DAL, app.get("/bookings/{booking_id}", response_model=Booking))
+@tracer.capture_method
+async def get_booking_async(
+    booking_id: str, cache_control: Annotated[str | None, Header()] = None, if_none_match: EntityTags = None
+) -> Response:
+    consistent = _wants_consistent(cache_control)
+    if if_none_match is not None:
+        version = await dal_async.get_booking_version(booking_id, consistent=consistent)
+        if _not_modified(if_none_match, version):
+            return Response(status_code=304, headers={ETAG_HEADER: _etag(cast(int, version))})
+    try:
+        booking = await dal_async.get_booking(booking_id, consistent=consistent)
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail="Booking not found") from exc
+    return _booking_response(booking, if_none_match)
+
+
+def _page_response(page: dal.BookingPage) -> ModelJSONResponse:
+    # Body stays a plain list; the opaque cursor for the next page travels in a header
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    return ModelJSONResponse(page.items, headers=headers)
+
+
+@_route_if(not ASYNC_DAL, app.get("/users/{user_id}/bookings", response_model=list[Booking]))
+@tracer.capture_method
+def list_bookings(  # noqa: PLR0913, PLR0917
+    user_id: str,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    start_from: Annotated[datetime | None, Query(alias="from")] = None,
+    start_to: Annotated[datetime | None, Query(alias="to")] = None,
+    status: BookingStatus | None = None,
+    upcoming: bool = False,
+    include_archived: bool = False,
+) -> ModelJSONResponse:
+    try:
+        page = dal.list_bookings_page(
+            user_id,
+            limit,
+            cursor,
+            start_from,
+            start_to,
+            status=status,
+            upcoming=upcoming,
+            include_archived=include_archived,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _page_response(page)
+
 
+@_route_if(ASYNC_DAL, app.get("/users/{user_id}/bookings", response_model=list[Booking]))
+@tracer.capture_method
+async def list_bookings_async(  # noqa: PLR0913, PLR0917
+    user_id: str,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    start_from: Annotated[datetime | None, Query(alias="from")] = None,
+    start_to: Annotated[datetime | None, Query(alias="to")] = None,
+    status: BookingStatus | None = None,
+    upcoming: bool = False,
+    include_archived: bool = False,
+) -> ModelJSONResponse:
+    try:
+        page = await dal_async.list_bookings_page(
+            user_id,
+            limit,
+            cursor,
+            start_from,
+            start_to,
+            status=status,
+            upcoming=upcoming,
+            include_archived=include_archived,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return _page_response(page)
+
+
+@_route_if(user_summary.ENABLED, app.get("/users/{user_id}/bookings/summary", response_model=BookingSummary))
+@tracer.capture_method
+def get_user_summary(user_id: str) -> BookingSummary:
+    # One read of the item the stream processor keeps current, instead of querying the user's bookings
+    return dal.get_user_summary(user_id)
+
+
+def _ndjson(bookings: Iterable[Booking]) -> Iterator[bytes]:
+    remaining = iter(bookings)
+    while lines := list(islice(remaining, _EXPORT_LINES_PER_WRITE)):
+        yield b"".join(to_json(booking) + b"\n" for booking in lines)
+
+
+def _export_response(  # noqa: PLR0913, PLR0917
+    request: Request,
+    owner: dal.Owner,
+    owner_id: str,
+    cursor: str | None,
+    start_from: datetime | None,
+    start_to: datetime | None,
+    status: BookingStatus | None,
+) -> Response:
+    try:
+        bookings = dal.export_bookings(owner, owner_id, start_from, start_to, status=status, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if "aws.event" not in request.scope:
+        # An ASGI server (or Lambda response streaming through a web adapter) sends each chunk as it is made
+        return StreamingResponse(_ndjson(bookings), media_type=NDJSON)
+    # Mangum returns the body in one piece: export in chunks, each response naming where the next one starts
+    chunk = list(islice(bookings, EXPORT_CHUNK_SIZE + 1))
+    headers = None
+    if len(chunk) > EXPORT_CHUNK_SIZE:
+        del chunk[EXPORT_CHUNK_SIZE:]
+        headers = {NEXT_CURSOR_HEADER: dal.export_cursor(owner, owner_id, chunk[-1], status)}
+    return Response(b"".join(_ndjson(chunk)), media_type=NDJSON, headers=headers)
+
+
+@app.get("/users/{user_id}/bookings/export", response_class=StreamingResponse)
+@tracer.capture_method
+def export_user_bookings(  # noqa: PLR0913, PLR0917
+    request: Request,
+    user_id: str,
+    cursor: str | None = None,
+    start_from: Annotated[datetime | None, Query(alias="from")] = None,
+    start_to: Annotated[datetime | None, Query(alias="to")] = None,
+    status: BookingStatus | None = None,
+) -> Response:
+    return _export_response(request, "user_id", user_id, cursor, start_from, start_to, status)
 
+
+@app.get("/resources/{resource_id}/bookings/export", response_class=StreamingResponse)
 @tracer.capture_method
-@app.get("/users/{user_id}/bookings", response_model=list[Booking])
-def list_bookings(user_id: str) -> list[Booking]:
-    return dal.list_bookings_for_user(user_id)
+def export_resource_bookings(  # noqa: PLR0913, PLR0917
+    request: Request,
+    resource_id: str,
+    cursor: str | None = None,
+    start_from: Annotated[datetime | None, Query(alias="from")] = None,
+    start_to: Annotated[datetime | None, Query(alias="to")] = None,
+    status: BookingStatus | None = None,
+) -> Response:
+    return _export_response(request, "resource_id", resource_id, cursor, start_from, start_to, status)
 
 
+@app.get("/resources/{resource_id}/availability", response_model=Availability)
 @tracer.capture_method
+def get_availability(
+    resource_id: str,
+    start_from: Annotated[datetime, Query(alias="from")],
+    start_to: Annotated[datetime, Query(alias="to")],
+    min_duration_seconds: Annotated[int, Query(ge=1)] = 1,
+) -> Availability:
+    try:
+        slots = dal.find_free_slots(resource_id, start_from, start_to, min_duration_seconds)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    free = [FreeSlot(start_time=start, end_time=end) for start, end in slots]
+    return Availability(resource_id=resource_id, free=free)
+
+
 @app.put("/bookings/{booking_id}", response_model=Booking)
-def update_booking(booking_id: str, payload: BookingUpdate) -> Booking:
+@tracer.capture_method
+def update_booking(booking_id: str, payload: BookingUpdate, if_match: EntityTags = None) -> Response:
     try:
-        return dal.update_booking(booking_id, payload)
+        return _booking_response(dal.update_booking(booking_id, payload, _expected_version(if_match)))
     except KeyError as exc:
         raise HTTPException(status_code=404, detail="Booking not found") from exc
+    except dal.BookingVersionMismatchError as exc:
+        raise HTTPException(status_code=412, detail=dal.BOOKING_VERSION_MISMATCH) from exc
+    except dal.BookingConflictError as exc:
+        raise HTTPException(status_code=409, detail=dal.BOOKING_CONFLICT) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
 
 
-@tracer.capture_method
 @app.delete("/bookings/{booking_id}")
+@tracer.capture_method
 def delete_booking(booking_id: str) -> Response:
     dal.delete_booking(booking_id)
     return Response(status_code=204)
 
 
-
-@tracer.capture_method
 @app.post("/bookings/{booking_id}/cancel", response_model=Booking)
-def cancel_booking(booking_id: str) -> Booking:
-    return dal.cancel_booking(booking_id)
+@tracer.capture_method
+def cancel_booking(booking_id: str, idempotency_key: IdempotencyKey = None, if_match: EntityTags = None) -> Response:
+    expected_version = _expected_version(if_match)
+    # Keys stored before If-Match was accepted keep matching requests without it
+    request: dict[str, Any] = {"booking_id": booking_id}
+    if expected_version is not None:
+        request["expected_version"] = expected_version
+    try:
+        booking = _idempotent(
+            "cancel_booking", idempotency_key, request, lambda: dal.cancel_booking(booking_id, expected_version)
+        )
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail="Booking not found") from exc
+    except dal.BookingVersionMismatchError as exc:
+        raise HTTPException(status_code=412, detail=dal.BOOKING_VERSION_MISMATCH) from exc
+    return _booking_response(booking)
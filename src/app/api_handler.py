@@ -1,20 +1,40 @@
 from __future__ import annotations
 
+import os
 from typing import Any
 
 from aws_lambda_powertools import Logger
 from mangum import Mangum
+from mangum.adapter import DEFAULT_TEXT_MIME_TYPES
 from mangum.types import LambdaContext
 
-from app.api import app
+from app import direct, idempotency, instrumentation
+from app.api import NDJSON, app, metrics
 
 logger = Logger()
-handler = Mangum(app)
+# Exports are NDJSON text; Mangum would otherwise base64-encode them as binary
+handler = Mangum(app, text_mime_types=[*DEFAULT_TEXT_MIME_TYPES, NDJSON])
+
+# Serve the routes in app.direct without going through Mangum/ASGI; see that module
+_DIRECT_DISPATCH = os.environ.get("API_DIRECT_DISPATCH", "false").strip().lower() in ("1", "true")
 
 
 def lambda_handler(event: dict[str, Any], context: LambdaContext) -> Any:
+    idempotency.register_lambda_context(context)  # type: ignore[arg-type]
+    if instrumentation.ENABLED:
+        # One metrics record per invocation, named after the route by app.direct or the ASGI middleware
+        with instrumentation.invocation(metrics):
+            return _handle(event, context)
+    return _handle(event, context)
+
+
+def _handle(event: dict[str, Any], context: LambdaContext) -> Any:
     # Normalize minimal API Gateway HTTP API v2.0 events for local/tests
     if isinstance(event, dict) and event.get("version") == "2.0":
+        if _DIRECT_DISPATCH:
+            response = direct.dispatch(event)
+            if response is not None:
+                return response
         request_context = event.setdefault("requestContext", {})
         http_ctx = request_context.setdefault("http", {})
         http_ctx.setdefault("sourceIp", "127.0.0.1")
@@ -0,0 +1,318 @@
+"""Archive of past bookings in compressed columnar files, partitioned by start month (``ARCHIVE_PATH``).
+
+``dal.archive_bookings`` moves bookings that ended more than ``ARCHIVE_AFTER_DAYS`` ago out of the bookings table
+into ``bookings/month=YYYY-MM/part-<id>.bkc`` objects, and listings with ``include_archived`` read them back
+through ``read``. ``LocalStore`` keeps the objects as files under a directory, standing in for an object store:
+everything goes through ``put``, ``keys``, ``prefixes`` and ranged ``read`` calls, as it would against S3.
+
+A file is Parquet-like but needs nothing beyond the standard library. Its rows are sorted by user and start time
+and cut into row groups; each group stores every column on its own as a zlib-compressed array (64-bit integers
+for times, in microseconds, and numbers; dictionary indices for user, resource and status; NUL-separated UTF-8
+for ids). A JSON header at the front holds each group's row count, user and start-time range and column offsets.
+Reads push the user and time predicates down three levels: only the month partitions themselves are listed and
+the files of months outside the time range never are, groups whose ranges miss are never fetched, and within a
+group only the user and start columns are decompressed until some row matches. Like ``app.user_summary`` this
+module is imported by app.dal, so it must not import app.dal (other than in ``main``), pydantic or boto3.
+
+Usage: python -m app.archive [--older-than-days 90]
+"""
+
+from __future__ import annotations
+
+import argparse
+import bisect
+import json
+import os
+import struct
+import sys
+import uuid
+import zlib
+from array import array
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+# Root directory of the archive; unset, nothing is archived and include_archived reads nothing
+ARCHIVE_PATH = os.environ.get("ARCHIVE_PATH", "")
+# Bookings that ended more than this many days ago are archived
+AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "90"))
+# Rows per file; a month with more archived at once gets several
+FILE_ROWS = 100_000
+
+_PREFIX = "bookings/"
+_MAGIC = b"BKC1"
+_HEADER = struct.Struct("<4sI")
+_GROUP_ROWS = 4096
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_NONE = -1  # ttl and reminder_lead_seconds of bookings without a reminder
+# Column -> encoding: "str" (one string per row), "dict" (dictionary-encoded strings) or "int"
+_COLUMNS = {
+    "booking_id": "str",
+    "user_id": "dict",
+    "resource_id": "dict",
+    "start": "int",
+    "end": "int",
+    "ttl": "int",
+    "reminder_lead_seconds": "int",
+    "status": "dict",
+    "series_id": "str",
+    "version": "int",
+}
+
+
+class LocalStore:
+    """Archive objects as files under ``root``; keys are '/'-separated paths relative to it."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def put(self, key: str, data: bytes) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Readers never see a partly written object
+        partial = path.with_name(f"{path.name}.tmp")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+    def delete(self, key: str) -> None:
+        (self.root / key).unlink(missing_ok=True)
+
+    def keys(self, prefix: str) -> list[str]:
+        """Keys starting with ``prefix``, in order."""
+        base = self.root / prefix
+        if not base.is_dir():
+            return []
+        return sorted(
+            path.relative_to(self.root).as_posix()
+            for path in base.rglob("*")
+            if path.is_file() and path.suffix != ".tmp"
+        )
+
+    def prefixes(self, prefix: str) -> list[str]:
+        """The "directories" right under ``prefix`` (ending in '/'), in order; like a delimited S3 listing."""
+        base = self.root / prefix
+        if not base.is_dir():
+            return []
+        return sorted(f"{path.relative_to(self.root).as_posix()}/" for path in base.iterdir() if path.is_dir())
+
+    def read(self, key: str, offset: int, length: int) -> bytes:
+        with (self.root / key).open("rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+
+@cache
+def store() -> LocalStore | None:
+    return LocalStore(Path(ARCHIVE_PATH)) if ARCHIVE_PATH else None
+
+
+def _micros(iso: str) -> int:
+    return (datetime.fromisoformat(iso) - _EPOCH) // timedelta(microseconds=1)
+
+
+def _iso(micros: int) -> str:
+    # The same normalized UTC form app.dal stores times in, so archived and stored start times compare as strings
+    return (_EPOCH + timedelta(microseconds=micros)).isoformat()
+
+
+def _ints(values: list[int]) -> bytes:
+    data = array("q", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data.tobytes()
+
+
+def _from_ints(raw: bytes, typecode: str = "q") -> array[int]:
+    data = array(typecode)
+    data.frombytes(raw)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+
+def _encode(kind: str, values: list[Any]) -> bytes:
+    if kind == "int":
+        return zlib.compress(_ints(values))
+    if kind == "str":
+        return zlib.compress("\0".join(values).encode())
+    dictionary = sorted(set(values))
+    position = {value: i for i, value in enumerate(dictionary)}
+    names = "\0".join(dictionary).encode()
+    indices = array("I", [position[value] for value in values])
+    if sys.byteorder == "big":
+        indices.byteswap()
+    return zlib.compress(struct.pack("<I", len(names)) + names + indices.tobytes())
+
+
+def _decode(kind: str, blob: bytes) -> list[Any]:
+    raw = zlib.decompress(blob)
+    if kind == "int":
+        return _from_ints(raw).tolist()
+    if kind == "str":
+        return raw.decode().split("\0")
+    (size,) = struct.unpack_from("<I", raw)
+    dictionary = raw[4 : 4 + size].decode().split("\0")
+    return [dictionary[i] for i in _from_ints(raw[4 + size :], "I")]
+
+
+def _row(item: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "booking_id": item["booking_id"],
+        "user_id": item["user_id"],
+        "resource_id": item["resource_id"],
+        "start": _micros(item["start_time"]),
+        "end": _micros(item["end_time"]),
+        "ttl": int(item["ttl"]) if item.get("ttl") is not None else _NONE,
+        "reminder_lead_seconds": int(item.get("reminder_lead_seconds") or _NONE),
+        "status": item.get("status", "active"),
+        "series_id": item.get("series_id") or "",
+        "version": int(item.get("version", 0)),
+    }
+
+
+def encode_file(items: list[dict[str, Any]]) -> bytes:
+    """A file holding the given bookings (app.dal BookingItem dicts)."""
+    rows = sorted(map(_row, items), key=lambda row: (row["user_id"], row["start"], row["booking_id"]))
+    groups: list[dict[str, Any]] = []
+    chunks: list[bytes] = []
+    offset = 0
+    for start in range(0, len(rows), _GROUP_ROWS):
+        group = rows[start : start + _GROUP_ROWS]
+        columns: dict[str, list[int]] = {}
+        for name, kind in _COLUMNS.items():
+            blob = _encode(kind, [row[name] for row in group])
+            columns[name] = [offset, len(blob)]
+            chunks.append(blob)
+            offset += len(blob)
+        starts = [row["start"] for row in group]
+        groups.append(
+            {
+                "rows": len(group),
+                "users": [group[0]["user_id"], group[-1]["user_id"]],
+                "starts": [min(starts), max(starts)],
+                "columns": columns,
+            }
+        )
+    header = json.dumps({"rows": len(rows), "groups": groups}, separators=(",", ":")).encode()
+    return _HEADER.pack(_MAGIC, len(header)) + header + b"".join(chunks)
+
+
+def write(archive: LocalStore, month: str, items: list[dict[str, Any]]) -> str:
+    """Store ``items`` (all starting in ``month``, 'YYYY-MM') as a new file of that month; returns its key."""
+    key = f"{_PREFIX}month={month}/part-{uuid.uuid4().hex}.bkc"
+    archive.put(key, encode_file(items))
+    return key
+
+
+def month_of(start_time: str) -> str:
+    return start_time[:7]
+
+
+def _header(archive: LocalStore, key: str) -> tuple[dict[str, Any], int]:
+    magic, size = _HEADER.unpack(archive.read(key, 0, _HEADER.size))
+    if magic != _MAGIC:
+        raise ValueError(f"Not an archive file: {key}")
+    return json.loads(archive.read(key, _HEADER.size, size)), _HEADER.size + size
+
+
+def _scan_file(  # noqa: PLR0913, PLR0917
+    archive: LocalStore, key: str, user_id: str, lo: int | None, hi: int | None, status: str | None
+) -> Iterator[dict[str, Any]]:
+    header, base = _header(archive, key)
+
+    def column(group: dict[str, Any], name: str) -> list[Any]:
+        offset, length = group["columns"][name]
+        return _decode(_COLUMNS[name], archive.read(key, base + offset, length))
+
+    for group in header["groups"]:
+        first, last = group["starts"]
+        if not group["users"][0] <= user_id <= group["users"][-1]:
+            continue
+        if (lo is not None and last < lo) or (hi is not None and first > hi):
+            continue
+        users = column(group, "user_id")
+        # Rows are sorted by user, so the user's rows are one run
+        begin, stop = bisect.bisect_left(users, user_id), bisect.bisect_right(users, user_id)
+        starts = column(group, "start")
+        rows = [i for i in range(begin, stop) if (lo is None or starts[i] >= lo) and (hi is None or starts[i] <= hi)]
+        if status is not None and rows:
+            statuses = column(group, "status")
+            rows = [i for i in rows if statuses[i] == status]
+        if not rows:
+            continue
+        values = {name: column(group, name) for name in _COLUMNS if name not in ("user_id", "start")}
+        for i in rows:
+            item: dict[str, Any] = {
+                "booking_id": values["booking_id"][i],
+                "user_id": user_id,
+                "resource_id": values["resource_id"][i],
+                "start_time": _iso(starts[i]),
+                "end_time": _iso(values["end"][i]),
+                "status": values["status"][i],
+                "version": values["version"][i],
+            }
+            for name in ("ttl", "reminder_lead_seconds"):
+                if values[name][i] != _NONE:
+                    item[name] = values[name][i]
+            if values["series_id"][i]:
+                item["series_id"] = values["series_id"][i]
+            yield item
+
+
+def read(  # noqa: PLR0913
+    archive: LocalStore,
+    user_id: str,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    *,
+    after: tuple[str, str] | None = None,
+    status: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """A user's archived bookings starting in [start_from, start_to] in (start_time, booking_id) order.
+
+    Lazy: a month's files are only read once the previous month's bookings have been consumed. ``after`` skips
+    up to and including a (start_time, booking_id) position. A booking archived twice (a job rerun after it
+    stopped between writing a file and deleting the bookings) comes back once, at its latest version.
+    """
+    lo = (start_from - _EPOCH) // timedelta(microseconds=1) if start_from is not None else None
+    hi = (start_to - _EPOCH) // timedelta(microseconds=1) if start_to is not None else None
+    if after is not None:
+        lo = max(lo or 0, _micros(after[0]))
+    first = _iso(lo)[:7] if lo is not None else None
+    last = _iso(hi)[:7] if hi is not None else None
+    for partition in archive.prefixes(_PREFIX):
+        month = partition[len(_PREFIX) :].removeprefix("month=").rstrip("/")
+        if (first is not None and month < first) or (last is not None and month > last):
+            continue
+        latest: dict[str, dict[str, Any]] = {}
+        for key in archive.keys(partition):
+            for item in _scan_file(archive, key, user_id, lo, hi, status):
+                known = latest.get(item["booking_id"])
+                if known is None or known["version"] < item["version"]:
+                    latest[item["booking_id"]] = item
+        for item in sorted(latest.values(), key=lambda it: (it["start_time"], it["booking_id"])):
+            if after is None or (item["start_time"], item["booking_id"]) > after:
+                yield item
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Move past bookings from the bookings table to the archive")
+    parser.add_argument(
+        "--older-than-days",
+        type=int,
+        default=AFTER_DAYS,
+        help=f"archive bookings that ended longer ago (default {AFTER_DAYS})",
+    )
+    args = parser.parse_args(argv)
+    if store() is None:
+        parser.error("ARCHIVE_PATH is not set")
+    from app import dal  # noqa: PLC0415 - app.dal imports this module
+
+    print(json.dumps({"archived": dal.archive_bookings(args.older_than_days)}))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
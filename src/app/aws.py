@@ -0,0 +1,67 @@
+"""Lazily created boto3 clients and DynamoDB attribute-value marshalling.
+
+boto3/botocore take well over 100 ms to import and a client costs more again to build, so neither happens at
+module import time: clients are created on first use and cached for the life of the execution environment.
+The marshalling helpers cover the types this service stores and avoid importing ``boto3.dynamodb.types``.
+"""
+
+from __future__ import annotations
+
+from decimal import Decimal
+from functools import cache
+from typing import Any
+
+
+@cache
+def client(service_name: str) -> Any:
+    import boto3  # noqa: PLC0415 - deferred on purpose, see module docstring
+
+    return boto3.client(service_name)  # type: ignore[call-overload]
+
+
+def serialize_value(value: Any) -> dict[str, Any]:  # noqa: PLR0911
+    if value is None:
+        return {"NULL": True}
+    if isinstance(value, bool):
+        return {"BOOL": value}
+    if isinstance(value, str):
+        return {"S": value}
+    if isinstance(value, int | Decimal):
+        return {"N": str(value)}
+    if isinstance(value, float):
+        return {"N": repr(value)}
+    if isinstance(value, dict):
+        return {"M": {k: serialize_value(v) for k, v in value.items()}}
+    if isinstance(value, list | tuple):
+        return {"L": [serialize_value(v) for v in value]}
+    if isinstance(value, set | frozenset):
+        return {"SS": sorted(value)}
+    raise TypeError(f"Unsupported DynamoDB attribute type: {type(value).__name__}")
+
+
+def deserialize_value(attr: dict[str, Any]) -> Any:  # noqa: PLR0911
+    [(kind, value)] = attr.items()
+    if kind == "S":
+        return value
+    if kind == "N":
+        # Whole numbers come back as int (our TTLs, versions, epochs); anything else keeps full precision
+        return int(value) if value.lstrip("-").isdigit() else Decimal(value)
+    if kind == "M":
+        return {k: deserialize_value(v) for k, v in value.items()}
+    if kind == "L":
+        return [deserialize_value(v) for v in value]
+    if kind == "BOOL":
+        return value
+    if kind == "NULL":
+        return None
+    if kind == "SS":
+        return set(value)
+    raise TypeError(f"Unsupported DynamoDB attribute type: {kind}")
+
+
+def serialize(item: dict[str, Any]) -> dict[str, Any]:
+    return {k: serialize_value(v) for k, v in item.items()}
+
+
+def deserialize(item: dict[str, Any]) -> dict[str, Any]:
+    return {k: deserialize_value(v) for k, v in item.items()}
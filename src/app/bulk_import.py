@@ -0,0 +1,373 @@
+"""Bulk import of bookings from CSV or NDJSON, for backfills and migrations from other systems.
+
+Usage: python -m app.bulk_import bookings.csv [--workers 4] [--batch-size 100] [--rate 100] [--max-rate 1000]
+
+Rows (``user_id``, ``resource_id``, ``start_time``, ``end_time``, ``reminder_lead_seconds``; an empty CSV cell is
+a missing value) are read one at a time and validated as ``BookingCreate`` a batch at a time. Valid rows go to a
+pool of writer threads, each owning the resources that hash to it so no two writers contend for a resource's
+schedule buckets, and are written through ``dal.create_bookings``: schedule holds, reminder TTLs and scheduled
+reminders as for the API, then BatchWriteItem. A token bucket shared by the writers caps rows per second. It
+starts at ``--rate``, grows by one batch per second after every batch written in full and halves whenever
+DynamoDB throttles or leaves items unprocessed; throttled batches and rows left unprocessed are resubmitted.
+
+Each row's booking id is derived from the source path and the row number, so resubmitting a batch that failed
+part way (some rows written or holding their slots) rewrites those rows instead of duplicating them or
+conflicting with their own holds. A batch still throttled after every attempt stops the import.
+
+Rows that fail validation, overlap a stored booking or stay unprocessed go to the rejects file as NDJSON (the
+row's fields plus ``row`` and ``error``), which can be fixed and imported in turn. The checkpoint file records
+the rows that are done after every batch, so running the same command again resumes without writing a row
+twice. A throughput report is printed as JSON at the end.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+from typing import Any, NamedTuple, TextIO
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+from pydantic import TypeAdapter, ValidationError
+
+from app import dal
+from app.models import BookingCreate
+
+logger = Logger()
+
+_BOOKINGS = TypeAdapter(list[BookingCreate])
+# Errors DynamoDB answers a write rate the table cannot take with (once boto3's own retries are used up)
+_THROTTLED = frozenset({"ProvisionedThroughputExceededException", "ThrottlingException", "RequestLimitExceeded"})
+# Submissions of a row DynamoDB keeps leaving unprocessed (or of a batch it keeps throttling) before giving up
+_MAX_ATTEMPTS = 5
+_BOOKING_ID_NAMESPACE = uuid.UUID("5b0d7f3c-2f6e-4c55-9a8e-6d1f0c3b2a91")
+_MIN_RATE = 1.0
+# Batches waiting for each writer; with the one being written, this bounds the rows held in memory
+_QUEUED_BATCHES = 2
+_PROGRESS_INTERVAL_SECONDS = 10.0
+
+# (row number in the input, counting from 1; the row as read)
+Row = tuple[int, Any]
+Batch = list[tuple[Row, BookingCreate]]
+
+
+class Report(NamedTuple):
+    read: int  # rows read from the input, skipped ones included
+    skipped: int  # done in an earlier run, according to the checkpoint
+    imported: int
+    rejected: int
+    seconds: float
+    rows_per_second: float
+    final_rate: float  # the rate limiter's rows per second when the import ended
+
+
+class TokenBucket:
+    """Rows per second shared by the writer threads, adapting to what the table accepts (AIMD).
+
+    ``acquire`` takes its tokens at once and sleeps until the bucket is out of debt again, so a batch larger
+    than the one-second burst still goes through and concurrent callers queue up behind each other.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        max_rate: float,
+        step: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.max_rate = max(rate, max_rate)
+        self._step = step
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = rate
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate) - tokens
+            self._updated = now
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.rate = max(_MIN_RATE, self.rate / 2)
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self._step)
+
+
+class Checkpoint:
+    """The input rows that are done (imported or rejected): all before ``next_row``, and ``done`` after it.
+
+    Saved (atomically) on every change when it has a path; loading one written for another input raises
+    ValueError.
+    """
+
+    def __init__(self, path: Path | None, source: str) -> None:
+        self._path = path
+        self._source = source
+        self.next_row = 1
+        self.done: set[int] = set()
+        self._lock = threading.Lock()
+        if path is not None and path.exists():
+            saved = json.loads(path.read_text())
+            if saved["source"] != source:
+                raise ValueError(f"Checkpoint {path} is for {saved['source']}, not {source}")
+            self.next_row, self.done = saved["next_row"], set(saved["done"])
+
+    def is_done(self, row: int) -> bool:
+        with self._lock:
+            return row < self.next_row or row in self.done
+
+    def mark(self, rows: Iterable[int]) -> None:
+        with self._lock:
+            self.done.update(rows)
+            while self.next_row in self.done:
+                self.done.remove(self.next_row)
+                self.next_row += 1
+            if self._path is None:
+                return
+            saved = {"source": self._source, "next_row": self.next_row, "done": sorted(self.done)}
+            partial = self._path.with_name(f"{self._path.name}.tmp")
+            partial.write_text(json.dumps(saved))
+            os.replace(partial, self._path)
+
+
+def read_rows(path: Path, fmt: str) -> Iterator[Row]:
+    """The input's rows one at a time; an NDJSON line that is not JSON is passed on as text, to be rejected."""
+    with path.open(encoding="utf-8", newline="" if fmt == "csv" else None) as f:
+        if fmt == "csv":
+            for number, cells in enumerate(csv.DictReader(f), start=1):
+                yield number, {field: value if value != "" else None for field, value in cells.items()}
+            return
+        number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                record: Any = json.loads(line)
+            except json.JSONDecodeError:
+                record = line.rstrip("\n")
+            yield number, record
+
+
+def _reason(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" if error["loc"] else error["msg"]
+        for error in exc.errors()
+    )
+
+
+def validate(rows: list[Row]) -> tuple[Batch, list[tuple[Row, str]]]:
+    """Split rows into valid bookings and rejected rows with the reason; one validation pass unless some fail."""
+    try:
+        return list(zip(rows, _BOOKINGS.validate_python([record for _, record in rows]), strict=True)), []
+    except ValidationError:
+        pass
+    valid: Batch = []
+    invalid: list[tuple[Row, str]] = []
+    for row in rows:
+        try:
+            valid.append((row, BookingCreate.model_validate(row[1])))
+        except ValidationError as exc:
+            invalid.append((row, _reason(exc)))
+    return valid, invalid
+
+
+def booking_id(source: str, row: int) -> str:
+    """The id a row of ``source`` is imported under, the same in every run."""
+    return str(uuid.uuid5(_BOOKING_ID_NAMESPACE, f"{source}\n{row}"))
+
+
+class _Run:
+    """What the reader and the writer threads of one import share."""
+
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        source: str,
+        limiter: TokenBucket,
+        checkpoint: Checkpoint,
+        rejects: TextIO,
+        workers: int,
+        batch_size: int,
+    ) -> None:
+        self.source = source
+        self.limiter = limiter
+        self.checkpoint = checkpoint
+        self.imported = 0
+        self.rejected = 0
+        self.error: BaseException | None = None
+        self._rejects = rejects
+        self._batch_size = batch_size
+        self._queues: list[queue.Queue[Batch | None]] = [queue.Queue(maxsize=_QUEUED_BATCHES) for _ in range(workers)]
+        self._pending: list[Batch] = [[] for _ in range(workers)]
+        self._lock = threading.Lock()
+
+    def reject(self, rejected: list[tuple[Row, str]]) -> None:
+        if not rejected:
+            return
+        lines = [
+            json.dumps({**(record if isinstance(record, dict) else {"input": record}), "row": number, "error": reason})
+            for (number, record), reason in rejected
+        ]
+        with self._lock:
+            self._rejects.write("".join(f"{line}\n" for line in lines))
+            self._rejects.flush()
+            self.rejected += len(rejected)
+        self.checkpoint.mark(number for (number, _), _ in rejected)
+
+    def dispatch(self, rows: list[Row]) -> None:
+        """Validate rows and hand the valid ones to the writer owning their resource."""
+        valid, invalid = validate(rows)
+        self.reject(invalid)
+        for row, payload in valid:
+            owner = zlib.crc32(payload.resource_id.encode()) % len(self._queues)
+            self._pending[owner].append((row, payload))
+            if len(self._pending[owner]) >= self._batch_size:
+                self._queues[owner].put(self._pending[owner])
+                self._pending[owner] = []
+
+    def close(self, complete: bool) -> None:
+        """Hand over the last, partial batches (when ``complete``) and tell the writers to stop after them."""
+        for batches, batch in zip(self._queues, self._pending, strict=True):
+            if batch and complete:
+                batches.put(batch)
+            batches.put(None)
+
+    def writers(self) -> list[threading.Thread]:
+        return [threading.Thread(target=self._work, args=(batches,), daemon=True) for batches in self._queues]
+
+    def _work(self, batches: queue.Queue[Batch | None]) -> None:
+        while (batch := batches.get()) is not None:
+            # After a failure keep draining, so the reader never blocks on a full queue
+            if self.error is not None:
+                continue
+            try:
+                self._write(batch)
+            except BaseException as exc:
+                self.error = exc
+
+    def _write(self, batch: Batch) -> None:
+        pending = batch
+        for attempt in range(1, _MAX_ATTEMPTS + 1):
+            self.limiter.acquire(len(pending))
+            try:
+                result = dal.create_bookings(
+                    [payload for _, payload in pending],
+                    [booking_id(self.source, number) for (number, _), _ in pending],
+                )
+            except (ClientError, dal.BatchUnprocessedError) as exc:
+                if isinstance(exc, ClientError) and exc.response.get("Error", {}).get("Code") not in _THROTTLED:
+                    raise
+                # Some of the batch may be written or holding its slots already; with the same ids a resubmission
+                # (or a rerun from the checkpoint) rewrites those rows, a rejected row would be imported twice
+                self.limiter.throttled()
+                if attempt == _MAX_ATTEMPTS:
+                    raise
+                continue
+            unprocessed = [i for i, reason in result.errors.items() if reason == dal.BATCH_WRITE_UNPROCESSED]
+            self.reject(
+                [
+                    (pending[i][0], reason)
+                    for i, reason in result.errors.items()
+                    if reason != dal.BATCH_WRITE_UNPROCESSED
+                ]
+            )
+            done = [number for i, ((number, _), _) in enumerate(pending) if i not in result.errors]
+            with self._lock:
+                self.imported += len(done)
+            self.checkpoint.mark(done)
+            if not unprocessed:
+                self.limiter.succeeded()
+                return
+            # create_bookings released their holds, so the rows can simply be submitted again
+            self.limiter.throttled()
+            pending = [pending[i] for i in unprocessed]
+        self.reject([(row, dal.BATCH_WRITE_UNPROCESSED) for row, _ in pending])
+
+
+def run(args: argparse.Namespace) -> Report:
+    source: Path = args.source
+    fmt = args.format or ("csv" if source.suffix.lower() == ".csv" else "ndjson")
+    checkpoint_path = None if args.no_checkpoint else args.checkpoint or source.with_name(f"{source.name}.checkpoint")
+    checkpoint = Checkpoint(checkpoint_path, str(source))
+    limiter = TokenBucket(args.rate, args.max_rate, step=args.batch_size)
+    rejects_path: Path = args.rejects or source.with_name(f"{source.name}.rejects.ndjson")
+    started = last_progress = time.monotonic()
+    read = skipped = 0
+    with rejects_path.open("a", encoding="utf-8") as rejects:
+        state = _Run(str(source), limiter, checkpoint, rejects, args.workers, args.batch_size)
+        writers = state.writers()
+        for writer in writers:
+            writer.start()
+        rows: list[Row] = []
+        try:
+            for row in read_rows(source, fmt):
+                read += 1
+                if checkpoint.is_done(row[0]):
+                    skipped += 1
+                    continue
+                rows.append(row)
+                if len(rows) >= args.batch_size:
+                    state.dispatch(rows)
+                    rows = []
+                if state.error is not None:
+                    break
+                if time.monotonic() - last_progress >= _PROGRESS_INTERVAL_SECONDS:
+                    last_progress = time.monotonic()
+                    progress = {"read": read, "imported": state.imported, "rejected": state.rejected}
+                    logger.info("Import progress", extra={**progress, "rate": limiter.rate})
+            if rows and state.error is None:
+                state.dispatch(rows)
+        finally:
+            state.close(complete=state.error is None)
+            for writer in writers:
+                writer.join()
+    if state.error is not None:
+        raise state.error
+    seconds = time.monotonic() - started
+    throughput = (state.imported + state.rejected) / seconds if seconds else 0.0
+    return Report(read, skipped, state.imported, state.rejected, seconds, throughput, limiter.rate)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="CSV (with a header row) or NDJSON file of bookings")
+    parser.add_argument("--format", choices=("csv", "ndjson"), help="default: from the file suffix")
+    parser.add_argument("--workers", type=int, default=4, help="writer threads (default 4)")
+    parser.add_argument("--batch-size", type=int, default=100, help="bookings per create_bookings call (default 100)")
+    parser.add_argument("--rate", type=float, default=100.0, help="rows per second to start at (default 100)")
+    parser.add_argument("--max-rate", type=float, default=1000.0, help="rows per second to grow up to (default 1000)")
+    parser.add_argument("--checkpoint", type=Path, help="default: <source>.checkpoint")
+    parser.add_argument("--no-checkpoint", action="store_true", help="start from the first row, record nothing")
+    parser.add_argument("--rejects", type=Path, help="default: <source>.rejects.ndjson (appended to)")
+    args = parser.parse_args(argv)
+    if args.workers < 1 or args.batch_size < 1 or args.rate <= 0:
+        parser.error("--workers, --batch-size and --rate must be positive")
+    try:
+        report = run(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(json.dumps(report._asdict()))
+    return 0 if report.rejected == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
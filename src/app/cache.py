@@ -0,0 +1,61 @@
+"""Bounded in-process LRU cache with a per-entry time-to-live.
+
+Lives for the life of a warm Lambda execution environment. Entries are dropped on local writes; changes made
+by other containers become visible once an entry's TTL runs out, which bounds the staleness.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    def __init__(self, max_size: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Called with "Hit", "Miss" or "Eviction"; the API wires this to its metrics
+        self.listener: Callable[[str], None] | None = None
+
+    def _record(self, event: str) -> None:
+        if self.listener is not None:
+            self.listener(event)
+
+    def get(self, key: str) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            self._record("Miss")
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self._record("Hit")
+        return entry[1]
+
+    def put(self, key: str, value: V) -> None:
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+            self._record("Eviction")
+
+    def invalidate(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,31 +1,135 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import heapq
+import json
+import math
 import os
+import time
 import uuid
-from datetime import UTC, datetime
-from typing import TYPE_CHECKING, Any, TypedDict, cast
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from contextvars import copy_context
+from datetime import UTC, datetime, timedelta
+from functools import wraps
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, ParamSpec, TypedDict, TypeVar, cast
 
-import boto3
 from aws_lambda_powertools import Logger
+from botocore.exceptions import ClientError
+from pydantic import TypeAdapter
+
+from . import archive, aws, instrumentation, recurrence, reminders, user_summary
+from .cache import TTLCache
 
 if TYPE_CHECKING:
     # Only for static type checking; not imported at runtime
-    from mypy_boto3_dynamodb.service_resource import DynamoDBServiceResource
-    from mypy_boto3_dynamodb.service_resource import Table as DynamoDBTable
+    from mypy_boto3_dynamodb.client import DynamoDBClient
+
+    from . import memory_backend
 else:
     # Fallbacks to satisfy annotations at runtime
-    DynamoDBServiceResource = Any  # type: ignore[assignment]
-    DynamoDBTable = Any  # type: ignore[assignment]
+    DynamoDBClient = Any  # type: ignore[assignment]
 
-from .models import Booking, BookingCreate, BookingUpdate
+from .models import (
+    END_BEFORE_START,
+    Booking,
+    BookingCreate,
+    BookingSeries,
+    BookingSeriesCreate,
+    BookingSummary,
+    BookingUpdate,
+    Recurrence,
+    UpcomingBooking,
+)
+from .recurrence import SeriesRule
 
 logger = Logger()
 _TABLE_NAME = os.environ.get("TABLE_NAME", "bookings")
+_SCHEDULE_TABLE_NAME = os.environ.get("SCHEDULE_TABLE_NAME", "booking-schedule")
+# Powertools idempotency records (see app.idempotency): id (HASH), TTL on "expiration"
+_IDEMPOTENCY_TABLE_NAME = os.environ.get("IDEMPOTENCY_TABLE_NAME", "booking-idempotency")
+# GSI: user_id (HASH) + start_time (RANGE); replaces user_id_index, which the template keeps until a later deployment
+_USER_INDEX = "user_id_start_time_index"
+# Sparse: only active bookings carry active_start (their start_time); cancelling removes it, so listings of
+# active bookings never read cancelled ones, and a start-time key condition skips the past ones
+_ACTIVE_INDEX = "user_id_active_start_index"
+# Sparse GSI: user_id (HASH) + series_start (RANGE); only series items carry series_start
+_USER_SERIES_INDEX = "user_id_series_start_index"
+# GSI: resource_id (HASH) + start_time (RANGE); series items have no start_time and stay out of it
+_RESOURCE_INDEX = "resource_id_start_time_index"
+
+# Low-level client (no resource layer), created on first use; tests swap in a fake by assigning it
+_client: DynamoDBClient | None = None
+# "dynamodb" (default) or "memory": the in-process engine from app.memory_backend, for local runs and load tests
+_STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "dynamodb")
 
-_dynamodb: DynamoDBServiceResource = boto3.resource("dynamodb")
-_table: DynamoDBTable = _dynamodb.Table(_TABLE_NAME)
+# Optional read-through cache for get_booking; 0 disables it. Entries from other containers' writes can be
+# up to BOOKING_CACHE_TTL_SECONDS stale.
+_CACHE_SIZE = int(os.environ.get("BOOKING_CACHE_SIZE", "0"))
+_CACHE_TTL_SECONDS = float(os.environ.get("BOOKING_CACHE_TTL_SECONDS", "5"))
+booking_cache: TTLCache[Booking] | None = TTLCache(_CACHE_SIZE, _CACHE_TTL_SECONDS) if _CACHE_SIZE > 0 else None
+# Optional booking_id -> version cache answering conditional GETs (If-None-Match) without reading the item;
+# 0 disables it. Same TTL and invalidation as the booking cache.
+_VERSION_CACHE_SIZE = int(os.environ.get("BOOKING_VERSION_CACHE_SIZE", "0"))
+version_cache: TTLCache[int] | None = (
+    TTLCache(_VERSION_CACHE_SIZE, _CACHE_TTL_SECONDS) if _VERSION_CACHE_SIZE > 0 else None
+)
 
 BOOKING_NOT_FOUND = "Booking not found"
+BOOKING_CONFLICT = "Booking conflicts with an existing booking"
+BOOKING_VERSION_MISMATCH = "Booking has changed since the given version"
+SERIES_NOT_FOUND = "Series not found"
+BATCH_WRITE_UNPROCESSED = "Booking could not be written, retry later"
+BATCH_READ_UNPROCESSED = "Bookings could not be read, retry later"
+INVALID_CURSOR = "Invalid cursor"
+
+_DAY_SECONDS = 86400
+# Caps the day buckets one write touches, keeping old + new buckets + the booking under the 100-action
+# TransactWriteItems limit
+_MAX_BOOKING_DAYS = 31
+# Schedule buckets expire this long after their day ends
+_SCHEDULE_RETENTION_SECONDS = 7 * _DAY_SECONDS
+_MAX_SCHEDULE_ATTEMPTS = 3
+# Schedule-table sort key of the per-resource bucket holding the rules of every series on that resource
+_SERIES_BUCKET = "series"
+# Occurrence ids are "<series_id>@<start epoch>"; uuid4 booking ids never contain the separator
+_OCCURRENCE_SEPARATOR = "@"
+# Series items share the bookings table but have no start_time, so this keeps booking writes off them
+_IS_BOOKING = "attribute_exists(start_time)"
+# Every booking write bumps version (items written before it existed count as version 0); it is the ETag
+_BUMP_VERSION = "version = if_not_exists(version, :zero) + :one"
+_BUMP_VERSION_VALUES = {":zero": 0, ":one": 1}
+
+# BatchGetItem / BatchWriteItem request limits, and retry policy for their unprocessed keys/items
+_BATCH_GET_SIZE = 100
+_BATCH_WRITE_SIZE = 25
+_MAX_BATCH_ATTEMPTS = 5
+_BATCH_RETRY_BASE_DELAY_SECONDS = 0.05
+# Items per query page of an export; a page (and the one read ahead) is what an export holds in memory
+_EXPORT_PAGE_SIZE = 500
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+_WRITE_CALLS = {"Put": "put_item", "Update": "update_item", "Delete": "delete_item"}
+
+_BOOKING = TypeAdapter(Booking)
+_BOOKINGS = TypeAdapter(list[Booking])
+
+
+class BookingConflictError(Exception):
+    """Raised when a booking would overlap another active booking on the same resource."""
+
+
+class BookingVersionMismatchError(Exception):
+    """Raised when a conditional write's expected version is not the booking's current one."""
+
+
+class BatchUnprocessedError(Exception):
+    """Raised when DynamoDB keeps leaving part of a batch read unprocessed (throttling); the call can be retried."""
 
 
 class BookingItem(TypedDict, total=False):
@@ -35,7 +139,71 @@ class BookingItem(TypedDict, total=False):
     start_time: str
     end_time: str
     ttl: int
+    reminder_lead_seconds: int
     status: str
+    series_id: str
+    active_start: str  # == start_time while active; the _ACTIVE_INDEX sort key
+    version: int
+
+
+class SeriesItem(TypedDict, total=False):
+    """A recurring series, stored once in the bookings table; ``booking_id`` is the series id."""
+
+    booking_id: str
+    user_id: str
+    resource_id: str
+    series_start: int
+    duration: int
+    period: int
+    last: int
+    exceptions: list[int]
+    freq: str
+    interval: int
+    count: int
+    until: str
+    reminder_lead_seconds: int
+
+
+class ScheduleDayItem(TypedDict):
+    """Per-resource, per-UTC-day bucket of the active booking intervals on that resource."""
+
+    resource_id: str
+    day: str
+    intervals: dict[str, list[int]]  # booking_id -> [start epoch, end epoch)
+    version: int
+    ttl: int
+
+
+class ScheduleSeriesItem(TypedDict):
+    """Per-resource bucket with the rules of the series on that resource, so overlap checks can expand them."""
+
+    resource_id: str
+    day: str  # always _SERIES_BUCKET
+    series: dict[str, SeriesRule]
+    version: int
+    ttl: int
+
+
+class BookingPage(NamedTuple):
+    items: list[Booking]
+    next_cursor: str | None
+
+
+class BatchCreateResult(NamedTuple):
+    created: list[Booking]
+    errors: dict[int, str]  # index in the request -> reason
+
+
+class BatchGetResult(NamedTuple):
+    bookings: list[Booking]
+    not_found: list[str]
+
+
+# (resource_id, start epoch, end epoch)
+Interval = tuple[str, int, int]
+ScheduleKey = tuple[str, str]
+# Partition key of the bookings an export is for
+Owner = Literal["user_id", "resource_id"]
 
 
 def _dt_to_iso(dt: datetime) -> str:
@@ -48,6 +216,22 @@ def _iso_to_dt(s: str) -> datetime:
     return datetime.fromisoformat(s)
 
 
+def _epoch(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return int(dt.timestamp())
+
+
+def _epoch_ceil(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return math.ceil(dt.timestamp())
+
+
+def _from_epoch(ts: int) -> datetime:
+    return datetime.fromtimestamp(ts, UTC)
+
+
 def _compute_ttl_from_reminder(start_time: datetime, lead_seconds: int | None) -> int | None:
     if lead_seconds is None:
         return None
@@ -58,136 +242,1675 @@ def _compute_ttl_from_reminder(start_time: datetime, lead_seconds: int | None) -
     return max(0, int(reminder_at))
 
 
-def create_booking(payload: BookingCreate) -> Booking:
-    booking_id = str(uuid.uuid4())
+def _ddb() -> DynamoDBClient:
+    global _client  # noqa: PLW0603
+    if _client is None:
+        if _STORAGE_BACKEND == "memory":
+            from . import memory_backend  # noqa: PLC0415 - only needed when selected
+
+            client = cast(DynamoDBClient, memory_backend.shared(memory_schemas()))
+        elif _STORAGE_BACKEND == "dynamodb":
+            client = cast(DynamoDBClient, aws.client("dynamodb"))
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {_STORAGE_BACKEND}")
+        _client = instrumentation.instrument(client, "dynamodb")
+    return _client
+
+
+def memory_schemas() -> dict[str, memory_backend.TableSchema]:
+    """The tables as template.yaml defines them, for the in-memory engine."""
+    from .memory_backend import TableSchema  # noqa: PLC0415 - only needed when selected
+
+    return {
+        _TABLE_NAME: TableSchema(
+            key=("booking_id",),
+            indexes={
+                _USER_INDEX: ("user_id", "start_time"),
+                _ACTIVE_INDEX: ("user_id", "active_start"),
+                _USER_SERIES_INDEX: ("user_id", "series_start"),
+                _RESOURCE_INDEX: ("resource_id", "start_time"),
+            },
+            # Scheduled reminders keep the booking: its ttl is then only the reminder time
+            ttl_attribute=None if reminders.SCHEDULED else "ttl",
+            stream=True,
+        ),
+        _SCHEDULE_TABLE_NAME: TableSchema(key=("resource_id", "day"), ttl_attribute="ttl"),
+        reminders.TABLE_NAME: TableSchema(key=("bucket", "booking_id"), ttl_attribute="ttl"),
+        _IDEMPOTENCY_TABLE_NAME: TableSchema(key=("id",), ttl_attribute="expiration"),
+        user_summary.TABLE_NAME: TableSchema(key=("user_id",)),
+    }
+
+
+def _booking_interval(resource_id: str, start_time: datetime, end_time: datetime) -> Interval | None:
+    start, end = _epoch(start_time), _epoch(end_time)
+    # Bookings must end after they start (models.BookingCreate); empty ones stored before that hold nothing
+    return (resource_id, start, end) if end > start else None
+
+
+def _schedule_keys(interval: Interval | None) -> list[ScheduleKey]:
+    if interval is None:
+        return []
+    resource_id, start, end = interval
+    first, last = start // _DAY_SECONDS, (end - 1) // _DAY_SECONDS
+    if last - first >= _MAX_BOOKING_DAYS:
+        raise ValueError(f"Bookings may not span more than {_MAX_BOOKING_DAYS} days")
+    return [
+        (resource_id, datetime.fromtimestamp(day * _DAY_SECONDS, UTC).date().isoformat())
+        for day in range(first, last + 1)
+    ]
+
+
+def _backoff(attempt: int) -> None:
+    if attempt:
+        time.sleep(_BATCH_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+
+
+def _batch_get(table_name: str, keys: list[dict[str, Any]], consistent_read: bool = False) -> list[dict[str, Any]]:
+    """BatchGetItem over any number of keys: chunks of 100, unprocessed keys retried with backoff."""
+    found: list[dict[str, Any]] = []
+    pending = [aws.serialize(key) for key in keys]
+    attempt = 0
+    while pending:
+        if attempt >= _MAX_BATCH_ATTEMPTS:
+            logger.warning("BatchGetItem left keys unprocessed", extra={"unprocessed_count": len(pending)})
+            raise BatchUnprocessedError(BATCH_READ_UNPROCESSED)
+        _backoff(attempt)
+        unprocessed: list[dict[str, Any]] = []
+        for start in range(0, len(pending), _BATCH_GET_SIZE):
+            request: Any = {"Keys": pending[start : start + _BATCH_GET_SIZE], "ConsistentRead": consistent_read}
+            resp = cast(dict[str, Any], _ddb().batch_get_item(RequestItems={table_name: request}))
+            found.extend(aws.deserialize(raw) for raw in resp.get("Responses", {}).get(table_name, []))
+            unprocessed.extend(resp.get("UnprocessedKeys", {}).get(table_name, {}).get("Keys", []))
+        pending, attempt = unprocessed, attempt + 1
+    return found
+
+
+def _batch_write(table_name: str, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """BatchWriteItem puts in chunks of 25, retrying unprocessed items with backoff.
+
+    Returns the items that were still unprocessed after the last attempt.
+    """
+    pending: list[Any] = [{"PutRequest": {"Item": aws.serialize(item)}} for item in items]
+    for attempt in range(_MAX_BATCH_ATTEMPTS):
+        if not pending:
+            break
+        _backoff(attempt)
+        unprocessed: list[dict[str, Any]] = []
+        for start in range(0, len(pending), _BATCH_WRITE_SIZE):
+            chunk = pending[start : start + _BATCH_WRITE_SIZE]
+            resp = cast(dict[str, Any], _ddb().batch_write_item(RequestItems={table_name: chunk}))
+            unprocessed.extend(resp.get("UnprocessedItems", {}).get(table_name, []))
+        pending = unprocessed
+    return [aws.deserialize(request["PutRequest"]["Item"]) for request in pending]
+
+
+def _read_schedule(keys: list[ScheduleKey]) -> dict[ScheduleKey, ScheduleDayItem]:
+    """Strongly consistent read of the given day buckets."""
+    raw = _batch_get(_SCHEDULE_TABLE_NAME, [{"resource_id": r, "day": d} for r, d in keys], consistent_read=True)
+    days = [cast(ScheduleDayItem, day) for day in raw]
+    return {(day["resource_id"], day["day"]): day for day in days}
+
+
+def _schedule_put(key: ScheduleKey, intervals: dict[str, list[int]], current: ScheduleDayItem | None) -> dict[str, Any]:
+    resource_id, day = key
+    version = int(current["version"]) if current else 0
+    day_end = int(datetime.fromisoformat(day).replace(tzinfo=UTC).timestamp()) + _DAY_SECONDS
+    item: ScheduleDayItem = {
+        "resource_id": resource_id,
+        "day": day,
+        "intervals": intervals,
+        "version": version + 1,
+        "ttl": day_end + _SCHEDULE_RETENTION_SECONDS,
+    }
+    put: dict[str, Any] = {"TableName": _SCHEDULE_TABLE_NAME, "Item": aws.serialize(dict(item))}
+    # Optimistic lock: the transaction fails if anyone else touched the bucket since we read it
+    put.update(_version_condition(current))
+    return {"Put": put}
+
+
+def _series_bucket_put(
+    resource_id: str, rules: dict[str, SeriesRule], current: ScheduleSeriesItem | None
+) -> dict[str, Any]:
+    version = int(current["version"]) if current else 0
+    ends = [int(rule["last"]) + int(rule["duration"]) for rule in rules.values()]
+    item: ScheduleSeriesItem = {
+        "resource_id": resource_id,
+        "day": _SERIES_BUCKET,
+        "series": rules,
+        "version": version + 1,
+        "ttl": max(ends, default=0) + _SCHEDULE_RETENTION_SECONDS,
+    }
+    put: dict[str, Any] = {"TableName": _SCHEDULE_TABLE_NAME, "Item": aws.serialize(dict(item))}
+    put.update(_version_condition(current))
+    return {"Put": put}
+
+
+def _series_bucket_check(resource_id: str, current: ScheduleSeriesItem | None) -> dict[str, Any]:
+    # Read-only guard: a series created on the resource after our read cancels the transaction
+    check = {
+        "TableName": _SCHEDULE_TABLE_NAME,
+        "Key": aws.serialize({"resource_id": resource_id, "day": _SERIES_BUCKET}),
+        **_version_condition(current),
+    }
+    return {"ConditionCheck": check}
+
+
+def _version_condition(current: ScheduleDayItem | ScheduleSeriesItem | None) -> dict[str, Any]:
+    if current:
+        return {
+            "ConditionExpression": "version = :v",
+            "ExpressionAttributeValues": {":v": aws.serialize_value(int(current["version"]))},
+        }
+    return {"ConditionExpression": "attribute_not_exists(version)"}
+
+
+def _series_conflict(rules: dict[str, SeriesRule], interval: Interval) -> bool:
+    _, start, end = interval
+    return any(next(recurrence.overlapping(rule, start, end), None) is not None for rule in rules.values())
+
+
+def _day_bucket_actions(
+    booking_id: str,
+    day_keys: list[ScheduleKey],
+    days: dict[ScheduleKey, ScheduleDayItem],
+    new: Interval | None,
+    new_keys: list[ScheduleKey],
+) -> list[dict[str, Any]]:
+    """Bucket puts moving ``booking_id`` to ``new``, raising if it overlaps another booking there."""
+    actions = []
+    for key in day_keys:
+        current = days.get(key)
+        intervals = {bid: [int(s), int(e)] for bid, (s, e) in (current["intervals"] if current else {}).items()}
+        intervals.pop(booking_id, None)
+        if new is not None and key in new_keys:
+            _, start, end = new
+            if any(other_start < end and start < other_end for other_start, other_end in intervals.values()):
+                raise BookingConflictError(BOOKING_CONFLICT)
+            intervals[booking_id] = [start, end]
+        actions.append(_schedule_put(key, intervals, current))
+    return actions
+
+
+def _series_actions(
+    resource_id: str,
+    series_bucket: ScheduleSeriesItem | None,
+    new: Interval | None,
+    occurrence: tuple[str, str, int] | None,
+) -> list[dict[str, Any]]:
+    """Series-side transaction actions for a booking write, raising if ``new`` hits a series occurrence."""
+    rules = dict(series_bucket["series"]) if series_bucket else {}
+    if occurrence is None:
+        actions = [_series_bucket_check(resource_id, series_bucket)]
+    else:
+        _, series_id, occurrence_start = occurrence
+        rule = rules.get(series_id)
+        if rule is None or not recurrence.is_occurrence(rule, occurrence_start):
+            raise KeyError(BOOKING_NOT_FOUND)
+        rules[series_id] = {**rule, "exceptions": [*rule["exceptions"], occurrence_start]}
+        actions = [
+            _series_bucket_put(resource_id, rules, series_bucket),
+            _series_exceptions_update(series_id, rules[series_id]["exceptions"]),
+        ]
+    if new is not None and _series_conflict(rules, new):
+        raise BookingConflictError(BOOKING_CONFLICT)
+    return actions
+
+
+def _write_with_schedule(  # noqa: PLR0913, PLR0917
+    booking_id: str,
+    booking_action: dict[str, Any] | None,
+    old: Interval | None,
+    new: Interval | None,
+    occurrence: tuple[str, str, int] | None = None,
+    reminder: dict[str, Any] | None = None,
+) -> None:
+    """Apply a booking write together with the resource schedule changes it implies.
+
+    Only the day buckets covered by ``old``/``new`` are read, so the overlap check costs
+    O(bookings on that resource in those days). Bucket versions are checked inside the same
+    TransactWriteItems call as the booking write, so concurrent overlapping writes cannot both win.
+    ``new`` is also checked against the series on its resource. ``occurrence`` is the
+    (resource_id, series_id, start) of a series occurrence this write takes over: it is
+    recorded as an exception on the series in the same transaction. ``reminder`` (from
+    ``_reminder_put``) is written in the same transaction too.
+    """
+    old_keys = _schedule_keys(old)
+    new_keys = _schedule_keys(new)
+    day_keys = list(dict.fromkeys(old_keys + new_keys))
+    series_resource = occurrence[0] if occurrence else new[0] if new else None
+    keys = day_keys + ([(series_resource, _SERIES_BUCKET)] if series_resource is not None else [])
+
+    if not keys and reminder is None:
+        if booking_action is not None:
+            [(op, params)] = booking_action.items()
+            try:
+                getattr(_ddb(), _WRITE_CALLS[op])(**params)
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] == "ConditionalCheckFailedException":
+                    raise KeyError(BOOKING_NOT_FOUND) from exc
+                raise
+        return
+
+    for attempt in range(_MAX_SCHEDULE_ATTEMPTS):
+        days = _read_schedule(keys)
+        actions = [booking_action] if booking_action is not None else []
+        if reminder is not None:
+            actions.append(reminder)
+        if series_resource is not None:
+            series_bucket = cast(ScheduleSeriesItem | None, days.get((series_resource, _SERIES_BUCKET)))
+            actions.extend(_series_actions(series_resource, series_bucket, new, occurrence))
+        actions.extend(_day_bucket_actions(booking_id, day_keys, days, new, new_keys))
+
+        try:
+            _ddb().transact_write_items(TransactItems=actions)  # type: ignore[arg-type]
+            return
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            reasons = cast(list[dict[str, Any]], exc.response.get("CancellationReasons", []))
+            if booking_action is not None and reasons and reasons[0].get("Code") == "ConditionalCheckFailed":
+                raise KeyError(BOOKING_NOT_FOUND) from exc
+            logger.info("Resource schedule changed concurrently, retrying", extra={"attempt": attempt + 1})
+
+    # Kept losing the race for these buckets; treat as contention on the slot
+    raise BookingConflictError(BOOKING_CONFLICT)
+
+
+def find_free_slots(
+    resource_id: str, window_start: datetime, window_end: datetime, min_duration_seconds: int = 1
+) -> list[tuple[datetime, datetime]]:
+    """Free gaps of at least ``min_duration_seconds`` on a resource within [window_start, window_end).
+
+    Answered from the schedule buckets that overlap checks already maintain: one BatchGetItem for the window's
+    days plus the resource's series bucket, then interval arithmetic over the busy intervals in them. The cost
+    depends on the bookings in the window, never on a scan of the resource's history.
+    """
+    start, end = _epoch_ceil(window_start), _epoch(window_end)
+    if end <= start:
+        raise ValueError("Availability window must end after it starts")
+    if end - start > _MAX_BOOKING_DAYS * _DAY_SECONDS:
+        raise ValueError(f"Availability window may not span more than {_MAX_BOOKING_DAYS} days")
+    keys = [*_schedule_keys((resource_id, start, end)), (resource_id, _SERIES_BUCKET)]
+    # Eventually consistent is fine for a search; the booking write re-checks the slot anyway
+    buckets = _batch_get(_SCHEDULE_TABLE_NAME, [{"resource_id": r, "day": d} for r, d in keys])
+
+    busy: list[tuple[int, int]] = []
+    for bucket in buckets:
+        if bucket["day"] == _SERIES_BUCKET:
+            for rule in cast(ScheduleSeriesItem, bucket)["series"].values():
+                duration = int(rule["duration"])
+                busy.extend((s, s + duration) for s in recurrence.overlapping(rule, start, end))
+        else:
+            busy.extend((int(s), int(e)) for s, e in cast(ScheduleDayItem, bucket)["intervals"].values())
+
+    free: list[tuple[datetime, datetime]] = []
+    cursor = start
+    # Bookings spanning midnight appear in several buckets; sorting and sweeping handles the duplicates
+    for busy_start, busy_end in sorted(busy):
+        # Day buckets hold the whole day's bookings, including those outside the window
+        if busy_end <= start or busy_start >= end:
+            continue
+        if min(busy_start, end) - cursor >= min_duration_seconds:
+            free.append((_from_epoch(cursor), _from_epoch(min(busy_start, end))))
+        cursor = max(cursor, busy_end)
+    if end - cursor >= min_duration_seconds:
+        free.append((_from_epoch(cursor), _from_epoch(end)))
+    return free
+
+
+def _new_item(payload: BookingCreate, booking_id: str | None = None) -> BookingItem:
     ttl = _compute_ttl_from_reminder(payload.start_time, payload.reminder_lead_seconds)
+    start_time = _dt_to_iso(payload.start_time)
     item: BookingItem = {
-        "booking_id": booking_id,
+        "booking_id": booking_id or str(uuid.uuid4()),
         "user_id": payload.user_id,
         "resource_id": payload.resource_id,
-        "start_time": _dt_to_iso(payload.start_time),
+        "start_time": start_time,
         "end_time": _dt_to_iso(payload.end_time),
         "status": "active",
+        "active_start": start_time,
+        "version": 1,
     }
     if ttl is not None:
         item["ttl"] = ttl
+    if payload.reminder_lead_seconds is not None:
+        item["reminder_lead_seconds"] = payload.reminder_lead_seconds
+    return item
+
+
+def create_booking(payload: BookingCreate) -> Booking:
+    item = _new_item(payload)
+    booking_id = item["booking_id"]
+    logger.info("Creating booking", extra={"booking_id": booking_id, "ttl": item.get("ttl")})
+    put = {
+        "TableName": _TABLE_NAME,
+        "Item": aws.serialize(dict(item)),
+        "ConditionExpression": "attribute_not_exists(booking_id)",
+    }
+    interval = _booking_interval(payload.resource_id, payload.start_time, payload.end_time)
+    _write_with_schedule(booking_id, {"Put": put}, None, interval, reminder=_reminder_put(item))
+    # The conditional put either wrote exactly this item or raised, so no read-back is needed
+    return _to_model(item)
+
+
+def _overlaps(a: Interval, b: Interval) -> bool:
+    return a[0] == b[0] and a[1] < b[2] and b[1] < a[2]
+
+
+def _claim_schedule(claims: dict[str, Interval], errors: dict[str, str]) -> None:
+    """Add holds for every claim in as few transactions as possible.
+
+    Claims that collide with an existing booking or series occurrence are moved from ``claims`` to
+    ``errors``. Each bucket put is version-conditioned like in ``_write_with_schedule`` and every
+    transaction also checks the series buckets of the resources it touches. Transactions are capped at
+    100 actions, so a large batch may commit in several steps, and a cancelled step re-reads and retries
+    the rest. Re-applying holds is idempotent because this batch's ids are stripped from a bucket first.
+    When the claim gives up (or raises) after some steps committed, their holds are stripped again.
+    """
+    batch_ids = set(claims)
+    keys_by_id = {bid: _schedule_keys(interval) for bid, interval in claims.items()}
+    # Buckets of rejected claims stay in the write set so holds left by a partially committed attempt are dropped
+    keys = list(dict.fromkeys(key for ks in keys_by_id.values() for key in ks))
+    series_keys = [(resource_id, _SERIES_BUCKET) for resource_id in dict.fromkeys(key[0] for key in keys)]
+    committed = False
+    try:
+        for attempt in range(_MAX_SCHEDULE_ATTEMPTS):
+            days = _read_schedule(keys + series_keys)
+            series = {key[0]: cast(ScheduleSeriesItem | None, days.get(key)) for key in series_keys}
+            existing = {
+                key: {bid: (key[0], int(s), int(e)) for bid, (s, e) in day["intervals"].items() if bid not in batch_ids}
+                for key, day in days.items()
+                if key[1] != _SERIES_BUCKET
+            }
+            for bid, interval in list(claims.items()):
+                bucket = series[interval[0]]
+                if _series_conflict(bucket["series"] if bucket else {}, interval) or any(
+                    _overlaps(interval, other) for key in keys_by_id[bid] for other in existing.get(key, {}).values()
+                ):
+                    errors[bid] = BOOKING_CONFLICT
+                    del claims[bid]
+
+            puts = []
+            for key in keys:
+                intervals = {bid: [s, e] for bid, (_, s, e) in existing.get(key, {}).items()}
+                intervals.update({bid: [claims[bid][1], claims[bid][2]] for bid in claims if key in keys_by_id[bid]})
+                puts.append(_schedule_put(key, intervals, days.get(key)))
+            try:
+                # Half of each transaction is left for the series checks of the resources in that chunk
+                for start in range(0, len(puts), _BATCH_GET_SIZE // 2):
+                    chunk_resources = dict.fromkeys(key[0] for key in keys[start : start + _BATCH_GET_SIZE // 2])
+                    checks = [_series_bucket_check(resource_id, series[resource_id]) for resource_id in chunk_resources]
+                    actions = puts[start : start + _BATCH_GET_SIZE // 2] + checks
+                    _ddb().transact_write_items(TransactItems=actions)  # type: ignore[arg-type]
+                    committed = True
+                return
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+                logger.info("Resource schedule changed concurrently, retrying", extra={"attempt": attempt + 1})
+    except Exception:
+        # Steps committed before the failure must not leave holds for bookings that are never written
+        if committed:
+            _release_holds(keys, batch_ids)
+        raise
+    if committed:
+        _release_holds(keys, batch_ids)
+    for bid in list(claims):
+        errors[bid] = BOOKING_CONFLICT
+        del claims[bid]
+
+
+def _release_holds(keys: list[ScheduleKey], batch_ids: set[str]) -> None:
+    """Strip the holds of ``batch_ids`` from the given day buckets; best effort, failures are only logged."""
+    try:
+        for _ in range(_MAX_SCHEDULE_ATTEMPTS):
+            days = _read_schedule(keys)
+            puts = [
+                _schedule_put(
+                    key,
+                    {bid: [int(s), int(e)] for bid, (s, e) in day["intervals"].items() if bid not in batch_ids},
+                    day,
+                )
+                for key, day in days.items()
+                if not batch_ids.isdisjoint(day["intervals"])
+            ]
+            try:
+                for start in range(0, len(puts), _BATCH_GET_SIZE):
+                    _ddb().transact_write_items(TransactItems=puts[start : start + _BATCH_GET_SIZE])  # type: ignore[arg-type]
+                return
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "TransactionCanceledException":
+                    raise
+    except (ClientError, BatchUnprocessedError):
+        logger.exception("Could not release schedule holds", extra={"booking_ids": sorted(batch_ids)})
+        return
+    # The holds stay until their buckets expire, blocking those slots
+    logger.warning("Gave up releasing schedule holds", extra={"booking_ids": sorted(batch_ids)})
+
+
+def create_bookings(payloads: list[BookingCreate], booking_ids: list[str] | None = None) -> BatchCreateResult:
+    """Create many bookings at once; each one succeeds or fails on its own.
+
+    Schedule holds are claimed first (overlaps inside the batch and against stored bookings are
+    rejected), then the accepted bookings go out through BatchWriteItem. Anything DynamoDB still
+    leaves unprocessed after the retries is reported as an error and its hold released.
+
+    ``booking_ids`` (one per payload) replace the generated ids. Submitting the same bookings with
+    the same ids again, after a call that raised part way, rewrites them instead of conflicting with
+    their own holds.
+    """
+    items: dict[str, BookingItem] = {}
+    index_of: dict[str, int] = {}
+    claims: dict[str, Interval] = {}
+    failed: dict[str, str] = {}
+    errors: dict[int, str] = {}
+    for index, payload in enumerate(payloads):
+        item = _new_item(payload, booking_ids[index] if booking_ids is not None else None)
+        bid = item["booking_id"]
+        interval = _booking_interval(payload.resource_id, payload.start_time, payload.end_time)
+        try:
+            _schedule_keys(interval)
+        except ValueError as exc:
+            errors[index] = str(exc)
+            continue
+        if interval is not None:
+            if any(_overlaps(interval, other) for other in claims.values()):
+                errors[index] = BOOKING_CONFLICT
+                continue
+            claims[bid] = interval
+        items[bid], index_of[bid] = item, index
+
+    if claims:
+        _claim_schedule(claims, failed)
+    accepted = [bid for bid in items if bid not in failed]
+    for raw in _batch_write(_TABLE_NAME, [dict(items[bid]) for bid in accepted]):
+        bid = raw["booking_id"]
+        logger.warning("Booking left unprocessed by BatchWriteItem", extra={"booking_id": bid})
+        _write_with_schedule(bid, None, claims.get(bid), None)
+        failed[bid] = BATCH_WRITE_UNPROCESSED
+
+    errors.update({index_of[bid]: reason for bid, reason in failed.items()})
+    written = [items[bid] for bid in accepted if bid not in failed]
+    _schedule_reminders(written)
+    created = _to_models(written)
+    logger.info("Created bookings in batch", extra={"created_count": len(created), "failed_count": len(errors)})
+    return BatchCreateResult(created=created, errors=dict(sorted(errors.items())))
+
+
+def _reminder_put(item: BookingItem) -> dict[str, Any] | None:
+    """The reminder-schedule Put for ``item``'s reminder; None unless reminders are scheduled and it has one."""
+    ttl = item.get("ttl")
+    if not reminders.SCHEDULED or ttl is None:
+        return None
+    entry = reminders.item(item["booking_id"], item["user_id"], int(ttl), time.time())
+    return {"Put": {"TableName": reminders.TABLE_NAME, "Item": aws.serialize(entry)}}
+
+
+def _schedule_reminders(items: list[BookingItem]) -> None:
+    """File the reminders of bookings already written, for writes that cannot carry them in a transaction.
+
+    Not atomic with the booking write: when this raises, the caller's request fails and retrying it files them.
+    """
+    puts = [put["Put"]["Item"] for put in map(_reminder_put, items) if put is not None]
+    if not puts:
+        return
+    for raw in _batch_write(reminders.TABLE_NAME, [aws.deserialize(item) for item in puts]):
+        _ddb().put_item(TableName=reminders.TABLE_NAME, Item=aws.serialize(raw))
+
 
-    logger.info("Creating booking", extra={"booking_id": booking_id, "ttl": ttl})
-    _table.put_item(Item=item)  # type: ignore
-    return get_booking(booking_id)
+def _get_item_params(booking_id: str, consistent: bool = False) -> dict[str, Any]:
+    return {"TableName": _TABLE_NAME, "Key": aws.serialize({"booking_id": booking_id}), "ConsistentRead": consistent}
 
 
-def get_booking(booking_id: str) -> Booking:
-    resp = cast(dict[str, Any], _table.get_item(Key={"booking_id": booking_id}))
+def _booking_from_response(resp: dict[str, Any]) -> BookingItem:
     item = resp.get("Item")
-    if not isinstance(item, dict):
+    if not isinstance(item, dict) or "start_time" not in item:
         raise KeyError(BOOKING_NOT_FOUND)
-    return _to_model(cast(BookingItem, item))
+    return cast(BookingItem, aws.deserialize(item))
 
 
-def list_bookings_for_user(user_id: str) -> list[Booking]:
-    resp = cast(
-        dict[str, Any],
-        _table.query(
-            IndexName="user_id_index",
-            KeyConditionExpression="user_id = :uid",
-            ExpressionAttributeValues={":uid": user_id},
-        ),
+def _get_item(booking_id: str, consistent: bool = False) -> BookingItem:
+    return _booking_from_response(cast(dict[str, Any], _ddb().get_item(**_get_item_params(booking_id, consistent))))
+
+
+def get_booking(booking_id: str, consistent: bool = False) -> Booking:
+    """Fetch one booking; ``consistent`` skips the cache and does a strongly consistent read."""
+    if booking_cache is not None and not consistent:
+        cached = booking_cache.get(booking_id)
+        if cached is not None:
+            return cached.model_copy()
+    try:
+        booking = _to_model(_get_item(booking_id, consistent))
+    except KeyError:
+        if _parse_occurrence_id(booking_id) is None:
+            raise
+        # Not stored: an occurrence the series still generates
+        booking = _to_model(_get_occurrence(booking_id))
+    _cache_booking(booking)
+    return booking
+
+
+def _cache_booking(booking: Booking) -> None:
+    if booking_cache is not None:
+        booking_cache.put(booking.booking_id, booking.model_copy())
+    if version_cache is not None:
+        version_cache.put(booking.booking_id, booking.version)
+
+
+def _version_params(booking_id: str, consistent: bool = False) -> dict[str, Any]:
+    # start_time tells bookings from series items; nothing else of the item is transferred or decoded
+    return {**_get_item_params(booking_id, consistent), "ProjectionExpression": "start_time, version"}
+
+
+def _version_from_response(booking_id: str, resp: dict[str, Any]) -> int | None:
+    item = resp.get("Item")
+    if not isinstance(item, dict) or "start_time" not in item:
+        return None
+    version = int(item["version"]["N"]) if "version" in item else 0
+    if version_cache is not None:
+        version_cache.put(booking_id, version)
+    return version
+
+
+def get_booking_version(booking_id: str, consistent: bool = False) -> int | None:
+    """The version (ETag) of the booking stored under ``booking_id``, without reading the booking itself.
+
+    Answered from the version cache when possible, otherwise by a GetItem projected to the version. None when
+    nothing is stored under the id, which includes series occurrences that are only generated.
+    """
+    if version_cache is not None and not consistent:
+        cached = version_cache.get(booking_id)
+        if cached is not None:
+            return cached
+    resp = cast(dict[str, Any], _ddb().get_item(**_version_params(booking_id, consistent)))
+    return _version_from_response(booking_id, resp)
+
+
+def _invalidates_cache(func: Callable[_P, _R]) -> Callable[_P, _R]:
+    """Drop the booking (first argument) from the local caches once the write is done, successful or not."""
+
+    @wraps(func)
+    def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            for cache in (booking_cache, version_cache):
+                if cache is not None:
+                    cache.invalidate(cast(str, args[0]))
+
+    return wrapper
+
+
+def get_bookings(booking_ids: list[str]) -> BatchGetResult:
+    """Fetch many bookings by id, in request order; duplicates are collapsed and missing ids reported."""
+    ids = list(dict.fromkeys(booking_ids))
+    return _batch_get_result(ids, _batch_get(_TABLE_NAME, [{"booking_id": bid} for bid in ids]))
+
+
+def _batch_get_result(ids: list[str], items: list[dict[str, Any]]) -> BatchGetResult:
+    found = {item["booking_id"]: item for item in items}
+    return BatchGetResult(
+        bookings=_to_models(cast(BookingItem, found[bid]) for bid in ids if bid in found),
+        not_found=[bid for bid in ids if bid not in found],
     )
-    raw_items = resp.get("Items", [])
-    items: list[BookingItem] = [cast(BookingItem, it) for it in raw_items if isinstance(it, dict)]
-    return [_to_model(it) for it in items]
 
 
-def update_booking(booking_id: str, payload: BookingUpdate) -> Booking:
-    # Fetch existing, then update selectively
-    current = get_booking(booking_id)
-    new_start = payload.start_time or current.start_time
+def _encode_cursor(last_key: dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_key, separators=(",", ":")).encode()).decode()
 
-    # Determine TTL behavior
-    if "reminder_lead_seconds" in payload.model_fields_set:
-        ttl = (
-            None if payload.reminder_lead_seconds is None
-            else _compute_ttl_from_reminder(new_start, payload.reminder_lead_seconds)
+
+def _decode_cursor(cursor: str, owner_id: str, sort_key: str = "start_time", owner: str = "user_id") -> dict[str, Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError(INVALID_CURSOR) from exc
+    # A cursor is only valid for the user or resource (and index) it was issued for
+    if (
+        not isinstance(key, dict)
+        or set(key) != {"booking_id", owner, sort_key}
+        or not all(isinstance(v, str) for v in key.values())
+        or key[owner] != owner_id
+    ):
+        raise ValueError(INVALID_CURSOR)
+    return key
+
+
+def _listing_index(status: str | None) -> tuple[str, str]:
+    """Index a listing reads, and its sort key: active-only listings use the sparse active index."""
+    return (_ACTIVE_INDEX, "active_start") if status == "active" else (_USER_INDEX, "start_time")
+
+
+def _upcoming_from(start_from: datetime | None) -> datetime:
+    now = datetime.now(UTC)
+    if start_from is None:
+        return now
+    return max(now, start_from if start_from.tzinfo is not None else start_from.replace(tzinfo=UTC))
+
+
+def _user_query_params(
+    user_id: str, start_from: datetime | None, start_to: datetime | None, status: str | None = None
+) -> dict[str, Any]:
+    index, sort_key = _listing_index(status)
+    # Active-only listings read the sparse index; cancelled bookings are the rare case and get no index of their own
+    filtered = status if status == "cancelled" else None
+    return _range_query_params(index, "user_id", user_id, sort_key, start_from, start_to, filtered)
+
+
+def _range_query_params(  # noqa: PLR0913, PLR0917
+    index: str,
+    owner: str,
+    owner_id: str,
+    sort_key: str,
+    start_from: datetime | None,
+    start_to: datetime | None,
+    status: str | None = None,
+) -> dict[str, Any]:
+    """Query of an owner's bookings within a start time range; ``status`` is applied as a filter."""
+    # The start time is the index sort key, so the time range is a key condition rather than a post-filter.
+    # Stored values are normalized UTC ISO strings, which sort chronologically.
+    values: dict[str, Any] = {":owner": owner_id}
+    condition = f"{owner} = :owner"
+    if start_from is not None and start_to is not None:
+        condition += f" AND {sort_key} BETWEEN :from AND :to"
+        values[":from"], values[":to"] = _dt_to_iso(start_from), _dt_to_iso(start_to)
+    elif start_from is not None:
+        condition += f" AND {sort_key} >= :from"
+        values[":from"] = _dt_to_iso(start_from)
+    elif start_to is not None:
+        condition += f" AND {sort_key} <= :to"
+        values[":to"] = _dt_to_iso(start_to)
+    params: dict[str, Any] = {"TableName": _TABLE_NAME, "IndexName": index, "KeyConditionExpression": condition}
+    if status is not None:
+        # Bookings written before statuses existed have none and are active
+        params["FilterExpression"] = (
+            "#s = :status" if status == "cancelled" else "(attribute_not_exists(#s) OR #s = :status)"
         )
+        params["ExpressionAttributeNames"] = {"#s": "status"}
+        values[":status"] = status
+    params["ExpressionAttributeValues"] = aws.serialize(values)
+    return params
+
+
+def _query(params: dict[str, Any]) -> tuple[list[BookingItem], dict[str, Any] | None]:
+    resp = cast(dict[str, Any], _ddb().query(**params))
+    items = [cast(BookingItem, aws.deserialize(it)) for it in resp.get("Items", [])]
+    return items, resp.get("LastEvaluatedKey")
+
+
+def list_bookings_page(  # noqa: PLR0913
+    user_id: str,
+    limit: int,
+    cursor: str | None = None,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    *,
+    status: str | None = None,
+    upcoming: bool = False,
+    include_archived: bool = False,
+) -> BookingPage:
+    """One page of a user's bookings ordered by start_time; ``next_cursor`` is None on the last page.
+
+    ``status`` keeps only active or cancelled bookings and ``upcoming`` only those starting from now on; a
+    cursor is only valid with the ``status`` it was issued for. ``include_archived`` adds the bookings moved to
+    the archive by ``archive_bookings``.
+    """
+    if upcoming:
+        start_from = _upcoming_from(start_from)
+    params, after = _page_params(user_id, limit, cursor, start_from, start_to, status)
+    items, last_key = _query(params)
+    generated = [] if status == "cancelled" else _generated_occurrences(user_id, start_from, start_to, after)
+    if include_archived:
+        archived = _archived(user_id, limit, items, start_from, start_to, after, status)
+        generated = list(heapq.merge(generated, archived, key=_sort_key))
+    return _page(user_id, limit, items, last_key, generated, status)
+
+
+def _page_params(  # noqa: PLR0913, PLR0917
+    user_id: str,
+    limit: int,
+    cursor: str | None,
+    start_from: datetime | None,
+    start_to: datetime | None,
+    status: str | None = None,
+) -> tuple[dict[str, Any], tuple[str, str] | None]:
+    """Query parameters for one page, and the (start_time, booking_id) position the cursor resumes after."""
+    params = _user_query_params(user_id, start_from, start_to, status)
+    params["Limit"] = limit
+    after = None
+    if cursor is not None:
+        sort_key = _listing_index(status)[1]
+        position = _decode_cursor(cursor, user_id, sort_key)
+        params["ExclusiveStartKey"] = aws.serialize(position)
+        after = (position[sort_key], position["booking_id"])
+    return params, after
+
+
+def _archived(  # noqa: PLR0913, PLR0917
+    user_id: str,
+    limit: int,
+    stored: list[BookingItem],
+    start_from: datetime | None,
+    start_to: datetime | None,
+    after: tuple[str, str] | None,
+    status: str | None = None,
+) -> list[BookingItem]:
+    """Up to ``limit + 1`` of the user's archived bookings past ``after``: a page's worth and whether more follow."""
+    store = archive.store()
+    if store is None:
+        return []
+    # A booking is only both stored and archived while an archive run is between writing and deleting it
+    ids = {item["booking_id"] for item in stored}
+    found = archive.read(store, user_id, start_from, start_to, after=after, status=status)
+    return cast(list[BookingItem], list(islice((it for it in found if it["booking_id"] not in ids), limit + 1)))
+
+
+def _page(  # noqa: PLR0913, PLR0917
+    user_id: str,
+    limit: int,
+    items: list[BookingItem],
+    last_key: dict[str, Any] | None,
+    generated: list[BookingItem],
+    status: str | None = None,
+) -> BookingPage:
+    if not generated:
+        return BookingPage(_to_models(items), _encode_cursor(aws.deserialize(last_key)) if last_key else None)
+    # Stored bookings and generated occurrences interleave by start_time; the cursor is the last one returned
+    page = list(islice(heapq.merge(items, generated, key=_sort_key), limit))
+    has_more = last_key is not None or len(items) + len(generated) > limit
+    last = page[-1]
+    sort_key = _listing_index(status)[1]
+    next_cursor = (
+        _encode_cursor({"booking_id": last["booking_id"], "user_id": user_id, sort_key: last["start_time"]})
+        if has_more
+        else None
+    )
+    return BookingPage(_to_models(page), next_cursor)
+
+
+def list_bookings_for_user(
+    user_id: str,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    *,
+    status: str | None = None,
+    upcoming: bool = False,
+) -> list[Booking]:
+    """All of a user's bookings and series occurrences, following LastEvaluatedKey across 1 MB query pages.
+
+    ``status`` and ``upcoming`` filter as in ``list_bookings_page``.
+    """
+    if upcoming:
+        start_from = _upcoming_from(start_from)
+    params = _user_query_params(user_id, start_from, start_to, status)
+    stored: list[BookingItem] = []
+    while True:
+        items, last_key = _query(params)
+        stored.extend(items)
+        if not last_key:
+            break
+        params["ExclusiveStartKey"] = last_key
+    generated = [] if status == "cancelled" else _generated_occurrences(user_id, start_from, start_to)
+    return _to_models(heapq.merge(stored, generated, key=_sort_key))
+
+
+def _export_index(owner: Owner, status: str | None) -> tuple[str, str]:
+    if owner == "user_id":
+        return _listing_index(status)
+    return _RESOURCE_INDEX, "start_time"
+
+
+def export_bookings(  # noqa: PLR0913
+    owner: Owner,
+    owner_id: str,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    *,
+    status: str | None = None,
+    cursor: str | None = None,
+) -> Iterator[Booking]:
+    """All of a user's (or resource's) bookings and series occurrences by start_time, produced as they are read.
+
+    Unlike ``list_bookings_for_user`` nothing is collected: query pages are converted and yielded one at a time
+    while the next page is already being read, so memory stays at about two pages whatever the export's size.
+    ``cursor`` (see ``export_cursor``) resumes after the booking it was issued for; it is checked here, before
+    anything is read, and raises ValueError.
+    """
+    index, sort_key = _export_index(owner, status)
+    filtered = status if owner == "resource_id" or status == "cancelled" else None
+    params = _range_query_params(index, owner, owner_id, sort_key, start_from, start_to, filtered)
+    params["Limit"] = _EXPORT_PAGE_SIZE
+    after = None
+    if cursor is not None:
+        position = _decode_cursor(cursor, owner_id, sort_key, owner)
+        params["ExclusiveStartKey"] = aws.serialize(position)
+        after = (position[sort_key], position["booking_id"])
+    if status == "cancelled":
+        generated = []
+    else:
+        series = _user_series(owner_id, start_to) if owner == "user_id" else _resource_series(owner_id)
+        generated = _series_occurrences(series, start_from, start_to, after)
+    stored = (item for page in _read_ahead(params) for item in page)
+    return (_to_model(item) for item in heapq.merge(stored, generated, key=_sort_key))
+
+
+def export_cursor(owner: Owner, owner_id: str, booking: Booking, status: str | None = None) -> str:
+    """Cursor resuming an ``export_bookings`` with the same owner and status after ``booking``."""
+    sort_key = _export_index(owner, status)[1]
+    return _encode_cursor({"booking_id": booking.booking_id, owner: owner_id, sort_key: _dt_to_iso(booking.start_time)})
+
+
+def _read_ahead(params: dict[str, Any]) -> Iterator[list[BookingItem]]:
+    """The query's pages in order, each next one read on a worker thread while the caller goes through the last."""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        # The worker counts its calls into the caller's invocation (app.instrumentation)
+        pending = pool.submit(copy_context().run, _query, params)
+        while True:
+            items, last_key = pending.result()
+            if last_key:
+                params = {**params, "ExclusiveStartKey": last_key}
+                pending = pool.submit(copy_context().run, _query, params)
+            yield items
+            if not last_key:
+                return
+
+
+def backfill_active_index() -> int:
+    """Add active_start to active bookings stored before the active index existed; returns how many.
+
+    One scan of the table. Each update is conditional on the booking still being active without the attribute,
+    so a concurrent cancel is not undone; safe to rerun.
+    """
+    pending = (
+        "attribute_exists(start_time) AND attribute_not_exists(active_start)"
+        " AND (attribute_not_exists(#s) OR #s = :active)"
+    )
+    params: dict[str, Any] = {
+        "TableName": _TABLE_NAME,
+        "FilterExpression": pending,
+        "ProjectionExpression": "booking_id",
+        "ExpressionAttributeNames": {"#s": "status"},
+        "ExpressionAttributeValues": aws.serialize({":active": "active"}),
+    }
+    updated = 0
+    while True:
+        resp = cast(dict[str, Any], _ddb().scan(**params))
+        for key in resp.get("Items", []):
+            try:
+                _ddb().update_item(
+                    TableName=_TABLE_NAME,
+                    Key=key,
+                    UpdateExpression="SET active_start = start_time",
+                    ConditionExpression=pending,
+                    ExpressionAttributeNames=params["ExpressionAttributeNames"],
+                    ExpressionAttributeValues=params["ExpressionAttributeValues"],
+                )
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+                continue
+            updated += 1
+        if not resp.get("LastEvaluatedKey"):
+            return updated
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def backfill_reminder_schedule() -> int:
+    """File a reminder-schedule item for every active booking with a reminder; returns how many.
+
+    For switching a stack from ``REMINDER_DELIVERY=ttl`` to ``schedule``: until then reminders only exist as the
+    bookings' TTL, so without this every reminder pending at the switch would be lost. Run it once, with the
+    schedule settings, right after deploying the switch. In ttl mode a stored booking's reminder has not been
+    sent yet (sending it deletes the booking), so overdue ones are filed under the current minute and go out on
+    the poller's next run. Rerunning is harmless for reminders not yet due but resends the overdue ones.
+    """
+    if not reminders.SCHEDULED:
+        raise RuntimeError("REMINDER_DELIVERY is not schedule")
+    params: dict[str, Any] = {
+        "TableName": _TABLE_NAME,
+        "FilterExpression": f"{_IS_BOOKING} AND attribute_exists(#t) AND (attribute_not_exists(#s) OR #s = :active)",
+        "ProjectionExpression": "booking_id, user_id, #t",
+        "ExpressionAttributeNames": {"#s": "status", "#t": "ttl"},
+        "ExpressionAttributeValues": aws.serialize({":active": "active"}),
+    }
+    filed = 0
+    while True:
+        resp = cast(dict[str, Any], _ddb().scan(**params))
+        items = [cast(BookingItem, aws.deserialize(item)) for item in resp.get("Items", [])]
+        _schedule_reminders(items)
+        filed += len(items)
+        if not resp.get("LastEvaluatedKey"):
+            return filed
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def archive_bookings(older_than_days: int = archive.AFTER_DAYS, now: datetime | None = None) -> int:
+    """Move bookings that ended more than ``older_than_days`` ago to the archive (app.archive); returns how many.
+
+    One scan of the table. Bookings are collected per start month and written out as an archive file once a
+    month has ``archive.FILE_ROWS`` of them or the scan ends; only then are they deleted from the table, each
+    delete conditional on the booking being unchanged since it was read and preceded by an update setting
+    ``user_summary.ARCHIVED``, so the summary keeps counting archived bookings. A booking changed in the meantime
+    stays in the table (the mark removed again) and its file is rewritten without it. A run stopped between
+    writing and deleting leaves copies in both, which listings skip, and the rerun archives them again. Nothing
+    is released from the schedule: the days of bookings that old are past its retention. Series items have no
+    end_time and are never archived.
+    """
+    store = archive.store()
+    if store is None:
+        raise RuntimeError("ARCHIVE_PATH is not set")
+    cutoff = (now or datetime.now(UTC)) - timedelta(days=older_than_days)
+    params: dict[str, Any] = {
+        "TableName": _TABLE_NAME,
+        "FilterExpression": f"{_IS_BOOKING} AND end_time < :cutoff",
+        "ExpressionAttributeValues": aws.serialize({":cutoff": _dt_to_iso(cutoff)}),
+    }
+    months: dict[str, list[BookingItem]] = {}
+    archived = 0
+    while True:
+        resp = cast(dict[str, Any], _ddb().scan(**params))
+        for raw in resp.get("Items", []):
+            item = cast(BookingItem, aws.deserialize(raw))
+            month = months.setdefault(archive.month_of(item["start_time"]), [])
+            month.append(item)
+            if len(month) >= archive.FILE_ROWS:
+                archived += _archive_month(store, archive.month_of(item["start_time"]), month)
+                month.clear()
+        if not resp.get("LastEvaluatedKey"):
+            break
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+    for name, items in months.items():
+        if items:
+            archived += _archive_month(store, name, items)
+    return archived
+
+
+def _archive_month(store: archive.LocalStore, month: str, items: list[BookingItem]) -> int:
+    key = archive.write(store, month, cast(list[dict[str, Any]], items))
+    kept: list[BookingItem] = []
+    for item in items:
+        booking_id = item["booking_id"]
+        values: dict[str, Any] = {}
+        condition = _expecting(_IS_BOOKING, values, _version(item))
+        names = {"#archived": user_summary.ARCHIVED}
+        try:
+            # Marked first (the version stays) so the user summary tells this removal from a user's delete
+            _update_item(booking_id, "SET #archived = :now", names, {**values, ":now": int(time.time())}, condition)
+            delete: dict[str, Any] = {
+                "TableName": _TABLE_NAME,
+                "Key": aws.serialize({"booking_id": booking_id}),
+                "ConditionExpression": condition,
+            }
+            if values:
+                delete["ExpressionAttributeValues"] = aws.serialize(values)
+            _ddb().delete_item(**delete)
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            _unmark_archived(booking_id)
+            continue
+        kept.append(item)
+    if len(kept) < len(items):
+        # The file must not shadow bookings that stay in the table, so it only keeps the deleted ones
+        if kept:
+            archive.write(store, month, cast(list[dict[str, Any]], kept))
+        store.delete(key)
+    return len(kept)
+
+
+def _unmark_archived(booking_id: str) -> None:
+    # A booking changed since it was read stays in the table and must not keep the mark
+    try:
+        _update_item(booking_id, "REMOVE #archived", {"#archived": user_summary.ARCHIVED}, {}, _IS_BOOKING)
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+
+
+def get_user_summary(user_id: str) -> BookingSummary:
+    """Counts and next upcoming bookings from the summary the stream processor maintains (app.user_summary)."""
+    summary = user_summary.read(_ddb(), user_id, time.time())
+    upcoming = [UpcomingBooking(booking_id=bid, start_time=_iso_to_dt(start)) for start, bid in summary.upcoming]
+    return BookingSummary(user_id=user_id, active=summary.active, cancelled=summary.cancelled, upcoming=upcoming)
+
+
+def _reminder_lead(item: BookingItem) -> int | None:
+    lead = item.get("reminder_lead_seconds")
+    if lead is not None:
+        return int(lead)
+    # Items written before reminder_lead_seconds was stored: derive it from the TTL
+    ttl = item.get("ttl")
+    if ttl is None:
+        return None
+    return max(0, _epoch(_iso_to_dt(item["start_time"])) - int(ttl))
+
+
+def _update_item(
+    booking_id: str,
+    update_expr: str,
+    names: dict[str, str],
+    values: dict[str, Any],
+    condition: str,
+    **extra: Any,
+) -> BookingItem:
+    params: dict[str, Any] = {
+        "TableName": _TABLE_NAME,
+        "Key": aws.serialize({"booking_id": booking_id}),
+        "UpdateExpression": update_expr,
+        "ConditionExpression": condition,
+        "ReturnValues": "ALL_NEW",
+        **extra,
+    }
+    if names:
+        params["ExpressionAttributeNames"] = names
+    if values:
+        params["ExpressionAttributeValues"] = aws.serialize(values)
+    resp = cast(dict[str, Any], _ddb().update_item(**params))
+    return cast(BookingItem, aws.deserialize(resp.get("Attributes") or {}))
+
+
+def _version(item: BookingItem) -> int:
+    return int(item.get("version", 0))
+
+
+def _expecting(condition: str, values: dict[str, Any], expected_version: int | None) -> str:
+    """``condition`` narrowed to the booking being at ``expected_version`` (None: any), adding its value."""
+    if expected_version is None:
+        return condition
+    if expected_version == 0:
+        return f"{condition} AND attribute_not_exists(version)"
+    values[":expected"] = expected_version
+    return f"{condition} AND version = :expected"
+
+
+def _check_version(item: BookingItem, expected_version: int | None) -> None:
+    if expected_version is not None and _version(item) != expected_version:
+        raise BookingVersionMismatchError(BOOKING_VERSION_MISMATCH)
+
+
+def _condition_failed(exc: ClientError, expected_version: int | None) -> Exception:
+    """The error for a booking write whose ``_expecting`` condition failed: gone, or at another version.
+
+    Tells them apart by the current item the write hands back with ``ReturnValuesOnConditionCheckFailure``.
+    """
+    current = cast(dict[str, Any] | None, exc.response.get("Item"))
+    if expected_version is not None and current and "start_time" in current:
+        return BookingVersionMismatchError(BOOKING_VERSION_MISMATCH)
+    return KeyError(BOOKING_NOT_FOUND)
+
+
+def _update_reminder_in_place(booking_id: str, lead: int | None, expected_version: int | None) -> Booking | BookingItem:
+    """Change only the reminder lead with a single conditional UpdateItem.
+
+    The new TTL is derived from the stored TTL and lead (``ttl + old_lead - new_lead``), so the booking's
+    start time is never read, and a successful write always moved the TTL. Returns the updated Booking, or the
+    current item when it cannot be updated in place (no reminder yet, the lead is unchanged, a legacy item
+    without reminder_lead_seconds, or not at ``expected_version``) and the caller must fall back.
+    """
+    # ttl is a reserved word in expressions
+    names = {"#ttl": "ttl"}
+    values: dict[str, Any] = dict(_BUMP_VERSION_VALUES)
+    if lead is None:
+        update_expr, condition = f"SET {_BUMP_VERSION} REMOVE #ttl, reminder_lead_seconds", _IS_BOOKING
     else:
-        preserved_lead = (
-            None if current.ttl is None
-            else max(0, int(current.start_time.timestamp()) - current.ttl)
+        update_expr = f"SET #ttl = #ttl + reminder_lead_seconds - :lead, reminder_lead_seconds = :lead, {_BUMP_VERSION}"
+        values[":lead"] = lead
+        # The arithmetic only holds for a TTL that was not clamped at 0 (ttl + lead is then the start time) and
+        # cannot go below 0 while ttl >= lead; anything else falls back to computing it from the start time. An
+        # unchanged lead falls back too, so the caller never files a reminder that did not move
+        condition = (
+            "attribute_exists(reminder_lead_seconds) AND reminder_lead_seconds <> :lead"
+            " AND #ttl > :zero AND #ttl >= :lead"
+        )
+    condition = _expecting(condition, values, expected_version)
+    try:
+        # On condition failure DynamoDB hands back the current item, so the fallback costs no extra read
+        return _to_model(
+            _update_item(
+                booking_id, update_expr, names, values, condition, ReturnValuesOnConditionCheckFailure="ALL_OLD"
+            )
         )
-        ttl = _compute_ttl_from_reminder(new_start, preserved_lead)
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        current = cast(dict[str, Any] | None, exc.response.get("Item"))
+        if not current or "start_time" not in current:
+            raise KeyError(BOOKING_NOT_FOUND) from exc
+        return cast(BookingItem, aws.deserialize(current))
+
+
+def _build_update(
+    current: BookingItem, payload: BookingUpdate
+) -> tuple[str, dict[str, str], dict[str, Any], BookingItem]:
+    """Update expression, names and values for ``payload`` applied to ``current``, plus the resulting item.
+
+    Raises ValueError when the booking would no longer end after it starts.
+    """
+    new_start = payload.start_time or _iso_to_dt(current["start_time"])
+    if _epoch(payload.end_time or _iso_to_dt(current["end_time"])) <= _epoch(new_start):
+        raise ValueError(END_BEFORE_START)
+    if "reminder_lead_seconds" in payload.model_fields_set:
+        lead = payload.reminder_lead_seconds
+    else:
+        lead = _reminder_lead(current)
+    ttl = _compute_ttl_from_reminder(new_start, lead)
 
-    # Build update expression
     set_parts: list[str] = []
     names: dict[str, str] = {}
     values: dict[str, Any] = {}
-    remove_ttl = ttl is None
+    remove_parts: list[str] = []
+    removed: list[str] = []
+    changes: dict[str, Any] = {}
 
+    # Names go through aliases, as some (ttl) are reserved words in expressions
     def set_attr(name: str, value: Any) -> None:
         names[f"#_{name}"] = name
         values[f":{name}"] = value
         set_parts.append(f"#_{name} = :{name}")
+        changes[name] = value
+
+    def remove_attr(name: str) -> None:
+        names[f"#_{name}"] = name
+        remove_parts.append(f"#_{name}")
+        removed.append(name)
 
     if payload.resource_id is not None:
         set_attr("resource_id", payload.resource_id)
     if payload.start_time is not None:
         set_attr("start_time", _dt_to_iso(payload.start_time))
+    if current.get("status", "active") == "active":
+        # Always (re)written too, which adds items that predate the attribute to the active index
+        set_attr("active_start", _dt_to_iso(new_start))
     if payload.end_time is not None:
         set_attr("end_time", _dt_to_iso(payload.end_time))
-    if not remove_ttl:
+    if ttl is None:
+        remove_attr("ttl")
+    else:
         set_attr("ttl", ttl)
+    # Always (re)written, which also lazily migrates items that predate the attribute
+    if lead is None:
+        remove_attr("reminder_lead_seconds")
+    else:
+        set_attr("reminder_lead_seconds", lead)
+    set_parts.append(_BUMP_VERSION)
+    values.update(_BUMP_VERSION_VALUES)
+    changes["version"] = _version(current) + 1
 
-    # Join parts into a single expression; if none -> no-op
     update_expr = " ".join(
         part
         for part in (
             ("SET " + ", ".join(set_parts)) if set_parts else "",
-            "REMOVE ttl" if remove_ttl else "",
+            ("REMOVE " + ", ".join(remove_parts)) if remove_parts else "",
         )
         if part
     )
+    new_item = cast(BookingItem, {k: v for k, v in {**current, **changes}.items() if k not in removed})
+    return update_expr, names, values, new_item
 
-    resp = cast(
-        dict[str, Any],
-        _table.update_item(
-            Key={"booking_id": booking_id},
-            UpdateExpression=update_expr,
-            ReturnValues="ALL_NEW",
-            ConditionExpression="attribute_exists(booking_id)",
-            ExpressionAttributeNames=names if names else None,  # type: ignore[arg-type]
-            ExpressionAttributeValues=values if values else None,  # type: ignore[arg-type]
-        ),
-    )
-    attrs = cast(dict[str, Any], resp.get("Attributes") or {})
-    return _to_model(cast(BookingItem, attrs))
 
+def _item_interval(item: BookingItem) -> Interval | None:
+    return _booking_interval(item["resource_id"], _iso_to_dt(item["start_time"]), _iso_to_dt(item["end_time"]))
+
+
+@_invalidates_cache
+def update_booking(booking_id: str, payload: BookingUpdate, expected_version: int | None = None) -> Booking:
+    """Apply ``payload``; with ``expected_version`` (If-Match) only while the booking is still at that version.
+
+    Raises KeyError when there is no such booking and BookingVersionMismatchError when it is at another version.
+    """
+    # Checking an expected version against a stale read would let a lost update through
+    consistent = expected_version is not None
+    schedule_unchanged = payload.resource_id is None and payload.start_time is None and payload.end_time is None
+    if schedule_unchanged and "reminder_lead_seconds" not in payload.model_fields_set:
+        booking = get_booking(booking_id, consistent=consistent)
+        if expected_version is not None and booking.version != expected_version:
+            raise BookingVersionMismatchError(BOOKING_VERSION_MISMATCH)
+        return booking
+    _materialize(booking_id)
+    if schedule_unchanged:
+        # Nothing that affects the resource schedule changes, so try to settle it in one round trip
+        result = _update_reminder_in_place(booking_id, payload.reminder_lead_seconds, expected_version)
+        if isinstance(result, Booking):
+            # Written in place only when the reminder time moved (or was removed)
+            if result.ttl is not None:
+                _schedule_reminders([{"booking_id": booking_id, "user_id": result.user_id, "ttl": result.ttl}])
+            return result
+        current = result
+    else:
+        # Moves need the current interval to re-check overlaps and release the old schedule slot
+        current = _get_item(booking_id, consistent)
+    _check_version(current, expected_version)
+
+    update_expr, names, values, new_item = _build_update(current, payload)
+    condition = _expecting(_IS_BOOKING, values, expected_version)
+    old_interval, new_interval = _item_interval(current), _item_interval(new_item)
+    # Only a changed reminder time needs filing; the poller drops the old entry when it finds it stale
+    reminder = _reminder_put(new_item) if new_item.get("ttl") != current.get("ttl") else None
+    if current.get("status", "active") == "active" and old_interval != new_interval:
+        # Moving an active booking: re-check overlaps and move its schedule entries in the same transaction
+        update: dict[str, Any] = {
+            "TableName": _TABLE_NAME,
+            "Key": aws.serialize({"booking_id": booking_id}),
+            "UpdateExpression": update_expr,
+            "ConditionExpression": condition,
+            "ExpressionAttributeNames": names,
+            "ExpressionAttributeValues": aws.serialize(values),
+        }
+        try:
+            _write_with_schedule(booking_id, {"Update": update}, old_interval, new_interval, reminder=reminder)
+        except KeyError:
+            if expected_version is not None:
+                # Written (or deleted) by someone else between our read and the transaction
+                _check_version(_get_item(booking_id, consistent=True), expected_version)
+            raise
+        return _to_model(new_item)
+
+    try:
+        updated = _update_item(
+            booking_id, update_expr, names, values, condition, ReturnValuesOnConditionCheckFailure="ALL_OLD"
+        )
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise _condition_failed(exc, expected_version) from exc
+        raise
+    if reminder is not None:
+        _schedule_reminders([updated])
+    return _to_model(updated)
 
+
+@_invalidates_cache
 def delete_booking(booking_id: str) -> None:
-    _table.delete_item(Key={"booking_id": booking_id})
-
-
-def cancel_booking(booking_id: str) -> Booking:
-    resp = cast(
-        dict[str, Any],
-        _table.update_item(
-            Key={"booking_id": booking_id},
-            UpdateExpression="SET #s = :s",
-            ExpressionAttributeNames={"#s": "status"},
-            ExpressionAttributeValues={":s": "cancelled"},
-            ReturnValues="ALL_NEW",
-        ),
-    )
-    attrs = cast(dict[str, Any], resp.get("Attributes") or {})
-    return _to_model(cast(BookingItem, attrs))
+    try:
+        resp = cast(
+            dict[str, Any],
+            _ddb().delete_item(
+                TableName=_TABLE_NAME,
+                Key=aws.serialize({"booking_id": booking_id}),
+                ConditionExpression=_IS_BOOKING,
+                ReturnValues="ALL_OLD",
+            ),
+        )
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+            raise
+        # Nothing stored under this id; it may still be a generated occurrence
+        _skip_occurrence(booking_id)
+        return
+    old = resp.get("Attributes")
+    if old and old.get("status", {}).get("S", "active") == "active":
+        _release_schedule(booking_id, cast(BookingItem, aws.deserialize(old)))
+
+
+@_invalidates_cache
+def cancel_booking(booking_id: str, expected_version: int | None = None) -> Booking:
+    """Cancel a booking; ``expected_version`` and the errors raised are as in ``update_booking``."""
+    _materialize(booking_id)
+    values = {":s": "cancelled", **_BUMP_VERSION_VALUES}
+    condition = _expecting(_IS_BOOKING, values, expected_version)
+    try:
+        old = _update_item(
+            booking_id,
+            f"SET #s = :s, {_BUMP_VERSION} REMOVE active_start",
+            {"#s": "status"},
+            values,
+            condition,
+            ReturnValues="ALL_OLD",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] == "ConditionalCheckFailedException":
+            raise _condition_failed(exc, expected_version) from exc
+        raise
+    if old.get("status", "active") == "active":
+        _release_schedule(booking_id, old)
+    return _to_model(cast(BookingItem, {**old, "status": "cancelled", "version": _version(old) + 1}))
+
+
+def _release_schedule(booking_id: str, item: BookingItem) -> None:
+    # The booking write already happened; freeing its slot is a follow-up write on the schedule buckets
+    _write_with_schedule(booking_id, None, _item_interval(item), None)
+
+
+def _booking_fields(item: BookingItem) -> dict[str, Any]:
+    return {
+        "booking_id": item["booking_id"],
+        "user_id": item["user_id"],
+        "resource_id": item["resource_id"],
+        # Left as stored ISO strings: pydantic-core parses them far faster than fromisoformat + a Python model
+        "start_time": item["start_time"],
+        "end_time": item["end_time"],
+        "ttl": item.get("ttl"),
+        "reminder_lead_seconds": _reminder_lead(item),
+        "status": item.get("status", "active"),
+        "series_id": item.get("series_id"),
+        "version": item.get("version", 0),
+    }
 
 
 def _to_model(item: BookingItem) -> Booking:
-    return Booking(
-        booking_id=item["booking_id"],
+    return _BOOKING.validate_python(_booking_fields(item))
+
+
+def _to_models(items: Iterable[BookingItem]) -> list[Booking]:
+    # One validator call for the whole list; list endpoints spend most of their CPU here
+    return _BOOKINGS.validate_python([_booking_fields(it) for it in items])
+
+
+def _series_rule(item: SeriesItem) -> SeriesRule:
+    return {
+        "series_start": int(item["series_start"]),
+        "duration": int(item["duration"]),
+        "period": int(item["period"]),
+        "last": int(item["last"]),
+        "exceptions": [int(s) for s in item.get("exceptions", [])],
+    }
+
+
+def _series_to_model(item: SeriesItem) -> BookingSeries:
+    start = int(item["series_start"])
+    until = item.get("until")
+    return BookingSeries(
+        series_id=item["booking_id"],
         user_id=item["user_id"],
         resource_id=item["resource_id"],
-        start_time=_iso_to_dt(item["start_time"]),
-        end_time=_iso_to_dt(item["end_time"]),
-        ttl=item.get("ttl"),
-        status=item.get("status", "active"),  # type: ignore[arg-type]
+        start_time=_from_epoch(start),
+        end_time=_from_epoch(start + int(item["duration"])),
+        recurrence=Recurrence(
+            freq=item["freq"],  # type: ignore[arg-type]
+            interval=item["interval"],
+            count=item.get("count"),
+            until=_iso_to_dt(until) if until else None,
+        ),
+        reminder_lead_seconds=item.get("reminder_lead_seconds"),
+        exceptions=[_from_epoch(int(s)) for s in sorted(item.get("exceptions", []))],
+    )
+
+
+def _series_exceptions_update(series_id: str, exceptions: list[int]) -> dict[str, Any]:
+    update = {
+        "TableName": _TABLE_NAME,
+        "Key": aws.serialize({"booking_id": series_id}),
+        # EXCEPTIONS is a reserved word
+        "UpdateExpression": "SET #ex = :ex",
+        "ConditionExpression": "attribute_exists(series_start)",
+        "ExpressionAttributeNames": {"#ex": "exceptions"},
+        "ExpressionAttributeValues": aws.serialize({":ex": exceptions}),
+    }
+    return {"Update": update}
+
+
+def _occurrences_conflict(
+    resource_id: str,
+    rule: SeriesRule,
+    days: dict[ScheduleKey, ScheduleDayItem],
+    rules: dict[str, SeriesRule],
+) -> bool:
+    duration = int(rule["duration"])
+    for start in recurrence.occurrences(rule):
+        interval = (resource_id, start, start + duration)
+        if _series_conflict(rules, interval):
+            return True
+        for key in _schedule_keys(interval):
+            day = days.get(key)
+            booked = day["intervals"].values() if day else ()
+            if any(int(s) < start + duration and start < int(e) for s, e in booked):
+                return True
+    return False
+
+
+def create_series(payload: BookingSeriesCreate) -> BookingSeries:
+    """Store a recurring series as one item; its occurrences are generated when read.
+
+    The series is checked against the bookings and other series on the resource, then its rule is added to the
+    resource's series bucket. Single-booking writes check that bucket's version, so any booking committed after
+    the rule lands sees it; bookings that committed before are caught by re-reading the day buckets afterwards.
+    """
+    rec = payload.recurrence
+    start, end = _epoch(payload.start_time), _epoch(payload.end_time)
+    until = _epoch(rec.until) if rec.until is not None else None
+    rule = recurrence.build_rule(start, end, rec.freq, rec.interval, rec.count, until)
+    resource_id = payload.resource_id
+    day_keys = list(
+        dict.fromkeys(
+            key
+            for occurrence_start in recurrence.occurrences(rule)
+            for key in _schedule_keys((resource_id, occurrence_start, occurrence_start + rule["duration"]))
+        )
     )
+
+    series_id = str(uuid.uuid4())
+    item: SeriesItem = {
+        "booking_id": series_id,
+        "user_id": payload.user_id,
+        "resource_id": resource_id,
+        **rule,
+        "freq": rec.freq,
+        "interval": rec.interval,
+    }
+    if rec.count is not None:
+        item["count"] = rec.count
+    if rec.until is not None:
+        item["until"] = _dt_to_iso(rec.until)
+    if payload.reminder_lead_seconds is not None:
+        item["reminder_lead_seconds"] = payload.reminder_lead_seconds
+
+    series_key = (resource_id, _SERIES_BUCKET)
+    for attempt in range(_MAX_SCHEDULE_ATTEMPTS):
+        days = _read_schedule([series_key, *day_keys])
+        series_bucket = cast(ScheduleSeriesItem | None, days.get(series_key))
+        rules = dict(series_bucket["series"]) if series_bucket else {}
+        if _occurrences_conflict(resource_id, rule, days, rules):
+            raise BookingConflictError(BOOKING_CONFLICT)
+        put = {
+            "TableName": _TABLE_NAME,
+            "Item": aws.serialize(dict(item)),
+            "ConditionExpression": "attribute_not_exists(booking_id)",
+        }
+        actions = [{"Put": put}, _series_bucket_put(resource_id, {**rules, series_id: rule}, series_bucket)]
+        try:
+            _ddb().transact_write_items(TransactItems=actions)  # type: ignore[arg-type]
+            break
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            logger.info("Resource series changed concurrently, retrying", extra={"attempt": attempt + 1})
+    else:
+        raise BookingConflictError(BOOKING_CONFLICT)
+
+    if _occurrences_conflict(resource_id, rule, _read_schedule(day_keys), {}):
+        # A booking slipped in between our read and the series write; back the series out again
+        delete_series(series_id)
+        raise BookingConflictError(BOOKING_CONFLICT)
+    logger.info("Created booking series", extra={"series_id": series_id, "last": rule["last"]})
+    return _series_to_model(item)
+
+
+def _get_series_item(series_id: str) -> SeriesItem:
+    resp = cast(dict[str, Any], _ddb().get_item(TableName=_TABLE_NAME, Key=aws.serialize({"booking_id": series_id})))
+    return _series_from_response(resp)
+
+
+def _series_from_response(resp: dict[str, Any]) -> SeriesItem:
+    item = resp.get("Item")
+    if not isinstance(item, dict) or "series_start" not in item:
+        raise KeyError(SERIES_NOT_FOUND)
+    return cast(SeriesItem, aws.deserialize(item))
+
+
+def get_series(series_id: str) -> BookingSeries:
+    return _series_to_model(_get_series_item(series_id))
+
+
+def delete_series(series_id: str) -> None:
+    """Stop generating a series' occurrences; occurrences already materialized stay as ordinary bookings."""
+    try:
+        resource_id = _get_series_item(series_id)["resource_id"]
+    except KeyError:
+        return
+    series_key = (resource_id, _SERIES_BUCKET)
+    for attempt in range(_MAX_SCHEDULE_ATTEMPTS):
+        series_bucket = cast(ScheduleSeriesItem | None, _read_schedule([series_key]).get(series_key))
+        rules = dict(series_bucket["series"]) if series_bucket else {}
+        rules.pop(series_id, None)
+        delete = {"TableName": _TABLE_NAME, "Key": aws.serialize({"booking_id": series_id})}
+        actions = [{"Delete": delete}, _series_bucket_put(resource_id, rules, series_bucket)]
+        try:
+            _ddb().transact_write_items(TransactItems=actions)  # type: ignore[arg-type]
+            return
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "TransactionCanceledException":
+                raise
+            logger.info("Resource series changed concurrently, retrying", extra={"attempt": attempt + 1})
+    raise BookingConflictError(BOOKING_CONFLICT)
+
+
+def _parse_occurrence_id(booking_id: str) -> tuple[str, int] | None:
+    series_id, sep, start = booking_id.rpartition(_OCCURRENCE_SEPARATOR)
+    if not sep or not series_id or not start.isdigit():
+        return None
+    return series_id, int(start)
+
+
+def _occurrence_item(series: SeriesItem, start: int) -> BookingItem:
+    start_time = _dt_to_iso(_from_epoch(start))
+    item: BookingItem = {
+        "booking_id": f"{series['booking_id']}{_OCCURRENCE_SEPARATOR}{start}",
+        "user_id": series["user_id"],
+        "resource_id": series["resource_id"],
+        "start_time": start_time,
+        "end_time": _dt_to_iso(_from_epoch(start + int(series["duration"]))),
+        "status": "active",
+        "active_start": start_time,
+        "series_id": series["booking_id"],
+    }
+    lead = series.get("reminder_lead_seconds")
+    if lead is not None:
+        item["reminder_lead_seconds"] = int(lead)
+    return item
+
+
+def _get_occurrence(booking_id: str) -> BookingItem:
+    """The occurrence a series currently generates for ``booking_id``; not stored anywhere."""
+    parsed = _parse_occurrence_id(booking_id)
+    if parsed is None:
+        raise KeyError(BOOKING_NOT_FOUND)
+    series_id, start = parsed
+    try:
+        series = _get_series_item(series_id)
+    except KeyError as exc:
+        raise KeyError(BOOKING_NOT_FOUND) from exc
+    return _generated_occurrence(series, start)
+
+
+def _generated_occurrence(series: SeriesItem, start: int) -> BookingItem:
+    if not recurrence.is_occurrence(_series_rule(series), start):
+        raise KeyError(BOOKING_NOT_FOUND)
+    return _occurrence_item(series, start)
+
+
+def _materialize(booking_id: str) -> None:
+    """Store a generated occurrence as a booking so it can be edited; the series stops generating it."""
+    parsed = _parse_occurrence_id(booking_id)
+    if parsed is None:
+        return
+    try:
+        item = _get_occurrence(booking_id)
+    except KeyError:
+        # Already materialized, or no such occurrence; the caller's own lookup reports which
+        return
+    ttl = _compute_ttl_from_reminder(_iso_to_dt(item["start_time"]), item.get("reminder_lead_seconds"))
+    if ttl is not None:
+        item["ttl"] = ttl
+    put = {
+        "TableName": _TABLE_NAME,
+        "Item": aws.serialize(dict(item)),
+        "ConditionExpression": "attribute_not_exists(booking_id)",
+    }
+    occurrence = (item["resource_id"], parsed[0], parsed[1])
+    logger.info("Materializing series occurrence", extra={"booking_id": booking_id})
+    with suppress(KeyError):
+        # KeyError here means a concurrent request materialized it first
+        _write_with_schedule(booking_id, {"Put": put}, None, _item_interval(item), occurrence, _reminder_put(item))
+
+
+def _skip_occurrence(booking_id: str) -> None:
+    """Delete a generated occurrence: record it as an exception on its series without storing anything."""
+    parsed = _parse_occurrence_id(booking_id)
+    if parsed is None:
+        return
+    try:
+        item = _get_occurrence(booking_id)
+    except KeyError:
+        return
+    with suppress(KeyError):
+        _write_with_schedule(booking_id, None, None, None, (item["resource_id"], parsed[0], parsed[1]))
+
+
+def _sort_key(item: BookingItem) -> tuple[str, str]:
+    # Same order as the user index: start_time, then booking_id
+    return item["start_time"], item["booking_id"]
+
+
+def _user_series(user_id: str, start_to: datetime | None) -> list[SeriesItem]:
+    params = _user_series_params(user_id, start_to)
+    series: list[SeriesItem] = []
+    while True:
+        resp = cast(dict[str, Any], _ddb().query(**params))
+        series.extend(cast(SeriesItem, aws.deserialize(it)) for it in resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return series
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _resource_series(resource_id: str) -> list[SeriesItem]:
+    # The rules in the resource's schedule bucket name its series; the bucket expires a week after the last one ends
+    resp = _ddb().get_item(
+        TableName=_SCHEDULE_TABLE_NAME, Key=aws.serialize({"resource_id": resource_id, "day": _SERIES_BUCKET})
+    )
+    if "Item" not in resp:
+        return []
+    bucket = cast(ScheduleSeriesItem, aws.deserialize(resp["Item"]))
+    return cast(
+        list[SeriesItem], _batch_get(_TABLE_NAME, [{"booking_id": series_id} for series_id in bucket["series"]])
+    )
+
+
+def _user_series_params(user_id: str, start_to: datetime | None) -> dict[str, Any]:
+    values: dict[str, Any] = {":uid": user_id}
+    condition = "user_id = :uid"
+    if start_to is not None:
+        condition += " AND series_start <= :to"
+        values[":to"] = _epoch(start_to)
+    return {
+        "TableName": _TABLE_NAME,
+        "IndexName": _USER_SERIES_INDEX,
+        "KeyConditionExpression": condition,
+        "ExpressionAttributeValues": aws.serialize(values),
+    }
+
+
+def _generated_occurrences(
+    user_id: str,
+    start_from: datetime | None,
+    start_to: datetime | None,
+    after: tuple[str, str] | None = None,
+) -> list[BookingItem]:
+    """A user's not-yet-materialized series occurrences starting in [start_from, start_to], in index order."""
+    return _series_occurrences(_user_series(user_id, start_to), start_from, start_to, after)
+
+
+def _series_occurrences(
+    series_items: list[SeriesItem],
+    start_from: datetime | None,
+    start_to: datetime | None,
+    after: tuple[str, str] | None = None,
+) -> list[BookingItem]:
+    lo = _epoch_ceil(start_from) if start_from is not None else None
+    hi = _epoch(start_to) if start_to is not None else None
+    items = [
+        _occurrence_item(series, start)
+        for series in series_items
+        for start in recurrence.occurrences(_series_rule(series), lo, hi)
+    ]
+    if after is not None:
+        items = [item for item in items if _sort_key(item) > after]
+    return sorted(items, key=_sort_key)
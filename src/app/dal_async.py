@@ -0,0 +1,225 @@
+"""Async variant of ``app.dal`` for running the API under an event loop (uvicorn, containers).
+
+Reads are native coroutines on one shared aiobotocore client with a connection pool, and the independent
+calls behind a request run concurrently: the chunks of a batch get, and a page of stored bookings alongside
+the user's series. Writes keep their single implementation in ``app.dal`` (conditional transactions with
+retries over the schedule buckets) and run in a worker thread, so they do not block the loop either.
+
+Opt in with ``ASYNC_DAL=true`` (``app.api`` then registers async routes). Results, errors and the
+``get_booking`` caches are exactly those of ``app.dal``. aiobotocore is the ``async`` extra and is imported on
+first use; with ``STORAGE_BACKEND=memory`` (and in tests) calls go to ``dal``'s client in worker threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import os
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from functools import partial
+from typing import Any, ParamSpec, TypeVar, cast
+
+from . import aws, dal, instrumentation
+from .dal import BatchGetResult, BookingItem, BookingPage, SeriesItem
+from .models import Booking, BookingSeries
+
+_MAX_POOL_CONNECTIONS = int(os.environ.get("ASYNC_DAL_MAX_CONNECTIONS", "50"))
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+# Created on first use and kept for the life of the process; tests swap in a fake by assigning it
+_client: Any = None
+_client_context: Any = None
+
+
+class _ThreadedClient:
+    """Runs each call on ``dal``'s (sync) client in a worker thread, resolving the client per call."""
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        def call(**kwargs: Any) -> Awaitable[Any]:
+            return asyncio.to_thread(getattr(dal._ddb(), name), **kwargs)
+
+        return call
+
+
+async def _ddb() -> Any:
+    global _client, _client_context  # noqa: PLW0603
+    if _client is None:
+        if dal._STORAGE_BACKEND != "dynamodb":
+            _client = _ThreadedClient()
+        else:
+            from aiobotocore.config import AioConfig  # noqa: PLC0415 - optional dependency, see module docstring
+            from aiobotocore.session import get_session  # noqa: PLC0415
+
+            config = AioConfig(max_pool_connections=_MAX_POOL_CONNECTIONS)
+            _client_context = get_session().create_client("dynamodb", config=config)
+            _client = instrumentation.instrument(await _client_context.__aenter__(), "dynamodb")
+    return _client
+
+
+async def close() -> None:
+    """Release the client's connection pool (on server shutdown)."""
+    global _client, _client_context  # noqa: PLW0603
+    if _client_context is not None:
+        await _client_context.__aexit__(None, None, None)
+    _client = _client_context = None
+
+
+def _in_thread(func: Callable[_P, _R]) -> Callable[_P, Awaitable[_R]]:
+    async def wrapper(*args: _P.args, **kwargs: _P.kwargs) -> _R:
+        return await asyncio.to_thread(partial(func, *args, **kwargs))
+
+    wrapper.__name__, wrapper.__doc__ = func.__name__, func.__doc__
+    return wrapper
+
+
+create_booking = _in_thread(dal.create_booking)
+create_bookings = _in_thread(dal.create_bookings)
+update_booking = _in_thread(dal.update_booking)
+delete_booking = _in_thread(dal.delete_booking)
+cancel_booking = _in_thread(dal.cancel_booking)
+create_series = _in_thread(dal.create_series)
+delete_series = _in_thread(dal.delete_series)
+find_free_slots = _in_thread(dal.find_free_slots)
+
+
+async def _get_item(booking_id: str, consistent: bool = False) -> BookingItem:
+    client = await _ddb()
+    return dal._booking_from_response(await client.get_item(**dal._get_item_params(booking_id, consistent)))
+
+
+async def _get_series_item(series_id: str) -> SeriesItem:
+    client = await _ddb()
+    resp = await client.get_item(TableName=dal._TABLE_NAME, Key=aws.serialize({"booking_id": series_id}))
+    return dal._series_from_response(resp)
+
+
+async def _get_occurrence(booking_id: str) -> BookingItem:
+    parsed = dal._parse_occurrence_id(booking_id)
+    if parsed is None:
+        raise KeyError(dal.BOOKING_NOT_FOUND)
+    series_id, start = parsed
+    try:
+        series = await _get_series_item(series_id)
+    except KeyError as exc:
+        raise KeyError(dal.BOOKING_NOT_FOUND) from exc
+    return dal._generated_occurrence(series, start)
+
+
+async def get_booking(booking_id: str, consistent: bool = False) -> Booking:
+    """Fetch one booking; ``consistent`` skips the cache and does a strongly consistent read."""
+    cache = dal.booking_cache
+    if cache is not None and not consistent:
+        cached = cache.get(booking_id)
+        if cached is not None:
+            return cached.model_copy()
+    try:
+        booking = dal._to_model(await _get_item(booking_id, consistent))
+    except KeyError:
+        if dal._parse_occurrence_id(booking_id) is None:
+            raise
+        booking = dal._to_model(await _get_occurrence(booking_id))
+    dal._cache_booking(booking)
+    return booking
+
+
+async def get_booking_version(booking_id: str, consistent: bool = False) -> int | None:
+    """The stored booking's version without reading the booking; see ``dal.get_booking_version``."""
+    cache = dal.version_cache
+    if cache is not None and not consistent:
+        cached = cache.get(booking_id)
+        if cached is not None:
+            return cached
+    client = await _ddb()
+    return dal._version_from_response(booking_id, await client.get_item(**dal._version_params(booking_id, consistent)))
+
+
+async def _batch_get_chunk(table_name: str, keys: list[dict[str, Any]]) -> tuple[list[Any], list[Any]]:
+    client = await _ddb()
+    resp = await client.batch_get_item(RequestItems={table_name: {"Keys": keys, "ConsistentRead": False}})
+    found = [aws.deserialize(raw) for raw in resp.get("Responses", {}).get(table_name, [])]
+    return found, resp.get("UnprocessedKeys", {}).get(table_name, {}).get("Keys", [])
+
+
+async def _batch_get(table_name: str, keys: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """``dal._batch_get`` with every chunk of an attempt in flight at once."""
+    found: list[dict[str, Any]] = []
+    pending = [aws.serialize(key) for key in keys]
+    attempt = 0
+    while pending:
+        if attempt >= dal._MAX_BATCH_ATTEMPTS:
+            raise dal.BatchUnprocessedError(dal.BATCH_READ_UNPROCESSED)
+        if attempt:
+            await asyncio.sleep(dal._BATCH_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+        chunks = await asyncio.gather(
+            *(
+                _batch_get_chunk(table_name, pending[start : start + dal._BATCH_GET_SIZE])
+                for start in range(0, len(pending), dal._BATCH_GET_SIZE)
+            )
+        )
+        pending = []
+        for chunk_found, unprocessed in chunks:
+            found.extend(chunk_found)
+            pending.extend(unprocessed)
+        attempt += 1
+    return found
+
+
+async def get_bookings(booking_ids: list[str]) -> BatchGetResult:
+    """Fetch many bookings by id, in request order; duplicates are collapsed and missing ids reported."""
+    ids = list(dict.fromkeys(booking_ids))
+    return dal._batch_get_result(ids, await _batch_get(dal._TABLE_NAME, [{"booking_id": bid} for bid in ids]))
+
+
+async def _query(params: dict[str, Any]) -> tuple[list[BookingItem], dict[str, Any] | None]:
+    client = await _ddb()
+    resp = await client.query(**params)
+    items = [cast(BookingItem, aws.deserialize(it)) for it in resp.get("Items", [])]
+    return items, resp.get("LastEvaluatedKey")
+
+
+async def _user_series(user_id: str, start_to: datetime | None) -> list[SeriesItem]:
+    params = dal._user_series_params(user_id, start_to)
+    series: list[SeriesItem] = []
+    while True:
+        items, last_key = await _query(params)
+        series.extend(cast(list[SeriesItem], items))
+        if not last_key:
+            return series
+        params["ExclusiveStartKey"] = last_key
+
+
+async def list_bookings_page(  # noqa: PLR0913
+    user_id: str,
+    limit: int,
+    cursor: str | None = None,
+    start_from: datetime | None = None,
+    start_to: datetime | None = None,
+    *,
+    status: str | None = None,
+    upcoming: bool = False,
+    include_archived: bool = False,
+) -> BookingPage:
+    """One page of a user's bookings ordered by start_time; ``next_cursor`` is None on the last page."""
+    if upcoming:
+        start_from = dal._upcoming_from(start_from)
+    params, after = dal._page_params(user_id, limit, cursor, start_from, start_to, status)
+    if status == "cancelled":
+        # Series only generate active occurrences
+        items, last_key = await _query(params)
+        generated: list[BookingItem] = []
+    else:
+        # The stored page and the user's series come from separate queries, so both are in flight at once
+        (items, last_key), series = await asyncio.gather(_query(params), _user_series(user_id, start_to))
+        generated = dal._series_occurrences(series, start_from, start_to, after)
+    if include_archived:
+        # Archive reads are blocking file (object store) reads
+        archived = await asyncio.to_thread(dal._archived, user_id, limit, items, start_from, start_to, after, status)
+        generated = list(heapq.merge(generated, archived, key=dal._sort_key))
+    return dal._page(user_id, limit, items, last_key, generated, status)
+
+
+async def get_series(series_id: str) -> BookingSeries:
+    return dal._series_to_model(await _get_series_item(series_id))
@@ -0,0 +1,299 @@
+"""Direct dispatch of API Gateway HTTP API (v2.0) events to the endpoint functions in ``app.api``.
+
+Opt in with ``API_DIRECT_DISPATCH=true``. A request whose method and path match a route here is parsed and
+validated with the same models and limits FastAPI applies, handed straight to the endpoint function and
+serialized into the response Mangum would have built, skipping the ASGI translation, Starlette routing,
+dependency resolution and the thread-pool hop. Anything unusual (an unknown route, a body or query parameter
+that does not validate, a non-JSON content type) is handed back to Mangum untouched, so error bodies for
+invalid requests are FastAPI's own.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import re
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any, NamedTuple, TypeVar, cast
+from urllib.parse import parse_qsl, unquote
+
+from aws_lambda_powertools import Logger
+from fastapi import HTTPException
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from starlette.responses import Response
+
+from app import api, dal, instrumentation
+from app.models import (
+    BookingBatchCreate,
+    BookingBatchGet,
+    BookingCreate,
+    BookingSeriesCreate,
+    BookingStatus,
+    BookingUpdate,
+)
+
+logger = Logger()
+
+M = TypeVar("M", bound=BaseModel)
+_DATETIME: TypeAdapter[datetime] = TypeAdapter(datetime)
+
+
+class _Fallback(Exception):  # noqa: N818 - control flow, not an error
+    """The request needs FastAPI after all (usually to produce a validation error body)."""
+
+
+class Request(NamedTuple):
+    params: dict[str, str]  # path parameters
+    query: dict[str, str]  # last value wins, as in Starlette
+    headers: dict[str, str]  # lower-cased names
+    event: dict[str, Any]
+
+
+# (status, content, extra headers); content is a model, a list of models, a plain JSON value or None
+Reply = tuple[int, Any, dict[str, str]]
+
+
+def _body(request: Request, model: type[M]) -> M:
+    raw = request.event.get("body")
+    content_type = request.headers.get("content-type")
+    if raw is None or (content_type is not None and content_type.split(";")[0].strip() != "application/json"):
+        raise _Fallback
+    try:
+        data = json.loads(base64.b64decode(raw) if request.event.get("isBase64Encoded") else raw)
+        return model.model_validate(data)
+    except (ValueError, binascii.Error, ValidationError) as exc:
+        raise _Fallback from exc
+
+
+def _int_query(request: Request, name: str, default: int, low: int, high: int | None = None) -> int:
+    value = request.query.get(name)
+    if value is None:
+        return default
+    if not value.isdigit() or int(value) < low or (high is not None and int(value) > high):
+        raise _Fallback
+    return int(value)
+
+
+def _datetime_query(request: Request, name: str, required: bool = False) -> datetime | None:
+    value = request.query.get(name)
+    if value is None:
+        if required:
+            raise _Fallback
+        return None
+    try:
+        return _DATETIME.validate_python(value)
+    except ValidationError as exc:
+        raise _Fallback from exc
+
+
+def _bool_query(request: Request, name: str) -> bool:
+    value = request.query.get(name)
+    if value is None:
+        return False
+    # The spellings pydantic accepts for a bool query parameter
+    if value.lower() in ("1", "true", "on", "yes", "t", "y"):
+        return True
+    if value.lower() in ("0", "false", "off", "no", "f", "n"):
+        return False
+    raise _Fallback
+
+
+def _status_query(request: Request) -> BookingStatus | None:
+    value = request.query.get("status")
+    if value is not None and value not in ("active", "cancelled"):
+        raise _Fallback
+    return cast(BookingStatus | None, value)
+
+
+def _health(request: Request) -> Reply:
+    return 200, api.health(), {}
+
+
+def _idempotency_key(request: Request) -> str | None:
+    key = request.headers.get("idempotency-key")
+    if key is not None and not 1 <= len(key) <= 255:  # noqa: PLR2004 - api.IdempotencyKey's limits
+        raise _Fallback
+    return key
+
+
+def _create_booking(request: Request) -> Reply:
+    return 201, api.create_booking(_body(request, BookingCreate), _idempotency_key(request)), {}
+
+
+def _create_bookings(request: Request) -> Reply:
+    return 200, api.create_bookings(_body(request, BookingBatchCreate)), {}
+
+
+def _get_bookings(request: Request) -> Reply:
+    return 200, api.get_bookings(_body(request, BookingBatchGet)), {}
+
+
+def _create_series(request: Request) -> Reply:
+    return 201, api.create_series(_body(request, BookingSeriesCreate)), {}
+
+
+def _get_series(request: Request) -> Reply:
+    return 200, api.get_series(request.params["series_id"]), {}
+
+
+def _delete_series(request: Request) -> Reply:
+    api.delete_series(request.params["series_id"])
+    return 204, None, {}
+
+
+def _get_booking(request: Request) -> Reply:
+    headers = request.headers
+    response = api.get_booking(request.params["booking_id"], headers.get("cache-control"), headers.get("if-none-match"))
+    # 200 with the booking, or 304 Not Modified
+    return response.status_code, response, {}
+
+
+def _list_bookings(request: Request) -> Reply:
+    response = api.list_bookings(
+        request.params["user_id"],
+        _int_query(request, "limit", api.DEFAULT_PAGE_SIZE, 1, api.MAX_PAGE_SIZE),
+        request.query.get("cursor"),
+        _datetime_query(request, "from"),
+        _datetime_query(request, "to"),
+        _status_query(request),
+        _bool_query(request, "upcoming"),
+        _bool_query(request, "include_archived"),
+    )
+    return 200, response, {}
+
+
+def _get_availability(request: Request) -> Reply:
+    availability = api.get_availability(
+        request.params["resource_id"],
+        _datetime_query(request, "from", required=True),  # type: ignore[arg-type]
+        _datetime_query(request, "to", required=True),  # type: ignore[arg-type]
+        _int_query(request, "min_duration_seconds", 1, 1),
+    )
+    return 200, availability, {}
+
+
+def _update_booking(request: Request) -> Reply:
+    response = api.update_booking(
+        request.params["booking_id"], _body(request, BookingUpdate), request.headers.get("if-match")
+    )
+    # The booking with its ETag
+    return 200, response, {}
+
+
+def _delete_booking(request: Request) -> Reply:
+    api.delete_booking(request.params["booking_id"])
+    return 204, None, {}
+
+
+def _cancel_booking(request: Request) -> Reply:
+    response = api.cancel_booking(
+        request.params["booking_id"], _idempotency_key(request), request.headers.get("if-match")
+    )
+    return 200, response, {}
+
+
+# Same method + path templates as the decorators in app.api
+ROUTES: dict[str, Callable[[Request], Reply]] = {
+    "GET /health": _health,
+    "POST /bookings": _create_booking,
+    "POST /bookings:batch": _create_bookings,
+    "POST /bookings:batchGet": _get_bookings,
+    "POST /series": _create_series,
+    "GET /series/{series_id}": _get_series,
+    "DELETE /series/{series_id}": _delete_series,
+    "GET /bookings/{booking_id}": _get_booking,
+    "GET /users/{user_id}/bookings": _list_bookings,
+    "GET /resources/{resource_id}/availability": _get_availability,
+    "PUT /bookings/{booking_id}": _update_booking,
+    "DELETE /bookings/{booking_id}": _delete_booking,
+    "POST /bookings/{booking_id}/cancel": _cancel_booking,
+}
+
+
+def _compile(template: str) -> re.Pattern[str]:
+    parts = re.split(r"\{(\w+)\}", template)
+    # Odd positions are parameter names; path parameters match one segment, like Starlette's default converter
+    pattern = "".join(re.escape(part) if i % 2 == 0 else f"(?P<{part}>[^/]+)" for i, part in enumerate(parts))
+    return re.compile(pattern + "$")
+
+
+# handler -> its route, the label app.instrumentation records it under (the same as FastAPI's route templates)
+_ROUTE_NAMES = {handler: key for key, handler in ROUTES.items()}
+# method -> static paths, and templated paths in declaration order
+_STATIC: dict[str, dict[str, Callable[[Request], Reply]]] = {}
+_TEMPLATED: dict[str, list[tuple[re.Pattern[str], Callable[[Request], Reply]]]] = {}
+for _key, _handler in ROUTES.items():
+    _method, _template = _key.split(" ", 1)
+    if "{" in _template:
+        _TEMPLATED.setdefault(_method, []).append((_compile(_template), _handler))
+    else:
+        _STATIC.setdefault(_method, {})[_template] = _handler
+
+
+def _match(event: dict[str, Any], method: str) -> tuple[Callable[[Request], Reply], dict[str, str]] | None:
+    # An API route per endpoint gives its template and decoded parameters directly; a proxy route does not
+    route = ROUTES.get(event.get("routeKey", ""))
+    if route is not None:
+        return route, event.get("pathParameters") or {}
+    path = event.get("rawPath") or event["requestContext"]["http"].get("path", "")
+    handler = _STATIC.get(method, {}).get(path)
+    if handler is not None:
+        return handler, {}
+    for pattern, handler in _TEMPLATED.get(method, ()):
+        found = pattern.match(path)
+        if found:
+            return handler, {name: unquote(value) for name, value in found.groupdict().items()}
+    return None
+
+
+def _serialize(content: Any) -> str:
+    if isinstance(content, BaseModel):
+        return content.model_dump_json()
+    if isinstance(content, list) and all(isinstance(item, BaseModel) for item in content):
+        return "[" + ",".join(item.model_dump_json() for item in content) + "]"
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+
+
+def _response(status: int, content: Any, headers: dict[str, str]) -> dict[str, Any]:
+    if status == 204:  # noqa: PLR2004
+        body, base = "", {"content-type": "application/json"}
+    elif isinstance(content, Response):
+        # Endpoints that render their own response (api.ModelJSONResponse, a 304) already carry body and headers;
+        # Mangum labels one without a content type as JSON
+        body, base = bytes(content.body).decode(), {"content-type": "application/json", **content.headers}
+    else:
+        body = _serialize(content)
+        base = {"content-length": str(len(body.encode())), "content-type": "application/json"}
+    return {"statusCode": status, "body": body, "headers": {**base, **headers}, "isBase64Encoded": False}
+
+
+def dispatch(event: dict[str, Any]) -> dict[str, Any] | None:
+    """The Lambda proxy response for ``event``, or None when Mangum should handle it."""
+    method = event.get("requestContext", {}).get("http", {}).get("method", "")
+    matched = _match(event, method)
+    if matched is None:
+        return None
+    handler, params = matched
+    if instrumentation.ENABLED:
+        instrumentation.set_route(_ROUTE_NAMES[handler])
+    headers = {name.lower(): value for name, value in (event.get("headers") or {}).items()}
+    request = Request(
+        params, dict(parse_qsl(event.get("rawQueryString") or "", keep_blank_values=True)), headers, event
+    )
+    try:
+        return _response(*handler(request))
+    except _Fallback:
+        return None
+    except dal.BatchUnprocessedError as exc:
+        error = api.unavailable(exc)
+        return _response(error.status_code, {"detail": error.detail}, dict(error.headers or {}))
+    except HTTPException as exc:
+        return _response(exc.status_code, {"detail": exc.detail}, dict(exc.headers or {}))
+    except Exception:
+        # What Mangum returns when the application raises
+        logger.exception("An error occurred running the application.")
+        body = "Internal Server Error"
+        headers = {"content-length": str(len(body)), "content-type": "text/plain; charset=utf-8"}
+        return {"statusCode": 500, "body": body, "headers": headers, "isBase64Encoded": False}
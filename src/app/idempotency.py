@@ -0,0 +1,109 @@
+"""Idempotency-Key support for booking writes, built on the powertools idempotency utility.
+
+The first request carrying a key runs normally and its response is stored in the idempotency table (through
+``dal``'s client, so the in-memory backend covers it too). A retry with the same key and the same request gets
+the stored response back without touching the bookings table. Reusing a key for a different request is an
+error. Powertools keeps an in-process LRU of recent results in front of the table, so a retry that lands on the
+same warm container is answered without any DynamoDB call.
+
+The powertools idempotency package imports boto3, so it is loaded on the first keyed request rather than
+at import time.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from functools import cache
+from typing import TYPE_CHECKING, Any
+
+from app import dal
+from app.models import Booking
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools.utilities.idempotency import IdempotencyConfig
+    from aws_lambda_powertools.utilities.typing import LambdaContext
+
+_EXPIRES_AFTER_SECONDS = int(os.environ.get("IDEMPOTENCY_EXPIRES_AFTER_SECONDS", "3600"))
+_LOCAL_CACHE_SIZE = int(os.environ.get("IDEMPOTENCY_CACHE_SIZE", "256"))
+
+# Set per invocation by the Lambda handler; powertools uses the remaining time to expire in-progress records
+# of invocations that timed out
+_lambda_context: LambdaContext | None = None
+
+
+class IdempotencyKeyReusedError(Exception):
+    """The key was already used for a different request."""
+
+
+class IdempotencyInProgressError(Exception):
+    """A request with this key is still running."""
+
+
+def register_lambda_context(context: LambdaContext) -> None:
+    global _lambda_context  # noqa: PLW0603
+    # Local runs and tests pass stand-ins without the remaining-time clock
+    _lambda_context = context if hasattr(context, "get_remaining_time_in_millis") else None
+
+
+class _DalClient:
+    """Resolves dal's client on every call, so the store follows whichever backend dal is using."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(dal._ddb(), name)
+
+
+@cache
+def _config() -> IdempotencyConfig:
+    from aws_lambda_powertools.utilities.idempotency import IdempotencyConfig  # noqa: PLC0415
+
+    return IdempotencyConfig(
+        event_key_jmespath="key",
+        payload_validation_jmespath="request",
+        raise_on_no_idempotency_key=True,
+        expires_after_seconds=_EXPIRES_AFTER_SECONDS,
+        use_local_cache=_LOCAL_CACHE_SIZE > 0,
+        local_cache_max_items=max(_LOCAL_CACHE_SIZE, 1),
+    )
+
+
+def _run(data: dict[str, Any], call: Callable[[], Booking]) -> Booking:
+    # Only ``data`` is hashed; ``call`` carries the actual work
+    return call()
+
+
+@cache
+def _idempotent_run() -> Callable[..., Booking]:
+    from aws_lambda_powertools.utilities.idempotency import (  # noqa: PLC0415
+        DynamoDBPersistenceLayer,
+        idempotent_function,
+    )
+    from aws_lambda_powertools.utilities.idempotency.serialization.custom_dict import (  # noqa: PLC0415
+        CustomDictSerializer,
+    )
+
+    client: Any = _DalClient()
+    persistence = DynamoDBPersistenceLayer(table_name=dal._IDEMPOTENCY_TABLE_NAME, boto3_client=client)
+    serializer = CustomDictSerializer(
+        to_dict=lambda booking: booking.model_dump(mode="json"), from_dict=Booking.model_validate
+    )
+    return idempotent_function(  # type: ignore[no-any-return]
+        data_keyword_argument="data", persistence_store=persistence, config=_config(), output_serializer=serializer
+    )(_run)
+
+
+def run(operation: str, key: str, request: dict[str, Any], call: Callable[[], Booking]) -> Booking:
+    """Run ``call`` once per (operation, key); ``request`` is what must match when the key is reused."""
+    from aws_lambda_powertools.utilities.idempotency.exceptions import (  # noqa: PLC0415
+        IdempotencyAlreadyInProgressError,
+        IdempotencyValidationError,
+    )
+
+    if _lambda_context is not None:
+        _config().register_lambda_context(_lambda_context)
+    try:
+        return _idempotent_run()(data={"key": f"{operation}#{key}", "request": request}, call=call)
+    except IdempotencyValidationError as exc:
+        raise IdempotencyKeyReusedError(key) from exc
+    except IdempotencyAlreadyInProgressError as exc:
+        raise IdempotencyInProgressError(key) from exc
@@ -0,0 +1,202 @@
+"""Per-invocation hot-path metrics (``ROUTE_METRICS=true``): one EMF record per request or Lambda invocation.
+
+Each record carries a ``route`` dimension (the API route template, or the handler name for the background
+Lambdas) and the invocation's latency, whether it was a cold start, the DynamoDB and EventBridge calls it made,
+and the read and write capacity DynamoDB reports for them (``ReturnConsumedCapacity=TOTAL`` is added to every
+DynamoDB call). The calls per operation go into the record's metadata, which is what shows a route reading the
+same item twice. Records go out through the caller's powertools ``Metrics``, together with the business metrics
+added through ``add_metric`` during the invocation. Those are kept on the invocation until then: under an ASGI
+server concurrent requests share one ``Metrics``, and a metric added to it directly would go out with whichever
+request's record is flushed next.
+
+Clients are counted by wrapping them in ``instrument`` where they are created; the counts land in the
+invocation opened by ``invocation`` in the current context (worker threads see it through ``asyncio.to_thread``
+or an explicitly copied context). With the switch off nothing is wrapped or opened, so it costs nothing. Like
+``app.telemetry`` this module is shared with the background Lambdas, so it must not import the web stack.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterator, MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, TypeVar
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools import Metrics
+    from aws_lambda_powertools.metrics import MetricUnit
+
+ENABLED = os.environ.get("ROUTE_METRICS", "false").strip().lower() in ("1", "true")
+
+C = TypeVar("C")
+
+_READS = frozenset({"get_item", "batch_get_item", "query", "scan", "transact_get_items"})
+_WRITES = frozenset({"put_item", "update_item", "delete_item", "batch_write_item", "transact_write_items"})
+# Route of a request that matched no route (a 404 or 405 from the router)
+UNMATCHED = "unmatched"
+
+
+class Invocation:
+    """What one request or Lambda invocation did; clients from ``instrument`` add to it as they are called."""
+
+    def __init__(self, route: str) -> None:
+        self.route = route
+        self.calls: Counter[str] = Counter()  # "<service>.<operation>" -> calls
+        self.read_units = 0.0
+        self.write_units = 0.0
+        self.metrics: list[tuple[str, MetricUnit | str, float]] = []  # business metrics, for its record
+        # Calls made from worker threads (batch chunks, to_thread) land here concurrently
+        self._lock = threading.Lock()
+
+    def record(self, service: str, operation: str) -> None:
+        with self._lock:
+            self.calls[f"{service}.{operation}"] += 1
+
+    def consumed(self, operation: str, response: Any) -> None:
+        consumed = response.get("ConsumedCapacity") if isinstance(response, dict) else None
+        if not consumed:
+            return
+        # A single entry for item operations and queries, one per table for batches and transactions
+        units = sum(
+            float(entry.get("CapacityUnits", 0)) for entry in ([consumed] if isinstance(consumed, dict) else consumed)
+        )
+        with self._lock:
+            if operation in _READS:
+                self.read_units += units
+            else:
+                self.write_units += units
+
+    def add_metric(self, name: str, unit: MetricUnit | str, value: float) -> None:
+        with self._lock:
+            self.metrics.append((name, unit, value))
+
+    def service_calls(self, service: str) -> int:
+        return sum(count for name, count in self.calls.items() if name.startswith(f"{service}."))
+
+
+_current: ContextVar[Invocation | None] = ContextVar("invocation", default=None)
+_cold = True
+
+
+def current() -> Invocation | None:
+    return _current.get()
+
+
+def add_metric(metrics: Metrics, name: str, unit: MetricUnit | str, value: float) -> None:
+    """A business metric for the current invocation's record; straight into ``metrics`` outside of one."""
+    invocation = _current.get()
+    if invocation is None:
+        metrics.add_metric(name=name, unit=unit, value=value)
+    else:
+        invocation.add_metric(name, unit, value)
+
+
+def set_route(route: str) -> None:
+    """Label the current invocation, for routes only known once the request has been routed."""
+    invocation = _current.get()
+    if invocation is not None:
+        invocation.route = route
+
+
+class _Counted:
+    """Proxy counting the calls made on a boto3, aiobotocore or in-memory client into the current invocation."""
+
+    def __init__(self, target: Any, service: str) -> None:
+        self._target = target
+        self._service = service
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(**params: Any) -> Any:
+            invocation = _current.get()
+            if invocation is None:
+                return attr(**params)
+            if self._service == "dynamodb" and (name in _READS or name in _WRITES):
+                params.setdefault("ReturnConsumedCapacity", "TOTAL")
+            invocation.record(self._service, name)
+            response = attr(**params)
+            if isinstance(response, Awaitable):
+                return _consumed_when_done(invocation, name, response)
+            invocation.consumed(name, response)
+            return response
+
+        return call
+
+
+async def _consumed_when_done(invocation: Invocation, operation: str, response: Awaitable[Any]) -> Any:
+    result = await response
+    invocation.consumed(operation, result)
+    return result
+
+
+def instrument(client: C, service: str) -> C:
+    """``client`` counted into the current invocation; the client itself when instrumentation is off."""
+    if not ENABLED:
+        return client
+    return _Counted(client, service)  # type: ignore[return-value]
+
+
+def _emit(metrics: Metrics, invocation: Invocation, elapsed_ms: float, cold: bool) -> None:
+    metrics.add_dimension(name="route", value=invocation.route)
+    metrics.add_metric(name="Latency", unit="Milliseconds", value=elapsed_ms)
+    metrics.add_metric(name="ColdStart", unit="Count", value=int(cold))
+    metrics.add_metric(name="DynamoDBCalls", unit="Count", value=invocation.service_calls("dynamodb"))
+    metrics.add_metric(name="EventBridgeCalls", unit="Count", value=invocation.service_calls("events"))
+    metrics.add_metric(name="ConsumedReadCapacity", unit="Count", value=invocation.read_units)
+    metrics.add_metric(name="ConsumedWriteCapacity", unit="Count", value=invocation.write_units)
+    for name, unit, value in invocation.metrics:
+        metrics.add_metric(name=name, unit=unit, value=value)
+    metrics.add_metadata(key="calls", value=dict(sorted(invocation.calls.items())))
+    metrics.flush_metrics()
+
+
+@contextmanager
+def invocation(metrics: Metrics, route: str = UNMATCHED) -> Iterator[Invocation]:
+    """Count what runs inside into a new invocation, then emit its record; ``route`` may be set later."""
+    global _cold  # noqa: PLW0603
+    cold = _cold
+    _cold = False
+    opened = Invocation(route)
+    token = _current.set(opened)
+    started = time.perf_counter()
+    try:
+        yield opened
+    finally:
+        _current.reset(token)
+        _emit(metrics, opened, (time.perf_counter() - started) * 1000, cold)
+
+
+class RouteMiddleware:
+    """ASGI middleware naming the invocation after the route that served the request.
+
+    Under Lambda the handler has already opened the invocation; under an ASGI server each request opens its own.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]], metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: MutableMapping[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if _current.get() is not None:
+            await self._labelled(scope, receive, send)
+            return
+        with invocation(self.metrics):
+            await self._labelled(scope, receive, send)
+
+    async def _labelled(self, scope: MutableMapping[str, Any], receive: Any, send: Any) -> None:
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            # The router fills in the matched route on the same scope
+            route = scope.get("route")
+            set_route(f"{scope['method']} {route.path}" if route is not None else UNMATCHED)
@@ -0,0 +1,884 @@
+"""In-memory storage engine speaking the subset of the DynamoDB client API that ``app.dal`` uses.
+
+Selected with ``STORAGE_BACKEND=memory`` for local runs and load tests, and used by the test suite. Requests and
+responses use typed attribute values exactly like boto3's low-level client, so ``dal`` cannot tell the two
+apart. Supported: conditional put/get/update/delete, query on the table and on secondary indexes (kept as
+sorted arrays, so queries are a bisect plus a slice), scan, batch get/write, transactions, TTL expiry and a
+bounded per-table change feed shaped like DynamoDB Streams records. ``LatencyProxy`` puts a simulated network
+round trip in front of it (or any other client) for the tests and ``tools/dev/bench.py``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import operator
+import re
+import threading
+import time
+from collections import Counter, deque
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, NamedTuple, Protocol
+
+from botocore.exceptions import ClientError
+
+from app.aws import deserialize, serialize
+
+_MISSING: Any = object()
+# What DynamoDB puts on stream records of items its TTL process deleted
+TTL_USER_IDENTITY = {"type": "Service", "principalId": "dynamodb.amazonaws.com"}
+# Change records kept per table; like a DynamoDB stream (24 hours), older records fall off whether read or not
+CHANGE_RETENTION = 100_000
+
+
+class StorageBackend(Protocol):
+    """The DynamoDB client operations ``app.dal`` relies on; boto3's client and MemoryDynamoDB both provide them."""
+
+    def put_item(self, **params: Any) -> dict[str, Any]: ...
+    def get_item(self, **params: Any) -> dict[str, Any]: ...
+    def update_item(self, **params: Any) -> dict[str, Any]: ...
+    def delete_item(self, **params: Any) -> dict[str, Any]: ...
+    def query(self, **params: Any) -> dict[str, Any]: ...
+    def scan(self, **params: Any) -> dict[str, Any]: ...
+    def batch_get_item(self, **params: Any) -> dict[str, Any]: ...
+    def batch_write_item(self, **params: Any) -> dict[str, Any]: ...
+    def transact_write_items(self, **params: Any) -> dict[str, Any]: ...
+
+
+def _error(code: str, operation: str, message: str = "", **extra: Any) -> ClientError:
+    response: Any = {"Error": {"Code": code, "Message": message or code}, **extra}
+    return ClientError(response, operation)
+
+
+# --- Expressions -------------------------------------------------------------------------------------------------
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|[()=<>,.+\-\[\]]|[#:]?[A-Za-z0-9_]+)")
+_KEYWORDS = {"AND", "OR", "NOT", "BETWEEN", "IN", "SET", "REMOVE", "ADD", "DELETE"}
+# The DynamoDB reserved words among this app's attribute names and the ones its models are likely to grow into;
+# like DynamoDB, an expression must reach these through an ExpressionAttributeNames alias (the full list has
+# several hundred words)
+_RESERVED = {
+    "BUCKET",
+    "COUNT",
+    "DATA",
+    "DATE",
+    "DAY",
+    "DURATION",
+    "END",
+    "EXCEPTIONS",
+    "HOUR",
+    "INTERVAL",
+    "LAST",
+    "MINUTE",
+    "MONTH",
+    "NAME",
+    "STATUS",
+    "TIMESTAMP",
+    "TTL",
+    "UNTIL",
+    "USER",
+    "YEAR",
+}
+
+
+def _tokenize(expression: str) -> list[str]:
+    tokens: list[str] = []
+    pos = 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if not match:
+            raise _error("ValidationException", "Expression", f"Invalid expression near {expression[pos:]!r}")
+        token = match.group(1)
+        tokens.append(token.upper() if token.upper() in _KEYWORDS else token)
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser producing a tuple AST; names and values are resolved at evaluation time."""
+
+    def __init__(self, expression: str):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, expected: str | None = None) -> str:
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise _error("ValidationException", "Expression", f"Expected {expected!r}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def done(self) -> None:
+        if self.peek() is not None:
+            raise _error("ValidationException", "Expression", f"Unexpected token {self.peek()!r}")
+
+    # condition := or
+    def condition(self) -> tuple:
+        node = self.conjunction()
+        while self.peek() == "OR":
+            self.take()
+            node = ("or", node, self.conjunction())
+        return node
+
+    def conjunction(self) -> tuple:
+        node = self.negation()
+        while self.peek() == "AND":
+            self.take()
+            node = ("and", node, self.negation())
+        return node
+
+    def negation(self) -> tuple:
+        if self.peek() == "NOT":
+            self.take()
+            return ("not", self.negation())
+        return self.predicate()
+
+    def predicate(self) -> tuple:
+        if self.peek() == "(":
+            self.take()
+            node = self.condition()
+            self.take(")")
+            return node
+        token = self.peek()
+        if token in ("attribute_exists", "attribute_not_exists", "begins_with", "contains", "attribute_type"):
+            self.take()
+            self.take("(")
+            args = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                args.append(self.operand())
+            self.take(")")
+            return ("func", token, args)
+        left = self.operand()
+        op = self.take()
+        if op == "BETWEEN":
+            low = self.operand()
+            self.take("AND")
+            return ("between", left, low, self.operand())
+        if op == "IN":
+            self.take("(")
+            options = [self.operand()]
+            while self.peek() == ",":
+                self.take()
+                options.append(self.operand())
+            self.take(")")
+            return ("in", left, options)
+        if op not in ("=", "<>", "<", "<=", ">", ">="):
+            raise _error("ValidationException", "Expression", f"Unknown comparator {op!r}")
+        return ("cmp", op, left, self.operand())
+
+    def operand(self) -> tuple:
+        token = self.peek()
+        if token in ("size", "if_not_exists", "list_append") and self.tokens[self.pos + 1 : self.pos + 2] == ["("]:
+            self.take()
+            self.take("(")
+            args = [self.value()]
+            while self.peek() == ",":
+                self.take()
+                args.append(self.value())
+            self.take(")")
+            return (token, *args)
+        if token is not None and token.startswith(":"):
+            self.take()
+            return ("value", token)
+        return self.path()
+
+    def path(self) -> tuple:
+        segments: list[str | int] = [self.name()]
+        while self.peek() in (".", "["):
+            if self.take() == ".":
+                segments.append(self.name())
+            else:
+                segments.append(int(self.take()))
+                self.take("]")
+        return ("path", tuple(segments))
+
+    def name(self) -> str:
+        token = self.take()
+        if token.upper() in _RESERVED:
+            raise _error("ValidationException", "Expression", f"Attribute name is a reserved keyword: {token}")
+        return token
+
+    def value(self) -> tuple:
+        node = self.operand()
+        while self.peek() in ("+", "-"):
+            op = self.take()
+            node = ("arith", op, node, self.operand())
+        return node
+
+    def update(self) -> list[tuple[str, tuple, tuple | None]]:
+        actions: list[tuple[str, tuple, tuple | None]] = []
+        while self.peek() is not None:
+            clause = self.take()
+            if clause not in ("SET", "REMOVE", "ADD", "DELETE"):
+                raise _error("ValidationException", "Expression", f"Unknown update clause {clause!r}")
+            while True:
+                target = self.path()
+                if clause == "SET":
+                    self.take("=")
+                    actions.append((clause, target, self.value()))
+                elif clause == "REMOVE":
+                    actions.append((clause, target, None))
+                else:
+                    actions.append((clause, target, self.operand()))
+                if self.peek() != ",":
+                    break
+                self.take()
+        return actions
+
+
+@lru_cache(maxsize=1024)
+def _parse_condition(expression: str) -> tuple:
+    parser = _Parser(expression)
+    node = parser.condition()
+    parser.done()
+    return node
+
+
+@lru_cache(maxsize=1024)
+def _parse_update(expression: str) -> list[tuple[str, tuple, tuple | None]]:
+    return _Parser(expression).update()
+
+
+@lru_cache(maxsize=1024)
+def _parse_projection(expression: str) -> list[tuple]:
+    parser = _Parser(expression)
+    paths = [parser.path()]
+    while parser.peek() == ",":
+        parser.take()
+        paths.append(parser.path())
+    parser.done()
+    return paths
+
+
+class _Context(NamedTuple):
+    names: dict[str, str]
+    values: dict[str, Any]  # already deserialized
+
+    def segments(self, node: tuple) -> list[str | int]:
+        out: list[str | int] = []
+        for segment in node[1]:
+            if isinstance(segment, str) and segment.startswith("#"):
+                if segment not in self.names:
+                    raise _error("ValidationException", "Expression", f"Undefined attribute name {segment}")
+                out.append(self.names[segment])
+            else:
+                out.append(segment)
+        return out
+
+
+def _get_path(item: dict[str, Any], segments: list[str | int]) -> Any:
+    current: Any = item
+    for segment in segments:
+        if isinstance(segment, int):
+            if not isinstance(current, list) or segment >= len(current):
+                return _MISSING
+            current = current[segment]
+        else:
+            if not isinstance(current, dict) or segment not in current:
+                return _MISSING
+            current = current[segment]
+    return current
+
+
+def _set_path(item: dict[str, Any], segments: list[str | int], value: Any) -> None:
+    parent = _get_path(item, segments[:-1]) if len(segments) > 1 else item
+    last = segments[-1]
+    if isinstance(last, int) and isinstance(parent, list):
+        if last < len(parent):
+            parent[last] = value
+        else:
+            parent.append(value)
+    elif isinstance(last, str) and isinstance(parent, dict):
+        parent[last] = value
+    else:
+        raise _error("ValidationException", "UpdateItem", "The document path provided in the update is invalid")
+
+
+def _remove_path(item: dict[str, Any], segments: list[str | int]) -> None:
+    parent = _get_path(item, segments[:-1]) if len(segments) > 1 else item
+    last = segments[-1]
+    if isinstance(last, int) and isinstance(parent, list) and last < len(parent):
+        del parent[last]
+    elif isinstance(last, str) and isinstance(parent, dict):
+        parent.pop(last, None)
+
+
+def _operand(node: tuple, item: dict[str, Any], ctx: _Context) -> Any:
+    kind = node[0]
+    if kind == "value":
+        if node[1] not in ctx.values:
+            raise _error("ValidationException", "Expression", f"Undefined attribute value {node[1]}")
+        return ctx.values[node[1]]
+    if kind == "path":
+        return _get_path(item, ctx.segments(node))
+    if kind == "size":
+        value = _operand(node[1], item, ctx)
+        return _MISSING if value is _MISSING else len(value)
+    if kind == "if_not_exists":
+        value = _operand(node[1], item, ctx)
+        return _operand(node[2], item, ctx) if value is _MISSING else value
+    if kind == "list_append":
+        return [*_operand(node[1], item, ctx), *_operand(node[2], item, ctx)]
+    if kind == "arith":
+        left, right = _operand(node[2], item, ctx), _operand(node[3], item, ctx)
+        if left is _MISSING or right is _MISSING:
+            raise _error("ValidationException", "UpdateItem", "An operand in the update expression does not exist")
+        return left + right if node[1] == "+" else left - right
+    raise _error("ValidationException", "Expression", f"Unsupported operand {kind}")
+
+
+_COMPARATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "=": operator.eq,
+    "<>": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    if left is _MISSING or right is _MISSING:
+        return False
+    try:
+        return bool(_COMPARATORS[op](left, right))
+    except TypeError:
+        # Different types never compare in DynamoDB; the condition is simply false
+        return False
+
+
+def _evaluate(node: tuple, item: dict[str, Any] | None, ctx: _Context) -> bool:  # noqa: PLR0911
+    item = item if item is not None else {}
+    kind = node[0]
+    if kind == "and":
+        return _evaluate(node[1], item, ctx) and _evaluate(node[2], item, ctx)
+    if kind == "or":
+        return _evaluate(node[1], item, ctx) or _evaluate(node[2], item, ctx)
+    if kind == "not":
+        return not _evaluate(node[1], item, ctx)
+    if kind == "cmp":
+        return _compare(node[1], _operand(node[2], item, ctx), _operand(node[3], item, ctx))
+    if kind == "between":
+        value = _operand(node[1], item, ctx)
+        return _compare(">=", value, _operand(node[2], item, ctx)) and _compare(
+            "<=", value, _operand(node[3], item, ctx)
+        )
+    if kind == "in":
+        value = _operand(node[1], item, ctx)
+        return any(_compare("=", value, _operand(option, item, ctx)) for option in node[2])
+    name, args = node[1], node[2]
+    first = _operand(args[0], item, ctx)
+    if name == "attribute_exists":
+        return first is not _MISSING
+    if name == "attribute_not_exists":
+        return first is _MISSING
+    second = _operand(args[1], item, ctx)
+    if name == "begins_with":
+        return isinstance(first, str) and isinstance(second, str) and first.startswith(second)
+    if name == "contains":
+        return first is not _MISSING and isinstance(first, str | list | set) and second in first
+    return False
+
+
+def _context(params: dict[str, Any]) -> _Context:
+    return _Context(
+        params.get("ExpressionAttributeNames") or {}, deserialize(params.get("ExpressionAttributeValues") or {})
+    )
+
+
+def _apply_update(item: dict[str, Any], expression: str, ctx: _Context) -> dict[str, Any]:
+    new: dict[str, Any] = _copy(item)
+    # Every right-hand side sees the item as it was before the update, like DynamoDB
+    resolved: list[tuple[str, list[str | int], Any]] = [
+        (clause, ctx.segments(target), _operand(v, item, ctx) if v else None)
+        for clause, target, v in _parse_update(expression)
+    ]
+    for clause, segments, value in resolved:
+        if clause == "SET":
+            _set_path(new, segments, value)
+        elif clause == "REMOVE":
+            _remove_path(new, segments)
+        elif clause == "ADD":
+            current = _get_path(new, segments)
+            if isinstance(value, set):
+                _set_path(new, segments, (current if current is not _MISSING else set()) | value)
+            else:
+                _set_path(new, segments, (current if current is not _MISSING else 0) + value)
+        else:
+            current = _get_path(new, segments)
+            if current is not _MISSING:
+                remaining = current - value
+                if remaining:
+                    _set_path(new, segments, remaining)
+                else:
+                    _remove_path(new, segments)
+    return new
+
+
+def _copy(value: Any) -> Any:
+    # Items are small trees of dict/list/set/scalars; cheaper than copy.deepcopy
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def _project(item: dict[str, Any], params: dict[str, Any]) -> dict[str, Any]:
+    expression = params.get("ProjectionExpression")
+    if not expression:
+        return item
+    names = params.get("ExpressionAttributeNames") or {}
+    ctx = _Context(names, {})
+    out: dict[str, Any] = {}
+    for path in _parse_projection(expression):
+        segments = ctx.segments(path)
+        value = _get_path(item, segments)
+        if value is not _MISSING:
+            # Only top-level projections are needed by dal; nested ones keep the whole top-level attribute
+            out[str(segments[0])] = item[str(segments[0])] if len(segments) > 1 else value
+    return out
+
+
+# --- Tables ------------------------------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    key: tuple[str, ...]  # (hash,) or (hash, range)
+    indexes: dict[str, tuple[str, str]] = field(default_factory=dict)  # name -> (hash, range)
+    ttl_attribute: str | None = None
+    stream: bool = False
+
+
+def _sortable(value: Any) -> Any:
+    # Numbers of mixed int/Decimal types sort together
+    return Decimal(value) if isinstance(value, int) and not isinstance(value, bool) else value
+
+
+class _Index:
+    """Hash value -> sorted list of (range value, table key); items lacking either attribute are left out."""
+
+    def __init__(self, hash_attr: str, range_attr: str):
+        self.hash_attr = hash_attr
+        self.range_attr = range_attr
+        self.partitions: dict[Any, list[tuple[Any, tuple]]] = {}
+
+    def entry(self, item: dict[str, Any], key: tuple) -> tuple[Any, tuple[Any, tuple]] | None:
+        if self.hash_attr not in item or self.range_attr not in item:
+            return None
+        return item[self.hash_attr], (_sortable(item[self.range_attr]), key)
+
+    def add(self, item: dict[str, Any], key: tuple) -> None:
+        entry = self.entry(item, key)
+        if entry is not None:
+            bisect.insort(self.partitions.setdefault(entry[0], []), entry[1])
+
+    def remove(self, item: dict[str, Any], key: tuple) -> None:
+        entry = self.entry(item, key)
+        if entry is None:
+            return
+        partition = self.partitions.get(entry[0], [])
+        pos = bisect.bisect_left(partition, entry[1])
+        if pos < len(partition) and partition[pos] == entry[1]:
+            del partition[pos]
+        if not partition:
+            self.partitions.pop(entry[0], None)
+
+
+class MemoryTable:
+    def __init__(self, name: str, schema: TableSchema, change_retention: int = CHANGE_RETENTION):
+        self.name = name
+        self.schema = schema
+        self.items: dict[tuple, dict[str, Any]] = {}
+        self.indexes = {index: _Index(*attrs) for index, attrs in schema.indexes.items()}
+        if len(schema.key) == 2:  # noqa: PLR2004
+            self.indexes[""] = _Index(*schema.key)
+        self.changes: deque[dict[str, Any]] = deque(maxlen=change_retention)
+        self._sequence = 0
+
+    def key_of(self, item: dict[str, Any]) -> tuple:
+        try:
+            return tuple(item[name] for name in self.schema.key)
+        except KeyError as exc:
+            raise _error("ValidationException", "Key", f"Missing key attribute {exc.args[0]}") from exc
+
+    def key_dict(self, key: tuple) -> dict[str, Any]:
+        return dict(zip(self.schema.key, key, strict=True))
+
+    def write(self, key: tuple, new: dict[str, Any] | None, user_identity: dict[str, str] | None = None) -> None:
+        old = self.items.get(key)
+        if old is not None:
+            for index in self.indexes.values():
+                index.remove(old, key)
+        if new is None:
+            self.items.pop(key, None)
+        else:
+            self.items[key] = new
+            for index in self.indexes.values():
+                index.add(new, key)
+        if self.schema.stream and (old is not None or new is not None):
+            self._record(key, old, new, user_identity)
+
+    def changes_after(self, after: str | None, limit: int | None) -> list[dict[str, Any]]:
+        # Sequence numbers are consecutive, so the oldest retained one is the index into the feed
+        first = self._sequence - len(self.changes) + 1
+        start = 0 if after is None else min(max(int(after) - first + 1, 0), len(self.changes))
+        return list(itertools.islice(self.changes, start, None if limit is None else start + limit))
+
+    def _record(
+        self, key: tuple, old: dict[str, Any] | None, new: dict[str, Any] | None, user_identity: dict[str, str] | None
+    ) -> None:
+        self._sequence += 1
+        sequence = f"{self._sequence:021d}"
+        ddb: dict[str, Any] = {
+            "Keys": serialize(self.key_dict(key)),
+            "SequenceNumber": sequence,
+            "StreamViewType": "NEW_AND_OLD_IMAGES",
+        }
+        if new is not None:
+            ddb["NewImage"] = serialize(new)
+        if old is not None:
+            ddb["OldImage"] = serialize(old)
+        record: dict[str, Any] = {
+            "eventID": sequence,
+            "eventName": "REMOVE" if new is None else "INSERT" if old is None else "MODIFY",
+            "eventSource": "aws:dynamodb",
+            "dynamodb": ddb,
+        }
+        if user_identity is not None:
+            record["userIdentity"] = user_identity
+        self.changes.append(record)
+
+
+# --- Engine ------------------------------------------------------------------------------------------------------
+
+
+class MemoryDynamoDB:
+    """Thread-safe in-memory tables behind DynamoDB low-level client calls."""
+
+    def __init__(
+        self,
+        schemas: dict[str, TableSchema],
+        clock: Callable[[], float] = time.time,
+        ttl_sweep_interval: float | None = 1.0,
+        change_retention: int = CHANGE_RETENTION,
+    ):
+        self.tables = {name: MemoryTable(name, schema, change_retention) for name, schema in schemas.items()}
+        self._lock = threading.RLock()
+        self._clock = clock
+        self._ttl_sweep_interval = ttl_sweep_interval
+        self._next_sweep = 0.0
+
+    def _table(self, name: str) -> MemoryTable:
+        table = self.tables.get(name)
+        if table is None:
+            raise _error("ResourceNotFoundException", "DescribeTable", f"Requested resource not found: {name}")
+        return table
+
+    def _maybe_expire(self) -> None:
+        # Sweeps at most once per interval; None leaves expiry to explicit expire_items() calls
+        if self._ttl_sweep_interval is None:
+            return
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self._ttl_sweep_interval
+            self.expire_items(now)
+
+    def expire_items(self, now: float | None = None) -> int:
+        """Delete items whose TTL attribute is in the past, the way DynamoDB's TTL process would."""
+        now = self._clock() if now is None else now
+        expired = 0
+        with self._lock:
+            for table in self.tables.values():
+                attr = table.schema.ttl_attribute
+                if attr is None:
+                    continue
+                for key, item in list(table.items.items()):
+                    ttl = item.get(attr)
+                    if isinstance(ttl, int | Decimal) and not isinstance(ttl, bool) and ttl <= now:
+                        table.write(key, None, TTL_USER_IDENTITY)
+                        expired += 1
+        return expired
+
+    def read_changes(self, table_name: str, after: str | None = None, limit: int | None = None) -> list[dict[str, Any]]:
+        """Stream records newer than sequence number ``after``, oldest first; feed them to the stream Lambda.
+
+        Only the last ``change_retention`` records per table are kept, so a reader that falls further behind
+        than that misses the ones in between, as with a stream trimmed past its retention period.
+        """
+        with self._lock:
+            return [_copy(r) for r in self._table(table_name).changes_after(after, limit)]
+
+    # -- single-item operations
+
+    def _check(self, table: MemoryTable, key: tuple, params: dict[str, Any], operation: str) -> dict[str, Any] | None:
+        current = table.items.get(key)
+        condition = params.get("ConditionExpression")
+        if condition and not _evaluate(_parse_condition(condition), current, _context(params)):
+            extra = {}
+            if current is not None and params.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD":
+                extra["Item"] = serialize(current)
+            raise _error("ConditionalCheckFailedException", operation, "The conditional request failed", **extra)
+        return current
+
+    def put_item(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            table = self._table(params["TableName"])
+            item = deserialize(params["Item"])
+            key = table.key_of(item)
+            old = self._check(table, key, params, "PutItem")
+            table.write(key, item)
+            return {"Attributes": serialize(old)} if old is not None and params.get("ReturnValues") == "ALL_OLD" else {}
+
+    def get_item(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            table = self._table(params["TableName"])
+            item = table.items.get(table.key_of(deserialize(params["Key"])))
+            return {"Item": serialize(_project(item, params))} if item is not None else {}
+
+    def update_item(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            table = self._table(params["TableName"])
+            key_item = deserialize(params["Key"])
+            key = table.key_of(key_item)
+            old = self._check(table, key, params, "UpdateItem")
+            base = old if old is not None else key_item
+            new = _apply_update(base, params.get("UpdateExpression", ""), _context(params))
+            if table.key_of(new) != key:
+                raise _error("ValidationException", "UpdateItem", "Cannot update attribute that is part of the key")
+            table.write(key, new)
+            return_values = params.get("ReturnValues", "NONE")
+            if return_values == "ALL_NEW":
+                return {"Attributes": serialize(new)}
+            if return_values == "ALL_OLD":
+                return {"Attributes": serialize(old)} if old is not None else {}
+            if return_values in ("UPDATED_NEW", "UPDATED_OLD"):
+                source = new if return_values == "UPDATED_NEW" else (old or {})
+                changed = {k: v for k, v in source.items() if (old or {}).get(k, _MISSING) != new.get(k, _MISSING)}
+                return {"Attributes": serialize(changed)}
+            return {}
+
+    def delete_item(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            table = self._table(params["TableName"])
+            key = table.key_of(deserialize(params["Key"]))
+            old = self._check(table, key, params, "DeleteItem")
+            if old is not None:
+                table.write(key, None)
+            return {"Attributes": serialize(old)} if old is not None and params.get("ReturnValues") == "ALL_OLD" else {}
+
+    # -- reads over many items
+
+    def _key_range(self, index: _Index, params: dict[str, Any]) -> tuple[Any, Callable[[Any], bool]]:
+        """Split the key condition into the hash value and a predicate on the range value."""
+        ctx = _context(params)
+        node = _parse_condition(params["KeyConditionExpression"])
+        parts = [node[1], node[2]] if node[0] == "and" else [node]
+        hash_value: Any = _MISSING
+        range_node: tuple | None = None
+        for part in parts:
+            # ("cmp", op, path, value) / ("between", path, lo, hi) / ("func", "begins_with", [path, value])
+            target = part[2] if part[0] == "cmp" else part[1] if part[0] == "between" else part[2][0]
+            attr = ctx.segments(target)[0]
+            if attr == index.hash_attr and part[0] == "cmp" and part[1] == "=":
+                hash_value = _operand(part[3], {}, ctx)
+            elif attr == index.range_attr:
+                range_node = part
+            else:
+                raise _error("ValidationException", "Query", "Query key condition not supported")
+        if hash_value is _MISSING:
+            raise _error("ValidationException", "Query", "Query condition missed key schema element")
+
+        def matches(range_value: Any) -> bool:
+            return range_node is None or _evaluate(range_node, {index.range_attr: range_value}, ctx)
+
+        return hash_value, matches
+
+    def query(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            table = self._table(params["TableName"])
+            index_name = params.get("IndexName") or ""
+            index = table.indexes.get(index_name)
+            if index is None:
+                raise _error("ValidationException", "Query", f"Query needs a range key; no index {index_name!r}")
+            hash_value, matches = self._key_range(index, params)
+            entries = index.partitions.get(hash_value, [])
+            forward = params.get("ScanIndexForward", True)
+            start = params.get("ExclusiveStartKey")
+            if start is not None:
+                start_item = deserialize(start)
+                marker = (_sortable(start_item[index.range_attr]), table.key_of(start_item))
+                entries = (
+                    entries[bisect.bisect_right(entries, marker) :]
+                    if forward
+                    else entries[: bisect.bisect_left(entries, marker)]
+                )
+            ordered: Iterator[tuple[Any, tuple]] = iter(entries) if forward else reversed(entries)
+            return self._page(table, index, ordered, matches, params)
+
+    def scan(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            table = self._table(params["TableName"])
+            keys = sorted(table.items, key=lambda k: tuple(_sortable(v) for v in k))
+            start = params.get("ExclusiveStartKey")
+            if start is not None:
+                marker = tuple(_sortable(v) for v in table.key_of(deserialize(start)))
+                keys = [k for k in keys if tuple(_sortable(v) for v in k) > marker]
+            entries = iter([(None, k) for k in keys])
+            return self._page(table, None, entries, lambda _: True, params)
+
+    def _page(
+        self,
+        table: MemoryTable,
+        index: _Index | None,
+        entries: Iterator[tuple[Any, tuple]],
+        matches: Callable[[Any], bool],
+        params: dict[str, Any],
+    ) -> dict[str, Any]:
+        limit = params.get("Limit")
+        condition = params.get("FilterExpression")
+        node = _parse_condition(condition) if condition else None
+        ctx = _context(params)
+        items: list[dict[str, Any]] = []
+        evaluated = 0
+        last_key: dict[str, Any] | None = None
+        for range_value, key in entries:
+            if index is not None and not matches(range_value):
+                continue
+            item = table.items[key]
+            evaluated += 1
+            # Limit counts items read, before the filter, as in DynamoDB
+            if node is None or _evaluate(node, item, ctx):
+                items.append(_project(item, params))
+            if limit is not None and evaluated >= limit:
+                last = table.key_dict(key)
+                if index is not None:
+                    last[index.hash_attr] = item[index.hash_attr]
+                    last[index.range_attr] = item[index.range_attr]
+                last_key = last
+                break
+        out: dict[str, Any] = {"Items": [serialize(it) for it in items], "Count": len(items), "ScannedCount": evaluated}
+        if last_key is not None:
+            out["LastEvaluatedKey"] = serialize(last_key)
+        return out
+
+    # -- batches and transactions
+
+    def batch_get_item(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            responses: dict[str, list[dict[str, Any]]] = {}
+            for name, request in params["RequestItems"].items():
+                table = self._table(name)
+                found = (table.items.get(table.key_of(deserialize(key))) for key in request["Keys"])
+                responses[name] = [serialize(_project(item, request)) for item in found if item is not None]
+            return {"Responses": responses, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            for name, requests in params["RequestItems"].items():
+                table = self._table(name)
+                for request in requests:
+                    if "PutRequest" in request:
+                        item = deserialize(request["PutRequest"]["Item"])
+                        table.write(table.key_of(item), item)
+                    else:
+                        key = table.key_of(deserialize(request["DeleteRequest"]["Key"]))
+                        if key in table.items:
+                            table.write(key, None)
+            return {"UnprocessedItems": {}}
+
+    def transact_write_items(self, **params: Any) -> dict[str, Any]:
+        with self._lock:
+            self._maybe_expire()
+            reasons: list[dict[str, Any]] = []
+            staged: list[tuple[str, dict[str, Any]]] = []
+            for action in params["TransactItems"]:
+                [(op, op_params)] = action.items()
+                table = self._table(op_params["TableName"])
+                key = table.key_of(deserialize(op_params.get("Item") or op_params["Key"]))
+                try:
+                    self._check(table, key, op_params, op)
+                    reasons.append({"Code": "None"})
+                except ClientError as exc:
+                    reason: dict[str, Any] = {
+                        "Code": "ConditionalCheckFailed",
+                        "Message": "The conditional request failed",
+                    }
+                    if "Item" in exc.response:
+                        reason["Item"] = exc.response["Item"]  # type: ignore[typeddict-item]
+                    reasons.append(reason)
+                staged.append((op, op_params))
+            if any(reason["Code"] != "None" for reason in reasons):
+                raise _error(
+                    "TransactionCanceledException",
+                    "TransactWriteItems",
+                    "Transaction cancelled, please refer cancellation reasons for specific reasons",
+                    CancellationReasons=reasons,
+                )
+            for op, op_params in staged:
+                # Conditions were all checked against the pre-transaction state above
+                unconditional = {k: v for k, v in op_params.items() if k != "ConditionExpression"}
+                if op == "Put":
+                    self.put_item(**unconditional)
+                elif op == "Update":
+                    self.update_item(**unconditional)
+                elif op == "Delete":
+                    self.delete_item(**unconditional)
+            return {}
+
+
+_shared: dict[tuple[str, ...], MemoryDynamoDB] = {}
+_shared_lock = threading.Lock()
+
+
+def shared(schemas: dict[str, TableSchema]) -> MemoryDynamoDB:
+    """One engine per process and set of tables, so everything selecting the memory backend sees the same data."""
+    key = tuple(sorted(schemas))
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = MemoryDynamoDB(schemas)
+        return _shared[key]
+
+
+class LatencyProxy:
+    """Wraps a client, sleeping ``latency`` seconds per call and counting the calls into ``calls``.
+
+    Calls are counted by operation name, or all under ``count_as`` when given (a service name, say).
+    """
+
+    def __init__(self, target: Any, latency: float, calls: Counter[str], count_as: str | None = None) -> None:
+        self._target = target
+        self._latency = latency
+        self._calls = calls
+        self._count_as = count_as
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            self._calls[self._count_as or name] += 1
+            time.sleep(self._latency)
+            return attr(*args, **kwargs)
+
+        return call
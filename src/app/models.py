@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import UTC, datetime
 from typing import Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+BookingStatus = Literal["active", "cancelled"]
+END_BEFORE_START = "end_time must be after start_time"
+
+
+def _ends_before_start(start_time: datetime, end_time: datetime) -> bool:
+    # Naive times are UTC, as app.dal stores them
+    start, end = (dt if dt.tzinfo is not None else dt.replace(tzinfo=UTC) for dt in (start_time, end_time))
+    return end <= start
 
 
 class BookingCreate(BaseModel):
@@ -14,6 +23,12 @@ class BookingCreate(BaseModel):
     # seconds before start_time to send reminder; we convert to TTL at creation
     reminder_lead_seconds: int | None = Field(default=900, ge=60)
 
+    @model_validator(mode="after")
+    def _ends_after_start(self) -> BookingCreate:
+        if _ends_before_start(self.start_time, self.end_time):
+            raise ValueError(END_BEFORE_START)
+        return self
+
 
 class BookingUpdate(BaseModel):
     resource_id: str | None = None
@@ -21,6 +36,17 @@ class BookingUpdate(BaseModel):
     end_time: datetime | None = None
     reminder_lead_seconds: int | None = Field(default=None, ge=60)
 
+    @model_validator(mode="after")
+    def _ends_after_start(self) -> BookingUpdate:
+        # With only one of them given, app.dal checks against the booking's other one
+        if (
+            self.start_time is not None
+            and self.end_time is not None
+            and _ends_before_start(self.start_time, self.end_time)
+        ):
+            raise ValueError(END_BEFORE_START)
+        return self
+
 
 class Booking(BaseModel):
     booking_id: str
@@ -29,4 +55,89 @@ class Booking(BaseModel):
     start_time: datetime
     end_time: datetime
     ttl: int | None = None  # epoch seconds when reminder should trigger
-    status: Literal["active", "cancelled"] = "active"
+    reminder_lead_seconds: int | None = None
+    status: BookingStatus = "active"
+    series_id: str | None = None  # set on occurrences of a recurring series
+    version: int = 0  # bumped by every write; the ETag, and what If-Match compares against
+
+
+class BookingBatchCreate(BaseModel):
+    bookings: list[BookingCreate] = Field(..., min_length=1, max_length=100)
+
+
+class UpcomingBooking(BaseModel):
+    booking_id: str
+    start_time: datetime
+
+
+class BookingSummary(BaseModel):
+    user_id: str
+    active: int  # stored active bookings, past and archived ones included
+    cancelled: int
+    upcoming: list[UpcomingBooking]  # next active bookings by start_time
+
+
+class BookingBatchError(BaseModel):
+    index: int  # position in the request's ``bookings`` list
+    detail: str
+
+
+class BookingBatchCreateResult(BaseModel):
+    created: list[Booking]
+    errors: list[BookingBatchError]
+
+
+class BookingBatchGet(BaseModel):
+    booking_ids: list[str] = Field(..., min_length=1, max_length=500)
+
+
+class BookingBatchGetResult(BaseModel):
+    bookings: list[Booking]
+    not_found: list[str]
+
+
+class Recurrence(BaseModel):
+    freq: Literal["daily", "weekly"]
+    interval: int = Field(default=1, ge=1, le=52)
+    count: int | None = Field(default=None, ge=1)
+    until: datetime | None = None  # last occurrence starts on or before this
+
+    @model_validator(mode="after")
+    def _count_or_until(self) -> Recurrence:
+        if (self.count is None) == (self.until is None):
+            raise ValueError("exactly one of count or until is required")
+        return self
+
+
+class BookingSeriesCreate(BookingCreate):
+    # start_time/end_time describe the first occurrence
+    recurrence: Recurrence
+    # Occurrences are generated when listed, so there is no item to carry a reminder's TTL or schedule entry
+    reminder_lead_seconds: int | None = Field(default=None, ge=60)
+
+    @model_validator(mode="after")
+    def _no_reminder(self) -> BookingSeriesCreate:
+        if self.reminder_lead_seconds is not None:
+            raise ValueError("reminder_lead_seconds is not supported for series yet")
+        return self
+
+
+class BookingSeries(BaseModel):
+    series_id: str
+    user_id: str
+    resource_id: str
+    start_time: datetime
+    end_time: datetime
+    recurrence: Recurrence
+    reminder_lead_seconds: int | None = None
+    exceptions: list[datetime] = []  # occurrence starts that were edited, cancelled or deleted
+
+
+class FreeSlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+
+
+class Availability(BaseModel):
+    resource_id: str
+    free: list[FreeSlot]
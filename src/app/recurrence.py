@@ -0,0 +1,71 @@
+"""Recurring booking rules and their lazy expansion into occurrences.
+
+A series is stored once as a normalized rule (first start, duration, period, last start, skipped starts, all in
+epoch seconds) and occurrences are generated on demand for the window being looked at, never written out.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import TypedDict
+
+_PERIOD_SECONDS = {"daily": 24 * 60 * 60, "weekly": 7 * 24 * 60 * 60}
+
+MAX_OCCURRENCES = 366
+
+
+class SeriesRule(TypedDict):
+    series_start: int
+    duration: int
+    period: int
+    last: int  # start of the final occurrence
+    exceptions: list[int]  # occurrence starts no longer generated (materialized or deleted)
+
+
+def build_rule(  # noqa: PLR0913, PLR0917
+    start: int, end: int, freq: str, interval: int, count: int | None, until: int | None
+) -> SeriesRule:
+    period = _PERIOD_SECONDS[freq] * interval
+    duration = end - start
+    if duration <= 0:
+        raise ValueError("Series occurrences must end after they start")
+    if duration > period:
+        raise ValueError("Series occurrences may not overlap each other")
+    if count is not None:
+        occurrences = count
+    elif until is not None:
+        if until < start:
+            raise ValueError("Series must not end before its first occurrence")
+        occurrences = (until - start) // period + 1
+    else:
+        raise ValueError("Series needs either count or until")
+    if occurrences > MAX_OCCURRENCES:
+        raise ValueError(f"Series may not have more than {MAX_OCCURRENCES} occurrences")
+    return {
+        "series_start": start,
+        "duration": duration,
+        "period": period,
+        "last": start + (occurrences - 1) * period,
+        "exceptions": [],
+    }
+
+
+def occurrences(rule: SeriesRule, lo: int | None = None, hi: int | None = None) -> Iterator[int]:
+    """Occurrence starts ``s`` with ``lo <= s <= hi``, in order, skipping exceptions."""
+    first, period = int(rule["series_start"]), int(rule["period"])
+    last = int(rule["last"]) if hi is None else min(int(rule["last"]), hi)
+    # Jump straight to the first occurrence in the window instead of walking from the series start
+    k = 0 if lo is None or lo <= first else -((first - lo) // period)
+    skipped = {int(s) for s in rule["exceptions"]}
+    for start in range(first + k * period, last + 1, period):
+        if start not in skipped:
+            yield start
+
+
+def is_occurrence(rule: SeriesRule, start: int) -> bool:
+    return next(occurrences(rule, start, start), None) == start
+
+
+def overlapping(rule: SeriesRule, start: int, end: int) -> Iterator[int]:
+    """Starts of the occurrences that intersect [start, end)."""
+    return occurrences(rule, start - int(rule["duration"]) + 1, end - 1)
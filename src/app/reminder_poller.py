@@ -0,0 +1,207 @@
+"""Scheduled Lambda that sends the reminders filed in the reminder-schedule table (``REMINDER_DELIVERY=schedule``).
+
+Each run reads only the buckets of the minutes it has not drained yet, plus a short overlap for late writes
+(see ``app.reminders`` for the layout), one query per shard run in parallel. Before emitting ReminderDue it
+checks every reminder against its booking in one BatchGetItem per 100: reminders of deleted or cancelled
+bookings, and ones whose time has since changed, are dropped. Sent and dropped items are deleted, so rescans
+are harmless; items whose event was rejected stay and hold the cursor back, so the next run retries them.
+Delivery is at least once, as with the stream path.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from functools import cache
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.utilities.typing import LambdaContext
+
+# Same rule as the stream processor: no app.api/app.dal at import time
+from app import aws, instrumentation, reminders
+from app.stream_processor import PendingEntry, _chunk_entries, _put_chunk, reminder_entry
+from app.telemetry import get_metrics, get_tracer
+
+if TYPE_CHECKING:
+    # Only for static type checking; not imported at runtime
+    from aws_lambda_powertools import Metrics
+    from mypy_boto3_dynamodb.client import DynamoDBClient
+else:
+    # Fallbacks to satisfy annotations at runtime
+    DynamoDBClient = Any  # type: ignore[assignment]
+
+logger = Logger()
+tracer = get_tracer()
+
+_TABLE_NAME = os.environ.get("TABLE_NAME", "bookings")
+# Finished minutes rescanned on every run, for reminders written just as their minute was being drained
+_OVERLAP_MINUTES = int(os.environ.get("REMINDER_POLL_OVERLAP_MINUTES", "2"))
+# After an outage, catch up at most this many minutes per run
+_MAX_MINUTES_PER_RUN = int(os.environ.get("REMINDER_POLL_MAX_MINUTES", "60"))
+_QUERY_WORKERS = 8
+_CURSOR_KEY = {"bucket": "poller", "booking_id": "cursor"}
+
+_BATCH_GET_SIZE = 100
+_BATCH_WRITE_SIZE = 25
+_MAX_BATCH_ATTEMPTS = 5
+
+# Created on first use; tests swap in a fake by assigning it (and a fake clock to _clock)
+_client: DynamoDBClient | None = None
+_clock: Callable[[], float] = time.time
+
+
+class DrainResult(NamedTuple):
+    sent: int
+    dropped: int  # stale: booking gone, cancelled or rescheduled
+    failed: int  # rejected by EventBridge; retried next run
+    drained_through: int  # last minute (epoch minutes) with nothing left to send
+
+
+def _ddb() -> DynamoDBClient:
+    global _client  # noqa: PLW0603
+    if _client is None:
+        if os.environ.get("STORAGE_BACKEND", "dynamodb") == "memory":
+            # Local runs only: share the API's in-process tables
+            from app import dal  # noqa: PLC0415
+
+            _client = dal._ddb()
+        else:
+            _client = instrumentation.instrument(cast(DynamoDBClient, aws.client("dynamodb")), "dynamodb")
+    return _client
+
+
+@cache
+def _metrics() -> Metrics:
+    # Only with ROUTE_METRICS on; the powertools metrics package is not loaded otherwise
+    return get_metrics(namespace="BookingAPI")
+
+
+def _read_cursor() -> int | None:
+    resp = _ddb().get_item(TableName=reminders.TABLE_NAME, Key=aws.serialize(_CURSOR_KEY), ConsistentRead=True)
+    item = resp.get("Item")
+    return int(aws.deserialize(item)["minute"]) if item else None
+
+
+def _write_cursor(minute: int) -> None:
+    _ddb().put_item(TableName=reminders.TABLE_NAME, Item=aws.serialize({**_CURSOR_KEY, "minute": minute}))
+
+
+def _query_bucket(bucket: str) -> list[dict[str, Any]]:
+    params: dict[str, Any] = {
+        "TableName": reminders.TABLE_NAME,
+        "KeyConditionExpression": "#b = :b",
+        "ExpressionAttributeNames": {"#b": "bucket"},
+        "ExpressionAttributeValues": aws.serialize({":b": bucket}),
+    }
+    items: list[dict[str, Any]] = []
+    while True:
+        resp = cast(dict[str, Any], _ddb().query(**params))
+        items.extend(aws.deserialize(raw) for raw in resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return items
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+
+
+def _filed(first: int, last: int) -> list[tuple[int, dict[str, Any]]]:
+    """(minute, item) for every reminder filed in minutes ``first``..``last``."""
+    buckets = [(m, reminders.bucket(m, s)) for m in range(first, last + 1) for s in range(reminders.SHARDS)]
+    with ThreadPoolExecutor(max_workers=_QUERY_WORKERS) as pool:
+        # Each query runs in a copy of this context, so its calls count towards this invocation's metrics
+        futures = [pool.submit(copy_context().run, _query_bucket, bucket) for _, bucket in buckets]
+        return [(m, item) for (m, _), future in zip(buckets, futures, strict=True) for item in future.result()]
+
+
+def _bookings(booking_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """status and ttl of the given bookings that still exist."""
+    found: dict[str, dict[str, Any]] = {}
+    pending = [aws.serialize({"booking_id": bid}) for bid in dict.fromkeys(booking_ids)]
+    for attempt in range(_MAX_BATCH_ATTEMPTS):
+        if not pending:
+            return found
+        if attempt:
+            time.sleep(0.05 * 2 ** (attempt - 1))
+        unprocessed: list[dict[str, Any]] = []
+        for start in range(0, len(pending), _BATCH_GET_SIZE):
+            request: Any = {
+                "Keys": pending[start : start + _BATCH_GET_SIZE],
+                "ProjectionExpression": "booking_id, #s, #t",
+                "ExpressionAttributeNames": {"#s": "status", "#t": "ttl"},
+            }
+            resp = cast(dict[str, Any], _ddb().batch_get_item(RequestItems={_TABLE_NAME: request}))
+            for raw in resp.get("Responses", {}).get(_TABLE_NAME, []):
+                booking = aws.deserialize(raw)
+                found[booking["booking_id"]] = booking
+            unprocessed.extend(resp.get("UnprocessedKeys", {}).get(_TABLE_NAME, {}).get("Keys", []))
+        pending = unprocessed
+    raise RuntimeError(f"BatchGetItem left {len(pending)} bookings unprocessed")
+
+
+def _delete(items: list[dict[str, Any]]) -> None:
+    pending: list[Any] = [
+        {"DeleteRequest": {"Key": aws.serialize({"bucket": it["bucket"], "booking_id": it["booking_id"]})}}
+        for it in items
+    ]
+    for attempt in range(_MAX_BATCH_ATTEMPTS):
+        if not pending:
+            return
+        if attempt:
+            time.sleep(0.05 * 2 ** (attempt - 1))
+        unprocessed: list[Any] = []
+        for start in range(0, len(pending), _BATCH_WRITE_SIZE):
+            chunk = pending[start : start + _BATCH_WRITE_SIZE]
+            resp = cast(dict[str, Any], _ddb().batch_write_item(RequestItems={reminders.TABLE_NAME: chunk}))
+            unprocessed.extend(resp.get("UnprocessedItems", {}).get(reminders.TABLE_NAME, []))
+        pending = unprocessed
+    # Harmless: sent ones may be sent again if rescanned, dropped ones are checked again
+    logger.warning("Reminder items left undeleted", extra={"count": len(pending)})
+
+
+def _is_current(item: dict[str, Any], booking: dict[str, Any] | None) -> bool:
+    return (
+        booking is not None
+        and booking.get("status", "active") == "active"
+        and booking.get("ttl") is not None
+        and int(booking["ttl"]) == int(item["due"])
+    )
+
+
+def drain(now: float) -> DrainResult:
+    """Send every reminder due at ``now`` that has not been sent yet."""
+    current = reminders.minute(now)
+    cursor = _read_cursor()
+    first = (cursor + 1 if cursor is not None else current) - _OVERLAP_MINUTES
+    last = min(current, first + _MAX_MINUTES_PER_RUN - 1)
+
+    due = [(m, item) for m, item in _filed(first, last) if int(item["due"]) <= now]
+    bookings = _bookings([item["booking_id"] for _, item in due])
+    sending = {item["booking_id"]: (m, item) for m, item in due if _is_current(item, bookings.get(item["booking_id"]))}
+    stale = [item for _, item in due if item["booking_id"] not in sending or sending[item["booking_id"]][1] is not item]
+
+    pending: list[PendingEntry] = [
+        (bid, reminder_entry(bid, item["user_id"], int(item["due"]))) for bid, (_, item) in sending.items()
+    ]
+    failed = {bid for chunk in _chunk_entries(pending) for bid, _ in _put_chunk(chunk) if bid is not None}
+    _delete([item for bid, (_, item) in sending.items() if bid not in failed] + stale)
+
+    # The current minute can still receive reminders; a failed one keeps its minute open for the next run
+    drained_through = min([current - 1, last] + [sending[bid][0] - 1 for bid in failed])
+    if cursor is None or drained_through > cursor:
+        _write_cursor(drained_through)
+    result = DrainResult(len(sending) - len(failed), len(stale), len(failed), drained_through)
+    if failed:
+        logger.error("Reminder events not delivered", extra={"failed": len(failed)})
+    logger.info("Drained reminder schedule", extra=result._asdict())
+    return result
+
+
+@tracer.capture_lambda_handler
+def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
+    # Triggered every minute by an EventBridge schedule
+    if instrumentation.ENABLED:
+        with instrumentation.invocation(_metrics(), "ReminderPoller"):
+            return drain(_clock())._asdict()
+    return drain(_clock())._asdict()
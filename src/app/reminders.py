@@ -0,0 +1,54 @@
+"""Reminder-schedule table layout, shared by the writers in ``app.dal`` and ``app.reminder_poller``.
+
+With ``REMINDER_DELIVERY=schedule`` every booking with a reminder also has an item in this table, filed under
+the minute it is due plus a shard suffix (``2030-01-01T11:45#3``, sort key ``booking_id``), so the poller
+finds the reminders due in a minute with one query per shard, whatever the total volume. Shards spread a busy
+minute over several partitions. Items are never updated: a changed reminder gets a new item and the poller
+drops the stale one after checking the booking.
+"""
+
+from __future__ import annotations
+
+import os
+import zlib
+from datetime import UTC, datetime
+from typing import Any
+
+# "ttl": reminders fire when DynamoDB's TTL deletes the booking (the stream processor emits them);
+# "schedule": bookings keep their reminder time but not a TTL, and the poller fires reminders from this table
+DELIVERY = os.environ.get("REMINDER_DELIVERY", "ttl")
+SCHEDULED = DELIVERY == "schedule"
+
+TABLE_NAME = os.environ.get("REMINDER_TABLE_NAME", "booking-reminders")
+# Writers and the poller must agree on this; raising it later leaves the new shards empty for old minutes,
+# which the poller reads anyway
+SHARDS = int(os.environ.get("REMINDER_SHARDS", "10"))
+# Left-over items (dropped or never drained) expire this long after they were due
+RETENTION_SECONDS = 7 * 86400
+
+
+def minute(epoch: float) -> int:
+    return int(epoch) // 60
+
+
+def shard(booking_id: str) -> int:
+    return zlib.crc32(booking_id.encode()) % SHARDS
+
+
+def bucket(due_minute: int, shard_number: int) -> str:
+    return f"{datetime.fromtimestamp(due_minute * 60, UTC):%Y-%m-%dT%H:%M}#{shard_number}"
+
+
+def item(booking_id: str, user_id: str, due: int, now: float) -> dict[str, Any]:
+    """The schedule item for a reminder due at epoch ``due``, written at ``now``.
+
+    A reminder that is already due is filed under the current minute, which the poller has not finished yet.
+    """
+    filed = max(minute(due), minute(now))
+    return {
+        "bucket": bucket(filed, shard(booking_id)),
+        "booking_id": booking_id,
+        "user_id": user_id,
+        "due": due,
+        "ttl": filed * 60 + RETENTION_SECONDS,
+    }
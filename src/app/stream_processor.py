@@ -1,52 +1,206 @@
 from __future__ import annotations
 
 import json
-from typing import Any
+import os
+import time
+from collections.abc import Callable, Iterator
+from functools import cache
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
 
-import boto3
-from aws_lambda_powertools import Logger, Tracer
+from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Keep this module free of app.api/app.dal imports: the stream Lambda must not load FastAPI or pydantic
+from app import aws, instrumentation, reminders, user_summary
+from app.telemetry import get_metrics, get_tracer
+
+if TYPE_CHECKING:
+    # Only for static type checking; not imported at runtime
+    from aws_lambda_powertools import Metrics
+    from mypy_boto3_dynamodb.client import DynamoDBClient
+    from mypy_boto3_events.client import EventBridgeClient
+    from mypy_boto3_events.type_defs import PutEventsRequestEntryTypeDef
+else:
+    # Fallbacks to satisfy annotations at runtime
+    DynamoDBClient = Any  # type: ignore[assignment]
+    EventBridgeClient = Any  # type: ignore[assignment]
+    PutEventsRequestEntryTypeDef = dict  # type: ignore[assignment,misc]
 
 logger = Logger()
-tracer = Tracer()
+tracer = get_tracer()
 
-_events = boto3.client("events")
+# Created on first use; tests swap in fakes by assigning them (and a fake clock to _clock)
+_events: EventBridgeClient | None = None
+_dynamodb: DynamoDBClient | None = None
+_clock: Callable[[], float] = time.time
 
+# PutEvents service limits
+_MAX_ENTRIES_PER_PUT = 10
+_MAX_PUT_BYTES = 256 * 1024
 
-@tracer.capture_lambda_handler
-def lambda_handler(event: dict[str, Any], context: LambdaContext) -> None:
-    # Triggered by DynamoDB stream when TTL expires -> record is removed
-    for record in event.get("Records", []):
-        if record.get("eventName") != "REMOVE":
+_MAX_PUT_ATTEMPTS = 3
+_RETRY_BASE_DELAY_SECONDS = 0.1
+
+# userIdentity.principalId of removals made by DynamoDB's TTL process; deletes through the API carry no identity
+_TTL_PRINCIPAL = "dynamodb.amazonaws.com"
+
+# (stream sequence number, EventBridge entry); the sequence number is what we report back on failure
+PendingEntry = tuple[str | None, PutEventsRequestEntryTypeDef]
+
+
+class ReminderRecord(NamedTuple):
+    """The parts of a TTL removal a reminder needs, decoded from its old image."""
+
+    sequence_number: str | None
+    booking_id: str
+    user_id: str
+    ttl: int
+
+
+def _is_ttl_removal(record: dict[str, Any]) -> bool:
+    if record.get("eventName") != "REMOVE":
+        return False
+    identity = record.get("userIdentity")
+    return identity is not None and identity.get("principalId") == _TTL_PRINCIPAL and identity.get("type") == "Service"
+
+
+def decode_reminders(records: list[dict[str, Any]]) -> list[ReminderRecord]:
+    """The TTL removals of bookings with a reminder, in stream order.
+
+    Records are filtered on their envelope (event name, identity) in one pass before any image is looked at,
+    and only the three attributes the event carries are decoded.
+    """
+    decoded: list[ReminderRecord] = []
+    for record in [r for r in records if _is_ttl_removal(r)]:
+        ddb = record.get("dynamodb") or {}
+        image = ddb.get("OldImage") or {}
+        try:
+            booking_id, user_id, ttl = image["booking_id"]["S"], image["user_id"]["S"], image["ttl"]["N"]
+        except (KeyError, TypeError):
+            # Not a booking with a reminder set (a series item, or ttl cleared)
             continue
+        if booking_id and user_id and ttl.isdigit():
+            decoded.append(ReminderRecord(ddb.get("SequenceNumber"), booking_id, user_id, int(ttl)))
+    return decoded
+
+
+def _entry_size(entry: PutEventsRequestEntryTypeDef) -> int:
+    # Same accounting EventBridge uses for the 256 KB request limit
+    return len(entry["Source"].encode()) + len(entry["DetailType"].encode()) + len(entry["Detail"].encode())
+
+
+def _chunk_entries(pending: list[PendingEntry]) -> Iterator[list[PendingEntry]]:
+    chunk: list[PendingEntry] = []
+    chunk_bytes = 0
+    for item in pending:
+        size = _entry_size(item[1])
+        if chunk and (len(chunk) == _MAX_ENTRIES_PER_PUT or chunk_bytes + size > _MAX_PUT_BYTES):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(item)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
 
-        old_image = record.get("dynamodb", {}).get("OldImage", {})
-        booking_id = old_image.get("booking_id", {}).get("S")
-        user_id = old_image.get("user_id", {}).get("S")
-        n = old_image.get("ttl", {}).get("N")
 
-        # Parse TTL without exceptions; DynamoDB streams provide N as string
-        ttl = int(n) if isinstance(n, str) and n.isdigit() else None
+def reminder_entry(booking_id: str, user_id: str, ttl: int) -> PutEventsRequestEntryTypeDef:
+    """The ReminderDue event, whichever path delivers it (this stream or app.reminder_poller)."""
+    detail = {
+        "version": "1.0",
+        "type": "ReminderDue",
+        "booking_id": booking_id,
+        "user_id": user_id,
+        "ttl": ttl,
+    }
+    logger.debug("Emitting reminder event", extra=detail)
+    return {"Source": "booking.reminder", "DetailType": "ReminderDue", "Detail": json.dumps(detail)}
 
-        if not booking_id or not user_id or ttl is None:
-            # Not a TTL-driven removal of a booking with reminder set
+
+def _eventbridge() -> EventBridgeClient:
+    global _events  # noqa: PLW0603
+    if _events is None:
+        _events = instrumentation.instrument(cast(EventBridgeClient, aws.client("events")), "events")
+    return _events
+
+
+def _ddb() -> DynamoDBClient:
+    global _dynamodb  # noqa: PLW0603
+    if _dynamodb is None:
+        if os.environ.get("STORAGE_BACKEND", "dynamodb") == "memory":
+            # Local runs only: share the API's in-process tables
+            from app import dal  # noqa: PLC0415
+
+            _dynamodb = dal._ddb()
+        else:
+            _dynamodb = instrumentation.instrument(cast(DynamoDBClient, aws.client("dynamodb")), "dynamodb")
+    return _dynamodb
+
+
+@cache
+def _metrics() -> Metrics:
+    # Only with ROUTE_METRICS on; the powertools metrics package is not loaded otherwise
+    return get_metrics(namespace="BookingAPI")
+
+
+def _put_chunk(chunk: list[PendingEntry]) -> list[PendingEntry]:
+    """Send one chunk, retrying only the entries EventBridge rejected. Returns entries that never made it."""
+    remaining = chunk
+    for attempt in range(_MAX_PUT_ATTEMPTS):
+        if attempt:
+            time.sleep(_RETRY_BASE_DELAY_SECONDS * 2 ** (attempt - 1))
+        try:
+            resp = _eventbridge().put_events(Entries=[entry for _, entry in remaining])
+        except (BotoCoreError, ClientError):
+            logger.exception("PutEvents call failed", extra={"attempt": attempt + 1, "entries": len(remaining)})
             continue
+        if not resp.get("FailedEntryCount"):
+            return []
+        # Result entries line up with request entries; failed ones carry an ErrorCode
+        remaining = [
+            item for item, result in zip(remaining, resp.get("Entries", []), strict=False) if result.get("ErrorCode")
+        ]
+        if not remaining:
+            return []
+        logger.warning("PutEvents rejected entries", extra={"attempt": attempt + 1, "failed": len(remaining)})
+    return remaining
+
+
+@tracer.capture_lambda_handler
+def lambda_handler(event: dict[str, Any], context: LambdaContext) -> dict[str, Any]:
+    if instrumentation.ENABLED:
+        with instrumentation.invocation(_metrics(), "StreamProcessor"):
+            return _handle(event)
+    return _handle(event)
+
+
+def _handle(event: dict[str, Any]) -> dict[str, Any]:
+    records = event.get("Records", [])
+    # Triggered by DynamoDB stream when TTL expires -> record is removed.
+    # With scheduled reminders bookings carry no TTL and app.reminder_poller sends them.
+    due = [] if reminders.SCHEDULED else decode_reminders(records)
+    pending: list[PendingEntry] = [(r.sequence_number, reminder_entry(r.booking_id, r.user_id, r.ttl)) for r in due]
+    if pending:
+        logger.info("Emitting reminder events", extra={"count": len(pending)})
+
+    failed: list[PendingEntry] = []
+    for chunk in _chunk_entries(pending):
+        failed.extend(_put_chunk(chunk))
+
+    if failed:
+        logger.error("Reminder events not delivered", extra={"failed": len(failed)})
+    failed_sequences = [sequence_number for sequence_number, _ in failed]
+
+    if user_summary.ENABLED:
+        # Every INSERT/MODIFY/REMOVE, not just TTL removals; summaries skip records they already applied
+        not_applied = user_summary.update(_ddb(), user_summary.decode_changes(records), _clock())
+        failed_sequences.extend(change.sequence_number for change in not_applied)
 
-        detail = {
-            "version": "1.0",
-            "type": "ReminderDue",
-            "booking_id": booking_id,
-            "user_id": user_id,
-            "ttl": ttl,
-        }
-        logger.info("Emitting reminder event", extra=detail)
-
-        _events.put_events(
-            Entries=[
-                {
-                    "Source": "booking.reminder",
-                    "DetailType": "ReminderDue",
-                    "Detail": json.dumps(detail),
-                }
-            ]
-        )
+    # Partial batch response: Lambda retries the shard from the lowest failed sequence number only
+    return {
+        "batchItemFailures": [
+            {"itemIdentifier": sequence_number}
+            for sequence_number in dict.fromkeys(failed_sequences)
+            if sequence_number is not None
+        ]
+    }
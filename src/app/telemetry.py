@@ -0,0 +1,68 @@
+"""Tracer/Metrics factories that skip loading X-Ray and EMF machinery when they are switched off.
+
+Constructing a powertools ``Tracer`` imports ``aws_xray_sdk`` (~200 ms) even with tracing disabled, so with
+``POWERTOOLS_TRACE_DISABLED`` / ``POWERTOOLS_METRICS_DISABLED`` set we hand out no-op stand-ins instead.
+"""
+
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, cast
+
+if TYPE_CHECKING:
+    from aws_lambda_powertools import Metrics, Tracer
+
+
+def _disabled(env_var: str) -> bool:
+    return os.environ.get(env_var, "false").strip().lower() in ("1", "true")
+
+
+def _passthrough(func: Callable[..., Any] | None = None, **_: Any) -> Any:
+    # Supports both @decorator and @decorator(...) forms
+    if func is None:
+        return lambda f: f
+    return func
+
+
+class _NoOpTracer:
+    capture_lambda_handler = staticmethod(_passthrough)
+    capture_method = staticmethod(_passthrough)
+
+    def put_annotation(self, key: str, value: Any) -> None:
+        pass
+
+    def put_metadata(self, key: str, value: Any, namespace: str | None = None) -> None:
+        pass
+
+
+class _NoOpMetrics:
+    log_metrics = staticmethod(_passthrough)
+
+    def add_metric(self, name: str, unit: Any, value: float, resolution: Any = None) -> None:
+        pass
+
+    def add_dimension(self, name: str, value: str) -> None:
+        pass
+
+    def add_metadata(self, key: str, value: Any) -> None:
+        pass
+
+    def flush_metrics(self, raise_on_empty_metrics: bool = False) -> None:
+        pass
+
+
+def get_tracer() -> Tracer:
+    if _disabled("POWERTOOLS_TRACE_DISABLED"):
+        return cast("Tracer", _NoOpTracer())
+    from aws_lambda_powertools import Tracer  # noqa: PLC0415
+
+    return Tracer()
+
+
+def get_metrics(namespace: str) -> Metrics:
+    if _disabled("POWERTOOLS_METRICS_DISABLED"):
+        return cast("Metrics", _NoOpMetrics())
+    from aws_lambda_powertools import Metrics  # noqa: PLC0415
+
+    return Metrics(namespace=namespace)
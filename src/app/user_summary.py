@@ -0,0 +1,233 @@
+"""Per-user booking summary kept up to date from the bookings stream (``USER_SUMMARY=true``).
+
+One item per user in the summary table holds the user's active and cancelled booking counts and the earliest
+upcoming active bookings, so ``GET /users/{user_id}/bookings/summary`` is a single GetItem instead of a query
+over the user's partition. The stream processor folds each batch's INSERT/MODIFY/REMOVE images into it:
+counts move by the difference between a booking's old and new image, and the upcoming list is the first
+``_KEPT`` entries by start time, flagged incomplete once something had to be left out. When removals shrink
+an incomplete list below ``UPCOMING`` it is refilled from the active-bookings index. Writes are
+read-modify-write under a version condition (bookings of one user arrive on different shards), and the last
+stream sequence numbers applied are kept on the item, so a batch Lambda retries is not counted twice.
+
+Counts cover stored bookings, including materialized series occurrences; series themselves and the occurrences
+they only generate on read are not counted (a series without ``until`` has no end). Bookings written before
+the summary existed are not counted either. Bookings moved to the archive (``app.archive``) stay counted: their
+removals carry ``ARCHIVED`` and are skipped. Like ``app.reminders`` this module is shared by ``app.dal`` and
+the stream processor, so it must not import app.dal, pydantic or boto3.
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+
+from aws_lambda_powertools import Logger
+from botocore.exceptions import BotoCoreError, ClientError
+
+from app import aws
+
+if TYPE_CHECKING:
+    # Only for static type checking; not imported at runtime
+    from mypy_boto3_dynamodb.client import DynamoDBClient
+else:
+    # Fallbacks to satisfy annotations at runtime
+    DynamoDBClient = Any  # type: ignore[assignment]
+
+logger = Logger()
+
+ENABLED = os.environ.get("USER_SUMMARY", "false").strip().lower() in ("1", "true")
+TABLE_NAME = os.environ.get("USER_SUMMARY_TABLE_NAME", "booking-user-summaries")
+# Upcoming bookings returned by the summary endpoint
+UPCOMING = int(os.environ.get("USER_SUMMARY_UPCOMING", "5"))
+# Kept on the item beyond UPCOMING, so a cancellation rarely needs the index to refill the list
+_KEPT = 2 * UPCOMING
+# Enough to cover a retried batch (template.yaml: BatchSize 10) many times over
+_RECENT_SEQUENCES = 50
+_MAX_ATTEMPTS = 5
+# Set by dal.archive_bookings in the update just before it deletes a booking it archived
+ARCHIVED = "archived_at"
+
+# app.dal's table and sparse active-bookings index; this module must not import app.dal
+_BOOKINGS_TABLE = os.environ.get("TABLE_NAME", "bookings")
+_ACTIVE_INDEX = "user_id_active_start_index"
+
+
+class Change(NamedTuple):
+    """One stream record as it affects one user's summary: the (status, start_time) before and after."""
+
+    sequence_number: str | None
+    booking_id: str
+    before: tuple[str, str] | None
+    after: tuple[str, str] | None
+
+
+class Summary(NamedTuple):
+    active: int
+    cancelled: int
+    upcoming: list[tuple[str, str]]  # (start_time, booking_id), earliest first
+
+
+def _counted(image: dict[str, Any] | None) -> tuple[str, str, str] | None:
+    # (user_id, status, start_time) of a stored booking; series items have no start_time
+    if not image:
+        return None
+    try:
+        user_id, start_time = image["user_id"]["S"], image["start_time"]["S"]
+    except (KeyError, TypeError):
+        return None
+    return user_id, image.get("status", {}).get("S", "active"), start_time
+
+
+def decode_changes(records: list[dict[str, Any]]) -> dict[str, list[Change]]:
+    """The summary changes in a batch of bookings stream records, per user, in stream order."""
+    changes: dict[str, list[Change]] = {}
+    for record in records:
+        ddb = record.get("dynamodb") or {}
+        if not ddb.get("NewImage") and ARCHIVED in (ddb.get("OldImage") or {}):
+            continue
+        old, new = _counted(ddb.get("OldImage")), _counted(ddb.get("NewImage"))
+        if old is None and new is None:
+            continue
+        booking_id = aws.deserialize(ddb["Keys"])["booking_id"]
+        sequence_number = ddb.get("SequenceNumber")
+        if old is not None and new is not None and old[0] == new[0]:
+            changes.setdefault(new[0], []).append(Change(sequence_number, booking_id, old[1:], new[1:]))
+            continue
+        # Inserted, removed, or (never done by the API) moved to another user
+        if old is not None:
+            changes.setdefault(old[0], []).append(Change(sequence_number, booking_id, old[1:], None))
+        if new is not None:
+            changes.setdefault(new[0], []).append(Change(sequence_number, booking_id, None, new[1:]))
+    return changes
+
+
+def _place(upcoming: list[list[str]], complete: bool, change: Change, now: str) -> bool:
+    """Move the change's booking within ``upcoming`` (sorted, in place); returns whether the list is complete."""
+    upcoming[:] = [entry for entry in upcoming if entry[1] != change.booking_id]
+    if change.after is None or change.after[0] != "active" or change.after[1] <= now:
+        return complete
+    entry = [change.after[1], change.booking_id]
+    # An incomplete list is a prefix: only entries before its end are known to belong in it
+    if complete or (upcoming and entry < upcoming[-1]):
+        bisect.insort(upcoming, entry)
+        if len(upcoming) > _KEPT:
+            upcoming.pop()
+            return False
+    return complete
+
+
+def query_upcoming(client: DynamoDBClient, user_id: str, now: str) -> tuple[list[list[str]], bool]:
+    """The user's first ``_KEPT`` active bookings starting after ``now``, and whether that is all of them."""
+    params: dict[str, Any] = {
+        "TableName": _BOOKINGS_TABLE,
+        "IndexName": _ACTIVE_INDEX,
+        "KeyConditionExpression": "user_id = :uid AND active_start > :now",
+        "ProjectionExpression": "booking_id, start_time",
+        "ExpressionAttributeValues": aws.serialize({":uid": user_id, ":now": now}),
+        "Limit": _KEPT + 1,
+    }
+    found: list[list[str]] = []
+    while len(found) <= _KEPT:
+        resp = cast(dict[str, Any], client.query(**params))
+        found.extend([it["start_time"]["S"], it["booking_id"]["S"]] for it in resp.get("Items", []))
+        if not resp.get("LastEvaluatedKey"):
+            return sorted(found)[:_KEPT], len(found) <= _KEPT
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+    return sorted(found)[:_KEPT], False
+
+
+def _iso(epoch: float) -> str:
+    # Same normalized form app.dal stores start_time in, so the strings compare chronologically
+    return datetime.fromtimestamp(int(epoch), UTC).isoformat()
+
+
+def _fold(client: DynamoDBClient, item: dict[str, Any], changes: list[Change], now: str) -> None:
+    for change in changes:
+        for status, step in ((change.before, -1), (change.after, 1)):
+            if status is not None:
+                field = "cancelled" if status[0] == "cancelled" else "active"
+                item[field] += step
+    upcoming = [entry for entry in item["upcoming"] if entry[0] > now]
+    complete = item["upcoming_complete"]
+    for change in changes:
+        complete = _place(upcoming, complete, change, now)
+    if not complete and len(upcoming) < UPCOMING:
+        upcoming, complete = query_upcoming(client, item["user_id"], now)
+        # The index lags the stream: apply this batch again over what it returned
+        for change in changes:
+            complete = _place(upcoming, complete, change, now)
+    item["upcoming"], item["upcoming_complete"] = upcoming, complete
+
+
+def _update_user(client: DynamoDBClient, user_id: str, changes: list[Change], now: str) -> bool:
+    """Apply one user's changes; False if the item kept changing under us."""
+    key = aws.serialize({"user_id": user_id})
+    for _ in range(_MAX_ATTEMPTS):
+        resp = client.get_item(TableName=TABLE_NAME, Key=key, ConsistentRead=True)
+        item = aws.deserialize(resp["Item"]) if "Item" in resp else None
+        version = item["version"] if item is not None else None
+        if item is None:
+            item = {
+                "user_id": user_id,
+                "active": 0,
+                "cancelled": 0,
+                "upcoming": [],
+                "upcoming_complete": True,
+                "applied": [],
+                "version": 0,
+            }
+        applied = set(item["applied"])
+        fresh = [c for c in changes if c.sequence_number is None or c.sequence_number not in applied]
+        if not fresh:
+            return True
+        _fold(client, item, fresh, now)
+        sequences = [c.sequence_number for c in fresh if c.sequence_number is not None]
+        item["applied"] = (item["applied"] + sequences)[-_RECENT_SEQUENCES:]
+        item["version"] += 1
+        condition: dict[str, Any] = (
+            {"ConditionExpression": "attribute_not_exists(user_id)"}
+            if version is None
+            else {
+                "ConditionExpression": "#v = :v",
+                "ExpressionAttributeNames": {"#v": "version"},
+                "ExpressionAttributeValues": aws.serialize({":v": version}),
+            }
+        )
+        try:
+            client.put_item(TableName=TABLE_NAME, Item=aws.serialize(item), **condition)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+            continue
+        return True
+    return False
+
+
+def update(client: DynamoDBClient, changes: dict[str, list[Change]], now: float) -> list[Change]:
+    """Fold ``decode_changes`` output into the users' summaries; returns the changes that were not applied."""
+    failed: list[Change] = []
+    for user_id, user_changes in changes.items():
+        try:
+            if _update_user(client, user_id, user_changes, _iso(now)):
+                continue
+            logger.warning("User summary kept changing, giving up", extra={"user_id": user_id})
+        except (BotoCoreError, ClientError):
+            logger.exception("User summary update failed", extra={"user_id": user_id})
+        failed.extend(user_changes)
+    return failed
+
+
+def read(client: DynamoDBClient, user_id: str, now: float) -> Summary:
+    """The user's summary as of ``now``; a user the stream has not seen yet has an empty one."""
+    resp = client.get_item(TableName=TABLE_NAME, Key=aws.serialize({"user_id": user_id}))
+    if "Item" not in resp:
+        return Summary(0, 0, [])
+    item = aws.deserialize(resp["Item"])
+    cutoff = _iso(now)
+    upcoming = [entry for entry in item["upcoming"] if entry[0] > cutoff]
+    if len(upcoming) < UPCOMING and not item["upcoming_complete"]:
+        # Bookings in the list have started since the stream last refilled it
+        upcoming, _ = query_upcoming(client, user_id, cutoff)
+    return Summary(item["active"], item["cancelled"], [(start, bid) for start, bid in upcoming[:UPCOMING]])
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from collections import Counter
+
+import pytest
+
+from app import dal, dal_async, idempotency
+from app.memory_backend import LatencyProxy, MemoryDynamoDB
+
+
+@pytest.fixture()
+def fake_dynamodb(monkeypatch: pytest.MonkeyPatch) -> MemoryDynamoDB:
+    """Patches dal onto the in-memory engine holding the bookings table and the per-resource schedule table.
+
+    Automatic TTL sweeps are off so fixed test dates in the past stay put; call ``expire_items`` to run one.
+    """
+    engine = MemoryDynamoDB(dal.memory_schemas(), ttl_sweep_interval=None)
+    monkeypatch.setattr(dal, "_client", engine)
+    # app.dal_async then reaches whatever dal's client is (including slow_dynamodb's proxy) through threads
+    monkeypatch.setattr(dal_async, "_client", dal_async._ThreadedClient())
+    # The idempotency layer's in-process cache would otherwise answer from a previous test's engine
+    idempotency._idempotent_run.cache_clear()
+    idempotency._config.cache_clear()
+    return engine
+
+
+@pytest.fixture()
+def slow_dynamodb(fake_dynamodb: MemoryDynamoDB, monkeypatch: pytest.MonkeyPatch) -> Counter[str]:
+    """fake_dynamodb with a simulated network round trip on every call; returns the per-operation call counter."""
+    calls: Counter[str] = Counter()
+    latency = 0.002
+    monkeypatch.setattr(dal, "_client", LatencyProxy(fake_dynamodb, latency, calls))
+    return calls
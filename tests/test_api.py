@@ -1,59 +1,20 @@
 from __future__ import annotations
 
+import time
 from datetime import UTC, datetime, timedelta
 
 import pytest
+from botocore.exceptions import ClientError
 
 from app import dal
-from app.models import BookingCreate, BookingUpdate
-
-
-class FakeTable:
-    def __init__(self):
-        self.items = {}
-
-    def put_item(self, Item):  # noqa NOSONAR
-        self.items[Item["booking_id"]] = Item
-
-    def get_item(self, Key):  # noqa NOSONAR
-        item = self.items.get(Key["booking_id"])
-        return {"Item": item} if item else {}
-
-    def update_item(self, **kwargs):
-        key = kwargs["Key"]["booking_id"]
-        attrs = self.items[key]
-        # naive: apply only status or replaces values from ExpressionAttributeValues
-        eav = kwargs.get("ExpressionAttributeValues") or {}
-        ean = kwargs.get("ExpressionAttributeNames") or {}
-        update_expr = kwargs.get("UpdateExpression", "")
-        if "SET" in update_expr:
-            set_part = update_expr.split("SET", 1)[1].split("REMOVE")[0]
-            for assign in [s.strip() for s in set_part.split(",") if s.strip()]:
-                name, val = [s.strip() for s in assign.split("=")]
-                name = name.replace("#_", "")
-                if name in ean:
-                    name = ean[name]
-                val = eav[val]
-                attrs[name] = val
-        if "REMOVE ttl" in update_expr and "ttl" in attrs:
-            del attrs["ttl"]
-        self.items[key] = attrs
-        return {"Attributes": attrs}
-
-    def delete_item(self, Key):  # noqa NOSONAR
-        self.items.pop(Key["booking_id"], None)
-
-    def query(self, **kwargs):
-        uid = kwargs["ExpressionAttributeValues"][":uid"]
-        items = [it for it in self.items.values() if it.get("user_id") == uid]
-        return {"Items": items}
+from app.aws import serialize
+from app.cache import TTLCache
+from app.models import Booking, BookingCreate, BookingSeriesCreate, BookingUpdate, Recurrence
 
 
 @pytest.fixture(autouse=True)
-def patch_table(monkeypatch):
-    fake = FakeTable()
-    monkeypatch.setattr(dal, "_table", fake)
-    return fake
+def patch_table(fake_dynamodb):
+    return fake_dynamodb
 
 
 def test_create_and_get_booking():
@@ -74,9 +35,10 @@ def test_create_and_get_booking():
 
 def test_list_bookings_for_user():
     now = datetime.now(UTC)
-    b1 = dal.create_booking(BookingCreate(user_id="u1", resource_id="r1", start_time=now, end_time=now))
-    _ = dal.create_booking(BookingCreate(user_id="u2", resource_id="r2", start_time=now, end_time=now))
-    b3 = dal.create_booking(BookingCreate(user_id="u1", resource_id="r3", start_time=now, end_time=now))
+    end = now + timedelta(hours=1)
+    b1 = dal.create_booking(BookingCreate(user_id="u1", resource_id="r1", start_time=now, end_time=end))
+    _ = dal.create_booking(BookingCreate(user_id="u2", resource_id="r2", start_time=now, end_time=end))
+    b3 = dal.create_booking(BookingCreate(user_id="u1", resource_id="r3", start_time=now, end_time=end))
     bookings = dal.list_bookings_for_user("u1")
     ids = sorted([b.booking_id for b in bookings])
     assert ids == sorted([b1.booking_id, b3.booking_id])
@@ -159,9 +121,7 @@ def test_update_booking_noop_returns_current():
 def test_cancel_booking_sets_status_cancelled():
     start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
     end = start + timedelta(hours=1)
-    b = dal.create_booking(
-        BookingCreate(user_id="u-cancel", resource_id="r1", start_time=start, end_time=end)
-    )
+    b = dal.create_booking(BookingCreate(user_id="u-cancel", resource_id="r1", start_time=start, end_time=end))
     cancelled = dal.cancel_booking(b.booking_id)
     assert cancelled.status == "cancelled"
 
@@ -169,9 +129,7 @@ def test_cancel_booking_sets_status_cancelled():
 def test_delete_booking_then_get_raises():
     start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
     end = start + timedelta(hours=1)
-    b = dal.create_booking(
-        BookingCreate(user_id="u-del", resource_id="r1", start_time=start, end_time=end)
-    )
+    b = dal.create_booking(BookingCreate(user_id="u-del", resource_id="r1", start_time=start, end_time=end))
     dal.delete_booking(b.booking_id)
     with pytest.raises(KeyError):
         dal.get_booking(b.booking_id)
@@ -192,3 +150,814 @@ def test_create_with_naive_datetimes_normalized_to_utc():
     )
     assert b.start_time.tzinfo is not None
     assert b.end_time.tzinfo is not None
+
+
+def _create(resource_id: str, start: datetime, hours: int = 1, user_id: str = "u-res") -> Booking:
+    end = start + timedelta(hours=hours)
+    return dal.create_booking(BookingCreate(user_id=user_id, resource_id=resource_id, start_time=start, end_time=end))
+
+
+def test_update_rejects_a_start_at_or_after_the_stored_end():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    b = _create("room-1", start)
+    with pytest.raises(ValueError, match="end_time must be after start_time"):
+        dal.update_booking(b.booking_id, BookingUpdate(start_time=start + timedelta(hours=1)))
+    with pytest.raises(ValueError, match="end_time must be after start_time"):
+        dal.update_booking(b.booking_id, BookingUpdate(end_time=start - timedelta(minutes=1)))
+    assert dal.get_booking(b.booking_id).version == 1
+
+
+def test_create_booking_rejects_overlap_on_same_resource():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    _create("room-1", start)
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-1", start + timedelta(minutes=30))
+    # Same window on another resource and back-to-back slots are fine
+    _create("room-2", start)
+    _create("room-1", start + timedelta(hours=1))
+
+
+def test_create_booking_overlap_across_day_boundary():
+    start = datetime(2030, 1, 1, 23, 0, tzinfo=UTC)
+    _create("room-1", start, hours=2)
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-1", datetime(2030, 1, 2, 0, 30, tzinfo=UTC))
+
+
+def test_create_booking_rejects_span_over_limit():
+    start = datetime(2030, 1, 1, tzinfo=UTC)
+    with pytest.raises(ValueError, match="span"):
+        _create("room-1", start, hours=24 * (dal._MAX_BOOKING_DAYS + 1))
+
+
+def test_overlap_check_reads_only_the_buckets_in_window(patch_table):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    for day in range(30):
+        _create("room-1", start + timedelta(days=day))
+    schedule = patch_table.tables[dal._SCHEDULE_TABLE_NAME]
+    assert len(schedule.items) == 30  # noqa: PLR2004
+    reads = []
+    original = patch_table.batch_get_item
+    patch_table.batch_get_item = lambda **kw: reads.append(kw) or original(**kw)
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-1", start + timedelta(days=10, minutes=15))
+    assert len(reads) == 1
+    # The one day bucket in the window, plus the resource's series bucket
+    assert len(reads[0]["RequestItems"][dal._SCHEDULE_TABLE_NAME]["Keys"]) == 2  # noqa: PLR2004
+
+
+def test_update_booking_move_checks_conflicts_and_frees_old_slot():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    a = _create("room-1", start)
+    b = _create("room-1", start + timedelta(hours=2))
+    with pytest.raises(dal.BookingConflictError):
+        dal.update_booking(b.booking_id, BookingUpdate(start_time=start, end_time=start + timedelta(hours=1)))
+    moved = dal.update_booking(a.booking_id, BookingUpdate(resource_id="room-2"))
+    assert moved.resource_id == "room-2"
+    assert dal.get_booking(a.booking_id).resource_id == "room-2"
+    # room-1 12:00 is free again
+    _create("room-1", start)
+
+
+def test_cancel_and_delete_release_slot():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    a = _create("room-1", start)
+    dal.cancel_booking(a.booking_id)
+    b = _create("room-1", start)
+    dal.delete_booking(b.booking_id)
+    _create("room-1", start)
+
+
+def test_cancel_booking_not_found_raises_keyerror():
+    with pytest.raises(KeyError):
+        dal.cancel_booking("does-not-exist")
+
+
+def test_concurrent_schedule_change_is_retried(patch_table):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    original = patch_table.batch_get_item
+    raced = []
+
+    def racing_read(**kwargs):
+        resp = original(**kwargs)
+        if not raced:
+            # Another writer books the slot after our read but before our transaction
+            raced.append(True)
+            _create("room-1", start, user_id="someone-else")
+        return resp
+
+    patch_table.batch_get_item = racing_read
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-1", start)
+    assert len(dal.list_bookings_for_user("someone-else")) == 1
+    assert dal.list_bookings_for_user("u-res") == []
+
+
+def test_list_bookings_page_follows_cursor_in_start_order():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    created = [_create(f"room-{i}", start + timedelta(days=4 - i), user_id="u-page") for i in range(5)]
+    expected = [b.booking_id for b in sorted(created, key=lambda b: b.start_time)]
+
+    seen, cursor = [], None
+    while True:
+        page = dal.list_bookings_page("u-page", limit=2, cursor=cursor)
+        assert len(page.items) <= 2  # noqa: PLR2004
+        seen.extend(b.booking_id for b in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_list_bookings_page_time_range():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    for day in range(5):
+        _create("room-1", start + timedelta(days=day), user_id="u-range")
+    page = dal.list_bookings_page(
+        "u-range", limit=10, start_from=start + timedelta(days=1), start_to=start + timedelta(days=3)
+    )
+    assert [b.start_time.day for b in page.items] == [2, 3, 4]
+    assert page.next_cursor is None
+
+
+def test_list_bookings_page_rejects_foreign_or_garbage_cursor():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    _create("room-1", start, user_id="u-a")
+    _create("room-2", start, user_id="u-a")
+    cursor = dal.list_bookings_page("u-a", limit=1).next_cursor
+    assert cursor is not None
+    with pytest.raises(ValueError, match="cursor"):
+        dal.list_bookings_page("u-b", limit=1, cursor=cursor)
+    with pytest.raises(ValueError, match="cursor"):
+        dal.list_bookings_page("u-a", limit=1, cursor="not-base64!")
+
+
+def test_list_bookings_for_user_reads_every_page(patch_table, monkeypatch):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    for day in range(5):
+        _create("room-1", start + timedelta(days=day), user_id="u-all")
+    original = patch_table.query
+    # Simulate DynamoDB's 1 MB cut-off by capping every response at two items
+    monkeypatch.setattr(patch_table, "query", lambda **kw: original(**{**kw, "Limit": 2}))
+    assert len(dal.list_bookings_for_user("u-all")) == 5  # noqa: PLR2004
+
+
+def _scanned(patch_table, monkeypatch) -> list[int]:
+    """Items each query read (before any filter), recorded as queries happen."""
+    scanned: list[int] = []
+    original = patch_table.query
+
+    def query(**params):
+        resp = original(**params)
+        scanned.append(resp["ScannedCount"])
+        return resp
+
+    monkeypatch.setattr(patch_table, "query", query)
+    return scanned
+
+
+def test_active_listing_reads_only_active_bookings(patch_table, monkeypatch):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    created = [_create("room-1", start + timedelta(days=day), user_id="u-st") for day in range(6)]
+    for booking in created[:4]:
+        dal.cancel_booking(booking.booking_id)
+    scanned = _scanned(patch_table, monkeypatch)
+
+    active = dal.list_bookings_page("u-st", limit=10, status="active")
+    assert [b.booking_id for b in active.items] == [b.booking_id for b in created[4:]]
+    # The sparse index holds no cancelled bookings to read past (the second query is the series lookup)
+    assert scanned[0] == 2  # noqa: PLR2004
+    cancelled = dal.list_bookings_page("u-st", limit=10, status="cancelled")
+    assert [b.status for b in cancelled.items] == ["cancelled"] * 4
+    assert [b.booking_id for b in dal.list_bookings_for_user("u-st", status="active")] == [
+        b.booking_id for b in created[4:]
+    ]
+
+
+def test_upcoming_listing_skips_past_bookings(patch_table, monkeypatch):
+    now = datetime.now(UTC).replace(microsecond=0)
+    past = [_create(f"room-{i}", now - timedelta(days=i + 1), user_id="u-up") for i in range(5)]
+    future = _create("room-9", now + timedelta(days=1), user_id="u-up")
+    dal.cancel_booking(past[0].booking_id)
+    scanned = _scanned(patch_table, monkeypatch)
+
+    page = dal.list_bookings_page("u-up", limit=10, status="active", upcoming=True)
+    assert [b.booking_id for b in page.items] == [future.booking_id]
+    assert scanned[0] == 1
+    # An explicit lower bound later than now wins
+    later = dal.list_bookings_page("u-up", limit=10, start_from=now + timedelta(days=2), upcoming=True)
+    assert later.items == []
+
+
+def test_active_listing_pages_merge_series_occurrences():
+    start = datetime(2030, 1, 1, 9, 0, tzinfo=UTC)
+    _series("room-1", start, count=3, freq="daily")
+    for day in range(3):
+        booking = _create("room-2", start + timedelta(days=day, hours=3), user_id="u-series")
+        if day == 1:
+            dal.cancel_booking(booking.booking_id)
+    seen, cursor = [], None
+    while True:
+        page = dal.list_bookings_page("u-series", 2, cursor, status="active")
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert len(seen) == 5  # noqa: PLR2004
+    assert [b.start_time for b in seen] == sorted(b.start_time for b in seen)
+    assert {b.status for b in seen} == {"active"}
+    # Cursors are tied to the index they were issued for
+    unfiltered = dal.list_bookings_page("u-series", 1).next_cursor
+    with pytest.raises(ValueError, match="cursor"):
+        dal.list_bookings_page("u-series", 1, unfiltered, status="active")
+
+
+def test_moves_keep_the_active_index_in_step():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    first = _create("room-1", start, user_id="u-mv")
+    second = _create("room-2", start + timedelta(days=1), user_id="u-mv")
+    moved = start + timedelta(days=2)
+    dal.update_booking(first.booking_id, BookingUpdate(start_time=moved, end_time=moved + timedelta(hours=1)))
+    listed = dal.list_bookings_page("u-mv", limit=10, status="active").items
+    assert [(b.booking_id, b.start_time) for b in listed] == [
+        (second.booking_id, second.start_time),
+        (first.booking_id, moved),
+    ]
+
+
+def test_backfill_adds_legacy_bookings_to_the_active_index(patch_table):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    legacy = {"booking_id": "legacy", "user_id": "u-old", "resource_id": "r", "end_time": dal._dt_to_iso(start)}
+    legacy["start_time"] = dal._dt_to_iso(start)
+    patch_table.put_item(TableName=dal._TABLE_NAME, Item=serialize(legacy))
+    patch_table.put_item(
+        TableName=dal._TABLE_NAME, Item=serialize({**legacy, "booking_id": "gone", "status": "cancelled"})
+    )
+    current = _create("room-1", start + timedelta(days=1), user_id="u-old")
+    assert [b.booking_id for b in dal.list_bookings_page("u-old", 10, status="active").items] == [current.booking_id]
+
+    assert dal.backfill_active_index() == 1
+    assert dal.backfill_active_index() == 0
+    listed = dal.list_bookings_page("u-old", 10, status="active").items
+    assert [b.booking_id for b in listed] == ["legacy", current.booking_id]
+
+
+def test_update_reminder_only_is_single_write(slow_dynamodb):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    b = _create("room-1", start)
+    slow_dynamodb.clear()
+    updated = dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=120))
+    assert dict(slow_dynamodb) == {"update_item": 1}
+    assert updated.ttl == int(start.timestamp()) - 120
+    assert updated.reminder_lead_seconds == 120  # noqa: PLR2004
+
+
+def test_update_reminder_on_legacy_item_migrates_lead(patch_table):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    b = _create("room-1", start)
+    # Items written before reminder_lead_seconds was stored only carry the TTL
+    stored = patch_table.tables[dal._TABLE_NAME].items[(b.booking_id,)]
+    del stored["reminder_lead_seconds"]
+    assert dal.get_booking(b.booking_id).reminder_lead_seconds == 900  # noqa: PLR2004
+
+    updated = dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=300))
+    assert updated.ttl == int(start.timestamp()) - 300
+    assert patch_table.tables[dal._TABLE_NAME].items[(b.booking_id,)]["reminder_lead_seconds"] == 300  # noqa: PLR2004
+
+
+def test_update_reminder_recomputes_a_ttl_clamped_at_zero(patch_table):
+    # Starts 5 minutes after the epoch, so a 10 minute lead clamps the TTL to 0
+    start = datetime(1970, 1, 1, 0, 5, tzinfo=UTC)
+    b = dal.create_booking(
+        BookingCreate(
+            user_id="u1",
+            resource_id="r1",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            reminder_lead_seconds=600,
+        )
+    )
+    assert b.ttl == 0
+    # ttl + old lead is not the start time here, so the in-place arithmetic must not be used
+    assert dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=60)).ttl == 240  # noqa: PLR2004
+    assert dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=900)).ttl == 0
+    stored = patch_table.tables[dal._TABLE_NAME].items[(b.booking_id,)]
+    assert (stored["ttl"], stored["reminder_lead_seconds"]) == (0, 900)
+
+
+def test_update_adds_reminder_to_booking_without_one():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    b = dal.create_booking(
+        BookingCreate(
+            user_id="u1",
+            resource_id="r1",
+            start_time=start,
+            end_time=start + timedelta(hours=1),
+            reminder_lead_seconds=None,
+        )
+    )
+    updated = dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=600))
+    assert updated.ttl == int(start.timestamp()) - 600
+
+
+def test_update_move_keeps_stored_reminder_lead():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    b = _create("room-1", start)
+    new_start = start + timedelta(days=1)
+    updated = dal.update_booking(
+        b.booking_id, BookingUpdate(start_time=new_start, end_time=new_start + timedelta(hours=1))
+    )
+    assert updated.ttl == int(new_start.timestamp()) - 900
+    assert dal.get_booking(b.booking_id).ttl == updated.ttl
+
+
+def test_update_booking_not_found_raises_keyerror():
+    with pytest.raises(KeyError):
+        dal.update_booking("does-not-exist", BookingUpdate(reminder_lead_seconds=120))
+    with pytest.raises(KeyError):
+        dal.update_booking("does-not-exist", BookingUpdate(reminder_lead_seconds=None))
+
+
+def _payload(resource_id: str, start: datetime, hours: int = 1, user_id: str = "u-batch") -> BookingCreate:
+    end = start + timedelta(hours=hours)
+    return BookingCreate(user_id=user_id, resource_id=resource_id, start_time=start, end_time=end)
+
+
+def test_create_bookings_reports_conflicts_per_item():
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    _create("room-1", start)
+    result = dal.create_bookings(
+        [
+            _payload("room-1", start + timedelta(minutes=30)),  # clashes with the stored booking
+            _payload("room-2", start),
+            _payload("room-2", start + timedelta(minutes=30)),  # clashes with item 1 of this batch
+            _payload("room-3", start, hours=24 * (dal._MAX_BOOKING_DAYS + 1)),
+            _payload("room-1", start + timedelta(hours=2)),
+        ]
+    )
+    assert [b.resource_id for b in result.created] == ["room-2", "room-1"]
+    assert result.errors[0] == dal.BOOKING_CONFLICT
+    assert result.errors[2] == dal.BOOKING_CONFLICT
+    assert "span" in result.errors[3]
+    assert set(result.errors) == {0, 2, 3}
+    assert len(dal.list_bookings_for_user("u-batch")) == 2  # noqa: PLR2004
+    # Holds were claimed for the created bookings
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-2", start)
+
+
+def test_create_bookings_retries_unprocessed_items(patch_table, monkeypatch):
+    monkeypatch.setattr(dal, "_BATCH_RETRY_BASE_DELAY_SECONDS", 0)
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    original = patch_table.batch_write_item
+    calls = []
+
+    def throttled(RequestItems):  # noqa: N803
+        calls.append(RequestItems)
+        if len(calls) > 1:
+            return original(RequestItems=RequestItems)
+        [(name, requests)] = RequestItems.items()
+        original(RequestItems={name: requests[:1]})
+        return {"UnprocessedItems": {name: requests[1:]}}
+
+    monkeypatch.setattr(patch_table, "batch_write_item", throttled)
+    payloads = [_payload(f"room-{i}", start) for i in range(dal._BATCH_WRITE_SIZE + 5)]
+    result = dal.create_bookings(payloads)
+    assert len(result.created) == len(payloads)
+    assert not result.errors
+    # Two chunks on the first pass (25 + 5), one retry for everything the first chunk left behind
+    assert len(calls) == 3  # noqa: PLR2004
+    assert len(patch_table.tables[dal._TABLE_NAME].items) == len(payloads)
+
+
+def test_create_bookings_releases_holds_when_writes_stay_unprocessed(patch_table, monkeypatch):
+    monkeypatch.setattr(dal, "_BATCH_RETRY_BASE_DELAY_SECONDS", 0)
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    with monkeypatch.context() as m:
+        m.setattr(patch_table, "batch_write_item", lambda RequestItems: {"UnprocessedItems": RequestItems})  # noqa: N803
+        result = dal.create_bookings([_payload("room-1", start)])
+    assert result.created == []
+    assert result.errors == {0: dal.BATCH_WRITE_UNPROCESSED}
+    assert patch_table.tables[dal._TABLE_NAME].items == {}
+    _create("room-1", start)
+
+
+def _fail_second_steps(patch_table, monkeypatch, code: str) -> None:
+    """Let the first 50-bucket step of every claim commit and fail the remaining 10-bucket one with ``code``."""
+    original = patch_table.transact_write_items
+
+    def transact(TransactItems):  # noqa: N803
+        if len(TransactItems) == 20:  # noqa: PLR2004  (10 puts + 10 series checks)
+            raise ClientError({"Error": {"Code": code, "Message": code}}, "TransactWriteItems")
+        return original(TransactItems=TransactItems)
+
+    monkeypatch.setattr(patch_table, "transact_write_items", transact)
+
+
+def test_create_bookings_releases_committed_holds_when_the_claim_gives_up(patch_table, monkeypatch):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    with monkeypatch.context() as m:
+        _fail_second_steps(patch_table, m, "TransactionCanceledException")
+        result = dal.create_bookings([_payload(f"room-{i}", start) for i in range(60)])
+    assert result.created == []
+    assert set(result.errors.values()) == {dal.BOOKING_CONFLICT}
+    # The first step's holds were stripped again, so its slots are free
+    _create("room-0", start)
+
+
+def test_create_bookings_releases_committed_holds_when_a_step_fails(patch_table, monkeypatch):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    with monkeypatch.context() as m:
+        _fail_second_steps(patch_table, m, "InternalServerError")
+        with pytest.raises(ClientError):
+            dal.create_bookings([_payload(f"room-{i}", start) for i in range(60)])
+    assert patch_table.tables[dal._TABLE_NAME].items == {}
+    _create("room-0", start)
+
+
+def test_batch_reads_left_unprocessed_raise_a_retryable_error(patch_table, monkeypatch):
+    monkeypatch.setattr(dal, "_BATCH_RETRY_BASE_DELAY_SECONDS", 0)
+    monkeypatch.setattr(patch_table, "batch_get_item", lambda RequestItems: {"UnprocessedKeys": RequestItems})  # noqa: N803
+    with pytest.raises(dal.BatchUnprocessedError):
+        dal.get_bookings(["b-1"])
+
+
+def test_get_bookings_chunks_and_reports_missing(patch_table):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    created = dal.create_bookings([_payload(f"room-{i}", start) for i in range(dal._BATCH_WRITE_SIZE * 6)]).created
+    ids = [b.booking_id for b in created]
+    reads = []
+    original = patch_table.batch_get_item
+    patch_table.batch_get_item = lambda **kw: reads.append(kw) or original(**kw)
+    result = dal.get_bookings(["missing-1", *reversed(ids), ids[0], "missing-2"])
+    assert [b.booking_id for b in result.bookings] == list(reversed(ids))
+    assert result.not_found == ["missing-1", "missing-2"]
+    assert [len(r["RequestItems"][dal._TABLE_NAME]["Keys"]) for r in reads] == [100, 52]
+
+
+def _series(resource_id: str, start: datetime, count: int = 10, freq: str = "weekly") -> dal.BookingSeries:
+    payload = BookingSeriesCreate(
+        user_id="u-series",
+        resource_id=resource_id,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        recurrence=Recurrence(freq=freq, count=count),  # type: ignore[arg-type]
+    )
+    return dal.create_series(payload)
+
+
+def test_create_series_stores_one_item_and_lists_occurrences(patch_table):
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    series = _series("room-1", start, count=52)
+    assert len(patch_table.tables[dal._TABLE_NAME].items) == 1
+    assert dal.get_series(series.series_id).recurrence.count == 52  # noqa: PLR2004
+
+    listed = dal.list_bookings_for_user("u-series", start + timedelta(weeks=2), start + timedelta(weeks=4))
+    assert [b.start_time for b in listed] == [start + timedelta(weeks=w) for w in (2, 3, 4)]
+    assert all(b.series_id == series.series_id for b in listed)
+    assert len(dal.list_bookings_for_user("u-series")) == 52  # noqa: PLR2004
+
+
+def test_series_occurrences_merge_with_bookings_across_pages():
+    start = datetime(2030, 1, 1, 9, 0, tzinfo=UTC)
+    _series("room-1", start, count=5, freq="daily")
+    for day in range(5):
+        _create("room-2", start + timedelta(days=day, hours=3), user_id="u-series")
+    seen, cursor = [], None
+    while True:
+        page = dal.list_bookings_page("u-series", 3, cursor)
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    assert [b.start_time for b in seen] == sorted(b.start_time for b in seen)
+    assert len(seen) == 10  # noqa: PLR2004
+    assert len({b.booking_id for b in seen}) == 10  # noqa: PLR2004
+
+
+def test_series_and_bookings_conflict_both_ways():
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    _create("room-1", start + timedelta(weeks=3, minutes=30))
+    with pytest.raises(dal.BookingConflictError):
+        _series("room-1", start)
+    series = _series("room-1", start + timedelta(hours=2))
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-1", start + timedelta(weeks=5, hours=2, minutes=15))
+    with pytest.raises(dal.BookingConflictError):
+        _series("room-1", start + timedelta(days=7 * 4, hours=2, minutes=30), count=2)
+    result = dal.create_bookings([_payload("room-1", series.start_time + timedelta(weeks=1))])
+    assert result.errors == {0: dal.BOOKING_CONFLICT}
+    # Between occurrences, and after the series ends, the slot is free
+    _create("room-1", start + timedelta(days=1, hours=2))
+    _create("room-1", start + timedelta(weeks=10, hours=2))
+
+
+def test_series_rejects_invalid_rules():
+    start = datetime(2030, 1, 1, tzinfo=UTC)
+    with pytest.raises(ValueError, match="overlap"):
+        dal.create_series(
+            BookingSeriesCreate(
+                user_id="u",
+                resource_id="room-1",
+                start_time=start,
+                end_time=start + timedelta(days=2),
+                recurrence=Recurrence(freq="daily", count=3),
+            )
+        )
+    with pytest.raises(ValueError, match="occurrences"):
+        _series("room-1", start, count=1000, freq="daily")
+
+
+def test_get_occurrence_by_id_without_storing_it(patch_table):
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    series = _series("room-1", start)
+    occurrence = dal.list_bookings_for_user("u-series")[3]
+    fetched = dal.get_booking(occurrence.booking_id)
+    assert fetched == occurrence
+    assert fetched.start_time == start + timedelta(weeks=3)
+    assert len(patch_table.tables[dal._TABLE_NAME].items) == 1
+    with pytest.raises(KeyError):
+        dal.get_booking(f"{series.series_id}@{int((start + timedelta(hours=1)).timestamp())}")
+    with pytest.raises(KeyError):
+        dal.get_booking(series.series_id)
+
+
+def test_update_occurrence_materializes_it_and_frees_the_generated_slot(patch_table):
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    series = _series("room-1", start)
+    occurrence = dal.list_bookings_for_user("u-series")[2]
+    new_start = start + timedelta(weeks=2, hours=3)
+    moved = dal.update_booking(
+        occurrence.booking_id,
+        BookingUpdate(start_time=new_start, end_time=new_start + timedelta(hours=1), reminder_lead_seconds=600),
+    )
+    assert moved.booking_id == occurrence.booking_id
+    assert moved.series_id == series.series_id
+    assert moved.ttl is not None  # a stored occurrence can have its own reminder
+    assert dal.get_series(series.series_id).exceptions == [occurrence.start_time]
+    listed = dal.list_bookings_for_user("u-series")
+    assert len(listed) == 10  # noqa: PLR2004
+    assert [b.booking_id for b in listed].count(occurrence.booking_id) == 1
+    # The original slot is free now; the moved one is held by the stored booking
+    _create("room-1", occurrence.start_time)
+    with pytest.raises(dal.BookingConflictError):
+        _create("room-1", start + timedelta(weeks=2, hours=3, minutes=30))
+
+
+def test_cancel_and_delete_occurrences():
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    series = _series("room-1", start, count=3)
+    first, second, third = dal.list_bookings_for_user("u-series")
+    cancelled = dal.cancel_booking(first.booking_id)
+    assert cancelled.status == "cancelled"
+    assert dal.get_booking(first.booking_id).status == "cancelled"
+    dal.delete_booking(second.booking_id)
+    with pytest.raises(KeyError):
+        dal.get_booking(second.booking_id)
+    assert [b.booking_id for b in dal.list_bookings_for_user("u-series")] == [first.booking_id, third.booking_id]
+    assert len(dal.get_series(series.series_id).exceptions) == 2  # noqa: PLR2004
+    _create("room-1", second.start_time)
+
+
+def test_delete_series_frees_its_slots_and_keeps_materialized_occurrences():
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    series = _series("room-1", start, count=3)
+    first = dal.list_bookings_for_user("u-series")[0]
+    dal.cancel_booking(first.booking_id)
+    dal.delete_series(series.series_id)
+    with pytest.raises(KeyError):
+        dal.get_series(series.series_id)
+    assert [b.booking_id for b in dal.list_bookings_for_user("u-series")] == [first.booking_id]
+    _create("room-1", start + timedelta(weeks=1))
+    dal.delete_series(series.series_id)  # already gone: no-op
+
+
+def test_create_series_backs_out_when_a_booking_slips_in(patch_table):
+    start = datetime(2030, 1, 7, 9, 0, tzinfo=UTC)
+    original = patch_table.batch_get_item
+    raced = []
+
+    def racing_read(**kwargs):
+        resp = original(**kwargs)
+        if not raced:
+            # A single booking commits after the series' conflict check but before its rule is written
+            raced.append(True)
+            _create("room-1", start + timedelta(weeks=4))
+        return resp
+
+    patch_table.batch_get_item = racing_read
+    with pytest.raises(dal.BookingConflictError):
+        _series("room-1", start)
+    assert dal.list_bookings_for_user("u-series") == []
+    assert len(dal.list_bookings_for_user("u-res")) == 1
+
+
+def test_find_free_slots_from_schedule_buckets(patch_table):
+    day = datetime(2030, 1, 7, tzinfo=UTC)
+    _create("room-1", day + timedelta(hours=9))  # 09-10
+    _create("room-1", day + timedelta(hours=10, minutes=20))  # 10:20-11:20
+    _create("room-1", day + timedelta(hours=23), hours=2)  # spans midnight
+    cancelled = _create("room-1", day + timedelta(hours=14))
+    dal.cancel_booking(cancelled.booking_id)
+    _create("room-2", day + timedelta(hours=12))
+    _series("room-1", day + timedelta(hours=16), count=3, freq="daily")  # 16-17 each day
+
+    reads = []
+    original = patch_table.batch_get_item
+    patch_table.batch_get_item = lambda **kw: reads.append(kw) or original(**kw)
+    slots = dal.find_free_slots("room-1", day + timedelta(hours=8), day + timedelta(days=1, hours=18), 30 * 60)
+    assert len(reads) == 1
+    hour = timedelta(hours=1)
+    assert slots == [
+        (day + 8 * hour, day + 9 * hour),
+        # 10:00-10:20 is shorter than 30 minutes
+        (day + 11 * hour + timedelta(minutes=20), day + 16 * hour),
+        (day + 17 * hour, day + 23 * hour),
+        (day + 25 * hour, day + 40 * hour),
+        (day + 41 * hour, day + 42 * hour),
+    ]
+
+
+def test_find_free_slots_ignores_bookings_outside_the_window(patch_table):
+    day = datetime(2030, 1, 7, tzinfo=UTC)
+    _create("room-1", day + timedelta(hours=7))  # 07-08
+    _create("room-1", day + timedelta(hours=15))  # 15-16, same day bucket as the window
+    _create("room-1", day + timedelta(hours=11))  # 11-12, overlaps the window's end
+    hour = timedelta(hours=1)
+    slots = dal.find_free_slots("room-1", day + 10 * hour, day + 12 * hour)
+    assert slots == [(day + 10 * hour, day + 11 * hour)]
+    assert dal.find_free_slots("room-1", day + 9 * hour, day + 10 * hour) == [(day + 9 * hour, day + 10 * hour)]
+
+
+def test_find_free_slots_rejects_bad_windows():
+    start = datetime(2030, 1, 1, tzinfo=UTC)
+    with pytest.raises(ValueError, match="after"):
+        dal.find_free_slots("room-1", start, start)
+    with pytest.raises(ValueError, match="span"):
+        dal.find_free_slots("room-1", start, start + timedelta(days=dal._MAX_BOOKING_DAYS + 1))
+    assert dal.find_free_slots("room-1", start, start + timedelta(hours=1)) == [(start, start + timedelta(hours=1))]
+
+
+@pytest.fixture()
+def booking_cache(monkeypatch):
+    cache = TTLCache[Booking](max_size=10, ttl_seconds=60)
+    monkeypatch.setattr(dal, "booking_cache", cache)
+    return cache
+
+
+def test_get_booking_is_served_from_cache_until_local_write(slow_dynamodb, booking_cache):
+    booking = _create("room-1", datetime(2030, 1, 1, 12, 0, tzinfo=UTC))
+    slow_dynamodb.clear()
+    for _ in range(5):
+        assert dal.get_booking(booking.booking_id) == booking
+    assert slow_dynamodb["get_item"] == 1
+    assert (booking_cache.hits, booking_cache.misses) == (4, 1)
+
+    dal.update_booking(booking.booking_id, BookingUpdate(reminder_lead_seconds=600))
+    assert dal.get_booking(booking.booking_id).reminder_lead_seconds == 600  # noqa: PLR2004
+    dal.cancel_booking(booking.booking_id)
+    assert dal.get_booking(booking.booking_id).status == "cancelled"
+    dal.delete_booking(booking.booking_id)
+    with pytest.raises(KeyError):
+        dal.get_booking(booking.booking_id)
+
+
+def test_consistent_get_bypasses_cache(slow_dynamodb, booking_cache):
+    booking = _create("room-1", datetime(2030, 1, 1, 12, 0, tzinfo=UTC))
+    dal.get_booking(booking.booking_id)
+    slow_dynamodb.clear()
+    dal.get_booking(booking.booking_id, consistent=True)
+    assert slow_dynamodb["get_item"] == 1
+    # Returned copies are independent of the cached entry
+    dal.get_booking(booking.booking_id).status = "cancelled"
+    assert dal.get_booking(booking.booking_id).status == "active"
+
+
+def test_every_write_bumps_the_version(patch_table):
+    start = datetime(2030, 1, 1, 12, 0, tzinfo=UTC)
+    b = _create("room-1", start)
+    assert b.version == dal.get_booking(b.booking_id).version == 1
+    assert dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=600)).version == 2  # noqa: PLR2004
+    moved = dal.update_booking(
+        b.booking_id, BookingUpdate(start_time=start + timedelta(hours=2), end_time=start + timedelta(hours=3))
+    )
+    assert moved.version == dal.get_booking(b.booking_id).version == 3  # noqa: PLR2004
+    assert dal.cancel_booking(b.booking_id).version == dal.get_booking(b.booking_id).version == 4  # noqa: PLR2004
+    # Items written before versions existed count as version 0
+    del patch_table.tables[dal._TABLE_NAME].items[(b.booking_id,)]["version"]
+    assert dal.get_booking_version(b.booking_id) == dal.get_booking(b.booking_id).version == 0
+    assert dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=300), expected_version=0).version == 1
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        BookingUpdate(),
+        BookingUpdate(reminder_lead_seconds=600),
+        BookingUpdate(end_time=datetime(2030, 1, 1, 13, 45, tzinfo=UTC)),
+        BookingUpdate(start_time=datetime(2030, 1, 1, 12, 30, tzinfo=UTC)),
+    ],
+)
+def test_update_with_expected_version_rejects_lost_updates(payload):
+    b = _create("room-1", datetime(2030, 1, 1, 12, 0, tzinfo=UTC))
+    dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=120))
+    with pytest.raises(dal.BookingVersionMismatchError):
+        dal.update_booking(b.booking_id, payload, expected_version=1)
+    assert dal.get_booking(b.booking_id).reminder_lead_seconds == 120  # noqa: PLR2004
+    # An empty update writes nothing, so the version only moves for the others
+    assert dal.update_booking(b.booking_id, payload, expected_version=2).version == 2 + bool(payload.model_fields_set)
+    with pytest.raises(KeyError):
+        dal.update_booking("missing", payload, expected_version=1)
+
+
+def test_move_with_expected_version_loses_to_a_concurrent_write(monkeypatch):
+    b = _create("room-1", datetime(2030, 1, 1, 12, 0, tzinfo=UTC))
+    read_schedule = dal._read_schedule
+
+    def racing(keys):
+        # Another request updates the booking after ours read it, before our transaction
+        monkeypatch.setattr(dal, "_read_schedule", read_schedule)
+        dal.update_booking(b.booking_id, BookingUpdate(reminder_lead_seconds=120))
+        return read_schedule(keys)
+
+    monkeypatch.setattr(dal, "_read_schedule", racing)
+    with pytest.raises(dal.BookingVersionMismatchError):
+        dal.update_booking(b.booking_id, BookingUpdate(end_time=datetime(2030, 1, 1, 13, 30, tzinfo=UTC)), 1)
+    assert dal.get_booking(b.booking_id).end_time == b.end_time
+
+
+def test_cancel_with_expected_version():
+    b = _create("room-1", datetime(2030, 1, 1, 12, 0, tzinfo=UTC))
+    with pytest.raises(dal.BookingVersionMismatchError):
+        dal.cancel_booking(b.booking_id, expected_version=2)
+    assert dal.get_booking(b.booking_id).status == "active"
+    assert dal.cancel_booking(b.booking_id, expected_version=1).version == 2  # noqa: PLR2004
+    with pytest.raises(KeyError):
+        dal.cancel_booking("missing", expected_version=1)
+
+
+def test_booking_version_is_served_from_cache_until_local_write(slow_dynamodb, monkeypatch):
+    cache = TTLCache[int](max_size=10, ttl_seconds=60)
+    monkeypatch.setattr(dal, "version_cache", cache)
+    b = _create("room-1", datetime(2030, 1, 1, 12, 0, tzinfo=UTC))
+    slow_dynamodb.clear()
+    assert [dal.get_booking_version(b.booking_id) for _ in range(3)] == [1, 1, 1]
+    assert slow_dynamodb["get_item"] == 1
+    assert dal.get_booking_version(b.booking_id, consistent=True) == 1
+    assert slow_dynamodb["get_item"] == 2  # noqa: PLR2004
+
+    dal.cancel_booking(b.booking_id)
+    assert dal.get_booking_version(b.booking_id) == 2  # noqa: PLR2004
+    assert dal.get_booking_version("missing") is None
+
+
+def test_export_reads_every_page_ahead_and_merges_occurrences(slow_dynamodb, monkeypatch):
+    monkeypatch.setattr(dal, "_EXPORT_PAGE_SIZE", 2)
+    start = datetime(2030, 1, 1, 9, 0, tzinfo=UTC)
+    _series("room-1", start, count=3, freq="daily")
+    for day in range(5):
+        _create("room-2", start + timedelta(days=day, hours=3), user_id="u-series")
+    expected = dal.list_bookings_for_user("u-series")
+    slow_dynamodb.clear()
+
+    exported = dal.export_bookings("user_id", "u-series")
+    # Only the series are read up front; the stored bookings when the export is consumed
+    assert slow_dynamodb["query"] == 1
+    first = next(exported)
+    # The first page, and the second one read on the worker while the first is consumed
+    deadline = time.monotonic() + 1
+    while slow_dynamodb["query"] < 3 and time.monotonic() < deadline:  # noqa: PLR2004
+        time.sleep(0.001)
+    assert slow_dynamodb["query"] == 3  # noqa: PLR2004
+    assert [first, *exported] == expected
+    # Three pages of stored bookings; the last one comes back without a LastEvaluatedKey
+    assert slow_dynamodb["query"] == 1 + 3
+
+
+def test_export_of_a_resource_and_resuming_it(monkeypatch):
+    monkeypatch.setattr(dal, "_EXPORT_PAGE_SIZE", 2)
+    start = datetime(2030, 1, 1, 9, 0, tzinfo=UTC)
+    series = _series("room-1", start, count=3, freq="daily")
+    cancelled = _create("room-1", start + timedelta(hours=3), user_id="u-a")
+    dal.cancel_booking(cancelled.booking_id)
+    booked = [_create("room-1", start + timedelta(days=day, hours=2), user_id=f"u-{day}") for day in range(3)]
+    _create("room-2", start, user_id="u-a")
+
+    exported = list(dal.export_bookings("resource_id", "room-1"))
+    assert [b.start_time for b in exported] == sorted(b.start_time for b in exported)
+    assert len(exported) == 7  # noqa: PLR2004
+    assert sum(b.series_id == series.series_id for b in exported) == 3  # noqa: PLR2004
+
+    active = list(dal.export_bookings("resource_id", "room-1", status="active"))
+    assert cancelled.booking_id not in {b.booking_id for b in active}
+    assert [b.booking_id for b in dal.export_bookings("resource_id", "room-1", status="cancelled")] == [
+        cancelled.booking_id
+    ]
+
+    cursor = dal.export_cursor("resource_id", "room-1", booked[0])
+    resumed = [b.booking_id for b in exported].index(booked[0].booking_id) + 1
+    assert list(dal.export_bookings("resource_id", "room-1", cursor=cursor)) == exported[resumed:]
+    with pytest.raises(ValueError, match="cursor"):
+        dal.export_bookings("resource_id", "room-2", cursor=cursor)
+    with pytest.raises(ValueError, match="cursor"):
+        dal.export_bookings("user_id", "room-1", cursor=cursor)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app import archive, dal, dal_async, user_summary
+from app.memory_backend import MemoryDynamoDB
+from app.models import BookingCreate, BookingUpdate
+
+NOW = datetime(2030, 6, 1, tzinfo=UTC)
+
+
+@pytest.fixture()
+def store(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[archive.LocalStore]:
+    monkeypatch.setattr(archive, "ARCHIVE_PATH", str(tmp_path / "archive"))
+    archive.store.cache_clear()
+    yield archive.store()  # type: ignore[misc]
+    archive.store.cache_clear()
+
+
+def _create(user_id: str, start: datetime, resource_id: str = "room-1") -> dal.Booking:
+    payload = BookingCreate(
+        user_id=user_id,
+        resource_id=resource_id,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        reminder_lead_seconds=600,
+    )
+    return dal.create_booking(payload)
+
+
+def _all_pages(user_id: str, limit: int, **kwargs: Any) -> list[str]:
+    ids: list[str] = []
+    cursor = None
+    while True:
+        page = dal.list_bookings_page(user_id, limit, cursor, include_archived=True, **kwargs)
+        ids.extend(b.booking_id for b in page.items)
+        if page.next_cursor is None:
+            return ids
+        cursor = page.next_cursor
+
+
+def _stored_ids(engine: MemoryDynamoDB) -> set[str]:
+    return {item["booking_id"]["S"] for item in engine.scan(TableName=dal._TABLE_NAME)["Items"]}
+
+
+def test_past_bookings_move_to_the_archive_and_stay_listable(fake_dynamodb, store):
+    # Two a month from January to April, then two that have not ended long enough ago
+    starts = [datetime(2030, month, day, 9, tzinfo=UTC) for month in (1, 2, 3, 4) for day in (10, 20)]
+    old = [_create("u-1", start) for start in starts]
+    recent = [_create("u-1", NOW + timedelta(days=day)) for day in (-10, 3)]
+    other = _create("u-2", starts[0], "room-2")
+    old[2] = dal.cancel_booking(old[2].booking_id)
+    old[3] = dal.update_booking(old[3].booking_id, BookingUpdate(reminder_lead_seconds=60))
+
+    assert dal.archive_bookings(30, now=NOW) == len(old) + 1
+    assert _stored_ids(fake_dynamodb) == {b.booking_id for b in recent}
+    assert len(store.keys("bookings/")) == 4  # noqa: PLR2004
+    assert all(key.startswith("bookings/month=2030-0") for key in store.keys("bookings/"))
+
+    assert [b.booking_id for b in dal.list_bookings_for_user("u-1")] == [b.booking_id for b in recent]
+    page = dal.list_bookings_page("u-1", 50, include_archived=True)
+    assert page.next_cursor is None
+    # Read back exactly as they were stored, including the cancellation and the update
+    assert page.items[: len(old)] == old
+    assert [b.booking_id for b in page.items[len(old) :]] == [b.booking_id for b in recent]
+
+    # Pages cross from the archive into the table and back out without skipping or repeating anything
+    expected = [b.booking_id for b in [*old, *recent]]
+    assert _all_pages("u-1", 3) == expected
+    assert _all_pages("u-1", 1) == expected
+    assert _all_pages("u-1", 2, status="cancelled") == [old[2].booking_id]
+    window = _all_pages("u-1", 2, start_from=starts[3], start_to=recent[0].start_time)
+    assert window == [b.booking_id for b in [*old[3:], recent[0]]]
+    assert dal.list_bookings_page("u-2", 5, include_archived=True).items[0].booking_id == other.booking_id
+
+    # A private loop: asyncio.run would leave the main thread without the current loop Mangum expects
+    loop = asyncio.new_event_loop()
+    try:
+        async_page = loop.run_until_complete(
+            dal_async.list_bookings_page("u-1", 3, status="active", include_archived=True)
+        )
+    finally:
+        loop.close()
+    assert async_page == dal.list_bookings_page("u-1", 3, status="active", include_archived=True)
+
+    # Nothing left to archive
+    assert dal.archive_bookings(30, now=NOW) == 0
+    assert len(store.keys("bookings/")) == 4  # noqa: PLR2004
+
+
+def test_bookings_changed_while_archiving_stay_in_the_table(fake_dynamodb, store, monkeypatch):
+    kept, archived = (_create("u-1", datetime(2030, 1, day, 9, tzinfo=UTC)) for day in (10, 11))
+    write = archive.write
+
+    def write_then_cancel(*args: Any) -> str:
+        key = write(*args)
+        # A user cancels between the file being written and the bookings being deleted
+        if len(args[2]) == 2:  # noqa: PLR2004
+            dal.cancel_booking(kept.booking_id)
+        return key
+
+    monkeypatch.setattr(archive, "write", write_then_cancel)
+    assert dal.archive_bookings(30, now=NOW) == 1
+    assert _stored_ids(fake_dynamodb) == {kept.booking_id}
+    stored = fake_dynamodb.get_item(TableName=dal._TABLE_NAME, Key={"booking_id": {"S": kept.booking_id}})["Item"]
+    assert user_summary.ARCHIVED not in stored
+    # The first file was replaced by one without the cancelled booking
+    assert len(store.keys("bookings/")) == 1
+    assert [item["booking_id"] for item in archive.read(store, "u-1")] == [archived.booking_id]
+    page = dal.list_bookings_page("u-1", 5, include_archived=True)
+    assert [(b.booking_id, b.status) for b in page.items] == [
+        (kept.booking_id, "cancelled"),
+        (archived.booking_id, "active"),
+    ]
+
+
+class CountingStore(archive.LocalStore):
+    def __init__(self, root: Path) -> None:
+        super().__init__(root)
+        self.reads: Counter[str] = Counter()
+        self.listed: list[str] = []
+
+    def keys(self, prefix: str) -> list[str]:
+        self.listed.append(prefix)
+        return super().keys(prefix)
+
+    def read(self, key: str, offset: int, length: int) -> bytes:
+        self.reads[key.split("/")[1]] += 1
+        return super().read(key, offset, length)
+
+
+def _item(user: int, start: datetime, **extra: Any) -> dict[str, Any]:
+    return {
+        "booking_id": f"b-{user}-{start:%m%d%H}",
+        "user_id": f"u-{user:02}",
+        "resource_id": f"room-{user % 3}",
+        "start_time": start.isoformat(),
+        "end_time": (start + timedelta(minutes=45)).isoformat(),
+        "status": "active",
+        "version": 1,
+        **extra,
+    }
+
+
+def test_reads_only_touch_the_months_groups_and_columns_that_can_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "_GROUP_ROWS", 24)
+    counting = CountingStore(tmp_path)
+    for month in (1, 2, 3):
+        items = [
+            _item(user, datetime(2030, month, 1, 8, tzinfo=UTC) + timedelta(hours=h))
+            for user in range(10)
+            for h in range(12)
+        ]
+        archive.write(counting, f"2030-{month:02}", items)
+
+    start = datetime(2030, 2, 1, 12, tzinfo=UTC)
+    found = list(archive.read(counting, "u-04", start, start + timedelta(hours=3)))
+    assert [item["start_time"] for item in found] == [(start + timedelta(hours=h)).isoformat() for h in range(4)]
+    # January and March are never opened; of February's five groups only the one holding u-04 is read:
+    # header size and header, then the user, start, status and remaining seven columns
+    assert counting.reads == {"month=2030-02": 2 + 10}
+    assert counting.listed == ["bookings/month=2030-02/"]
+
+    counting.reads.clear()
+    assert list(archive.read(counting, "u-04", start, start, status="cancelled")) == []
+    # The status column rules every row out, so the other columns stay unread
+    assert counting.reads == {"month=2030-02": 2 + 3}
+
+    counting.reads.clear()
+    assert list(archive.read(counting, "u-99")) == []
+    # Only the three headers: no group's user range contains u-99
+    assert counting.reads == {f"month=2030-0{month}": 2 for month in (1, 2, 3)}
+
+
+def test_files_round_trip_every_field_and_keep_the_latest_copy(tmp_path):
+    local = archive.LocalStore(tmp_path)
+    start = datetime(2030, 1, 31, 23, 30, 0, 250, tzinfo=UTC)
+    first = _item(1, start, ttl=1_895_000_000, reminder_lead_seconds=600, series_id="s-1")
+    plain = _item(1, start + timedelta(hours=1), status="cancelled", version=0)
+    archive.write(local, "2030-01", [first, plain])
+    # A rerun archived the booking again after a later update
+    archive.write(local, "2030-01", [{**first, "version": 3, "reminder_lead_seconds": 60}])
+
+    assert list(archive.read(local, "u-01")) == [{**first, "version": 3, "reminder_lead_seconds": 60}, plain]
+    assert list(archive.read(local, "u-01", after=(first["start_time"], first["booking_id"]))) == [plain]
+    assert local.keys("elsewhere/") == []
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BENCH = Path(__file__).resolve().parents[1] / "tools" / "dev" / "bench.py"
+
+
+def test_bench_drives_every_route_without_errors(tmp_path: Path) -> None:
+    output = tmp_path / "bench.json"
+    args = ["--requests", "3", "--warmup", "1", "--stream-batches", "2", "--batch-size", "5"]
+    latency = ["--ddb-latency-ms", "0", "--events-latency-ms", "0"]
+    subprocess.run([sys.executable, str(BENCH), *args, *latency, "--output", str(output)], check=True)
+    results = json.loads(output.read_text())
+    routes = results["routes"]
+    assert "POST /bookings" in routes
+    assert "stream REMOVE batch" in routes
+    assert all(r["errors"] == 0 for r in routes.values())
+    assert routes["GET /health"]["dynamodb_calls_per_request"] == 0
+    # Five reminders per batch fit in one PutEvents call
+    assert routes["stream REMOVE batch"]["eventbridge_calls_per_request"] == 1
+    for route in routes.values():
+        assert route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"]
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app import dal
+from app.models import Booking, BookingCreate
+
+REQUESTS = 25
+
+
+def _payload(i: int) -> BookingCreate:
+    start = datetime(2030, 1, 1, tzinfo=UTC) + timedelta(hours=i)
+    end = start + timedelta(minutes=30)
+    return BookingCreate(user_id="u-bench", resource_id="r-bench", start_time=start, end_time=end)
+
+
+def _create_with_read_back(payload: BookingCreate) -> Booking:
+    # The previous implementation: write, then read the item straight back
+    booking = dal.create_booking(payload)
+    return dal.get_booking(booking.booking_id)
+
+
+def _run(create, calls: Counter[str], first: int = 0) -> tuple[float, float]:
+    calls.clear()
+    started = time.perf_counter()
+    for i in range(first, first + REQUESTS):
+        create(_payload(i))
+    elapsed = time.perf_counter() - started
+    return sum(calls.values()) / REQUESTS, elapsed / REQUESTS * 1000
+
+
+def test_create_booking_skips_read_after_write(slow_dynamodb: Counter[str]) -> None:
+    before_calls, _ = _run(_create_with_read_back, slow_dynamodb)
+    after_calls, _ = _run(dal.create_booking, slow_dynamodb, REQUESTS)
+    # The schedule bucket read, then one transaction writing the booking with it; nothing read back
+    assert after_calls == 2  # noqa: PLR2004
+    assert slow_dynamodb["get_item"] == 0
+    assert after_calls < before_calls
+
+
+@pytest.mark.benchmark
+def test_create_booking_is_faster_without_the_read_back(slow_dynamodb: Counter[str]) -> None:
+    _, before_ms = _run(_create_with_read_back, slow_dynamodb)
+    _, after_ms = _run(dal.create_booking, slow_dynamodb, REQUESTS)
+    assert after_ms < before_ms, f"create_booking: before {before_ms:.2f} ms, after {after_ms:.2f} ms"
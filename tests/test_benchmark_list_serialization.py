@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from pydantic import TypeAdapter
+
+from app import dal
+from app.api import ModelJSONResponse
+from app.models import Booking
+
+ITEMS = 1000
+ROUNDS = 5
+_BOOKINGS = TypeAdapter(list[Booking])
+
+
+def _items() -> list[dal.BookingItem]:
+    start = datetime(2030, 1, 1, tzinfo=UTC)
+    return [
+        {
+            "booking_id": f"b-{i}",
+            "user_id": "u-bench",
+            "resource_id": f"r-{i % 7}",
+            "start_time": dal._dt_to_iso(start + timedelta(hours=i)),
+            "end_time": dal._dt_to_iso(start + timedelta(hours=i, minutes=30)),
+            "ttl": int((start + timedelta(hours=i)).timestamp()) - 900,
+            "reminder_lead_seconds": 900,
+        }
+        for i in range(ITEMS)
+    ]
+
+
+def _validated_model(item: dal.BookingItem) -> Booking:
+    # The previous _to_model: a full validating constructor
+    return Booking(
+        booking_id=item["booking_id"],
+        user_id=item["user_id"],
+        resource_id=item["resource_id"],
+        start_time=dal._iso_to_dt(item["start_time"]),
+        end_time=dal._iso_to_dt(item["end_time"]),
+        ttl=item.get("ttl"),
+        reminder_lead_seconds=dal._reminder_lead(item),
+        status=item.get("status", "active"),  # type: ignore[arg-type]
+    )
+
+
+def _before(items: list[dal.BookingItem]) -> bytes:
+    models = [_validated_model(it) for it in items]
+    # What FastAPI does with response_model=list[Booking]: dump, validate again, dump to JSON types, json.dumps
+    validated = _BOOKINGS.validate_python([m.model_dump() for m in models])
+    content = _BOOKINGS.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def _after(items: list[dal.BookingItem]) -> bytes:
+    return bytes(ModelJSONResponse(dal._to_models(items)).body)
+
+
+def _us_per_item(convert: Callable[[list[dal.BookingItem]], bytes], items: list[dal.BookingItem]) -> float:
+    convert(items)
+    best = min(_timed(convert, items) for _ in range(ROUNDS))
+    return best / len(items) * 1e6
+
+
+def _timed(convert: Callable[[list[dal.BookingItem]], bytes], items: list[dal.BookingItem]) -> float:
+    started = time.perf_counter()
+    convert(items)
+    return time.perf_counter() - started
+
+
+def test_trusted_models_and_direct_json_render_the_same_bytes() -> None:
+    items = _items()
+    assert _after(items) == _before(items)
+
+
+@pytest.mark.benchmark
+def test_trusted_models_and_direct_json_cut_per_item_cost() -> None:
+    items = _items()
+    before_us, after_us = _us_per_item(_before, items), _us_per_item(_after, items)
+    assert after_us < before_us, f"{ITEMS}-item list: before {before_us:.2f} us/item, after {after_us:.2f} us/item"
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+import pytest
+
+import app.stream_processor as sp
+from app.aws import serialize
+
+ROUNDS = 5
+_TTL_IDENTITY = {"type": "Service", "principalId": "dynamodb.amazonaws.com"}
+# Per ten records on the bookings stream: writes and updates dominate, a few are deletes, some of them by TTL
+_MIX = ["INSERT"] * 4 + ["MODIFY"] * 3 + ["DELETE"] + ["TTL"] * 2
+
+
+def _image(i: int) -> dict[str, Any]:
+    return serialize(
+        {
+            "booking_id": f"b-{i}",
+            "user_id": f"u-{i % 20}",
+            "resource_id": f"r-{i % 7}",
+            "start_time": "2030-01-01T12:00:00Z",
+            "end_time": "2030-01-01T13:00:00Z",
+            "ttl": 1_893_498_300 + i,
+            "reminder_lead_seconds": 900,
+            "status": "active",
+            "gsi1pk": f"USER#u-{i % 20}",
+            "gsi1sk": f"2030-01-01T12:00:00Z#b-{i}",
+        }
+    )
+
+
+def _record(i: int) -> dict[str, Any]:
+    kind = _MIX[i % len(_MIX)]
+    image = _image(i)
+    ddb: dict[str, Any] = {"SequenceNumber": str(i), "Keys": {"booking_id": image["booking_id"]}}
+    if kind in ("MODIFY", "DELETE", "TTL"):
+        ddb["OldImage"] = image
+    if kind in ("INSERT", "MODIFY"):
+        ddb["NewImage"] = image
+    record = {"eventName": "REMOVE" if kind in ("DELETE", "TTL") else kind, "dynamodb": ddb}
+    if kind == "TTL":
+        record["userIdentity"] = _TTL_IDENTITY
+    return record
+
+
+def _before(records: list[dict[str, Any]]) -> list[sp.PendingEntry]:
+    # The previous handler loop: every REMOVE decoded attribute by attribute, each event logged at INFO
+    pending: list[sp.PendingEntry] = []
+    for record in records:
+        if record.get("eventName") != "REMOVE":
+            continue
+        ddb = record.get("dynamodb", {})
+        old_image = ddb.get("OldImage", {})
+        booking_id = old_image.get("booking_id", {}).get("S")
+        user_id = old_image.get("user_id", {}).get("S")
+        n = old_image.get("ttl", {}).get("N")
+        ttl = int(n) if isinstance(n, str) and n.isdigit() else None
+        if not booking_id or not user_id or ttl is None:
+            continue
+        sp.logger.info("Emitting reminder event", extra={"booking_id": booking_id, "user_id": user_id, "ttl": ttl})
+        pending.append((ddb.get("SequenceNumber"), sp.reminder_entry(booking_id, user_id, ttl)))
+    return pending
+
+
+def _after(records: list[dict[str, Any]]) -> list[sp.PendingEntry]:
+    pending = [
+        (r.sequence_number, sp.reminder_entry(r.booking_id, r.user_id, r.ttl)) for r in sp.decode_reminders(records)
+    ]
+    sp.logger.info("Emitting reminder events", extra={"count": len(pending)})
+    return pending
+
+
+def _us_per_record(run: Callable[[list[dict[str, Any]]], Any], records: list[dict[str, Any]]) -> float:
+    repeats = max(1, 2000 // len(records))
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(repeats):
+            run(records)
+        best = min(best, time.perf_counter() - started)
+    return best / repeats / len(records) * 1e6
+
+
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_stream_decoding_keeps_only_ttl_removals(size: int) -> None:
+    records = [_record(i) for i in range(size)]
+    before_pending, after_pending = _before(records), _after(records)
+    # User deletes no longer produce reminders; TTL removals produce the same events as before
+    ttl_removals = {r["dynamodb"]["SequenceNumber"] for r in records if "userIdentity" in r}
+    assert after_pending == [(seq, entry) for seq, entry in before_pending if seq in ttl_removals]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("size", [10, 100, 1000])
+def test_stream_decoding_filters_before_decoding(size: int) -> None:
+    records = [_record(i) for i in range(size)]
+    before_us, after_us = _us_per_record(_before, records), _us_per_record(_after, records)
+    message = f"stream decoding ({size} records): before {before_us:.2f} us/record, after {after_us:.2f} us/record"
+    assert after_us < before_us, message
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+from collections import Counter
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from app import dal
+from app.models import Booking, BookingCreate, BookingUpdate
+
+REQUESTS = 25
+START = datetime(2030, 1, 1, tzinfo=UTC)
+
+
+def _update_after_read(booking_id: str, payload: BookingUpdate) -> Booking:
+    # The previous implementation: read the booking to preserve its TTL, then update it
+    dal.get_booking(booking_id)
+    return dal.update_booking(booking_id, payload)
+
+
+def _reminders(lead: int):
+    # An unchanged lead is not written in place, so each run needs leads the bookings do not have yet
+    def payload(i: int) -> BookingUpdate:
+        return BookingUpdate(reminder_lead_seconds=lead + i)
+
+    return payload
+
+
+def _rescheduler(days: int):
+    # Moves every booking to a slot it has not held yet, so each update takes the transaction path
+    def payload(i: int) -> BookingUpdate:
+        start = START + timedelta(days=days, minutes=i)
+        return BookingUpdate(start_time=start, end_time=start + timedelta(hours=1))
+
+    return payload
+
+
+def _run(update, booking_ids: list[str], calls: Counter[str], payload) -> tuple[float, float]:
+    calls.clear()
+    timings = []
+    for i, booking_id in enumerate(booking_ids):
+        started = time.perf_counter()
+        update(booking_id, payload(i))
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return sum(calls.values()) / len(booking_ids), timings[len(timings) // 2] * 1000
+
+
+def _bookings() -> list[str]:
+    end = START + timedelta(hours=1)
+    return [
+        dal.create_booking(BookingCreate(user_id="u-bench", resource_id=f"r-{i}", start_time=START, end_time=end))
+        .booking_id
+        for i in range(REQUESTS)
+    ]
+
+
+def test_update_booking_reminder_is_one_round_trip(slow_dynamodb: Counter[str]) -> None:
+    after_calls, _ = _run(dal.update_booking, _bookings(), slow_dynamodb, _reminders(600))
+    assert after_calls == 1
+    assert slow_dynamodb["get_item"] == 0
+
+
+@pytest.mark.benchmark
+def test_update_booking_reminder_is_faster_without_the_read(slow_dynamodb: Counter[str]) -> None:
+    booking_ids = _bookings()
+    _, before_p50 = _run(_update_after_read, booking_ids, slow_dynamodb, _reminders(600))
+    _, after_p50 = _run(dal.update_booking, booking_ids, slow_dynamodb, _reminders(1200))
+    assert after_p50 < before_p50, f"update_booking: before p50 {before_p50:.2f} ms, after p50 {after_p50:.2f} ms"
+
+
+def test_update_booking_reschedule_is_three_round_trips(slow_dynamodb: Counter[str]) -> None:
+    after_calls, _ = _run(dal.update_booking, _bookings(), slow_dynamodb, _rescheduler(1))
+    # The current interval, the schedule slots it moves into, then the booking and its schedule entries moved in
+    # one transaction
+    assert after_calls == 3  # noqa: PLR2004
+    assert slow_dynamodb == {"get_item": REQUESTS, "batch_get_item": REQUESTS, "transact_write_items": REQUESTS}
+
+
+@pytest.mark.benchmark
+def test_update_booking_reschedule_is_faster_without_the_extra_read(slow_dynamodb: Counter[str]) -> None:
+    booking_ids = _bookings()
+    _, before_p50 = _run(_update_after_read, booking_ids, slow_dynamodb, _rescheduler(1))
+    _, after_p50 = _run(dal.update_booking, booking_ids, slow_dynamodb, _rescheduler(2))
+    assert after_p50 < before_p50, f"reschedule: before p50 {before_p50:.2f} ms, after p50 {after_p50:.2f} ms"
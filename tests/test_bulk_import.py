@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import csv
+import json
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app import bulk_import, dal
+from app.memory_backend import MemoryDynamoDB
+
+START = datetime(2030, 1, 1, tzinfo=UTC)
+
+
+def _rows(count: int, resources: int = 5) -> list[dict[str, Any]]:
+    rows = []
+    for i in range(count):
+        start = START + timedelta(hours=i // resources)
+        rows.append(
+            {
+                "user_id": f"u-{i % 7}",
+                "resource_id": f"room-{i % resources}",
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(minutes=30)).isoformat(),
+                "reminder_lead_seconds": 600,
+            }
+        )
+    return rows
+
+
+def _write_csv(path: Path, rows: list[dict[str, Any]]) -> Path:
+    with path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def _write_ndjson(path: Path, rows: list[dict[str, Any]]) -> Path:
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    return path
+
+
+def _import(capsys: pytest.CaptureFixture[str], *argv: str) -> tuple[int, dict[str, Any]]:
+    code = bulk_import.main([*argv, "--rate", "100000"])
+    return code, json.loads(capsys.readouterr().out)
+
+
+def _stored(engine: MemoryDynamoDB) -> list[dict[str, Any]]:
+    return engine.scan(TableName=dal._TABLE_NAME)["Items"]
+
+
+def test_import_writes_valid_rows_and_rejects_the_rest(fake_dynamodb, tmp_path, capsys):
+    rows = _rows(100)
+    rows[10]["user_id"] = ""
+    rows[20]["reminder_lead_seconds"] = ""
+    # Overlaps row 0 on the same resource
+    rows[30] = {**rows[0], "user_id": "u-late"}
+    source = _write_csv(tmp_path / "bookings.csv", rows)
+
+    code, report = _import(capsys, str(source), "--workers", "3", "--batch-size", "8")
+    assert code == 1
+    assert (report["read"], report["imported"], report["rejected"], report["skipped"]) == (100, 98, 2, 0)
+    assert report["rows_per_second"] > 0
+
+    stored = _stored(fake_dynamodb)
+    assert len(stored) == 98  # noqa: PLR2004
+    reminders = {item["user_id"]["S"] + item["start_time"]["S"]: item.get("ttl") for item in stored}
+    # The reminder's time is the booking's TTL, as for bookings created through the API
+    assert reminders[rows[0]["user_id"] + rows[0]["start_time"]] == {"N": str(int(START.timestamp()) - 600)}
+    assert reminders[rows[20]["user_id"] + rows[20]["start_time"]] is None
+    assert len(dal.list_bookings_for_user("u-0")) == len([row for row in rows if row["user_id"] == "u-0"])
+
+    rejects = [json.loads(line) for line in (tmp_path / "bookings.csv.rejects.ndjson").read_text().splitlines()]
+    assert sorted((reject["row"], reject["user_id"]) for reject in rejects) == [(11, None), (31, "u-late")]
+    assert {reject["row"]: reject["error"] for reject in rejects}[31] == dal.BOOKING_CONFLICT
+
+
+def test_interrupted_import_resumes_from_the_checkpoint(fake_dynamodb, tmp_path, capsys, monkeypatch):
+    source = _write_ndjson(tmp_path / "bookings.ndjson", _rows(60))
+    create_bookings = dal.create_bookings
+    calls = []
+
+    def failing(payloads, booking_ids=None):
+        calls.append(len(payloads))
+        if len(calls) == 4:  # noqa: PLR2004
+            raise ClientError({"Error": {"Code": "InternalServerError"}}, "BatchWriteItem")
+        return create_bookings(payloads, booking_ids)
+
+    monkeypatch.setattr(dal, "create_bookings", failing)
+    with pytest.raises(ClientError):
+        bulk_import.main([str(source), "--workers", "2", "--batch-size", "5"])
+    written = len(_stored(fake_dynamodb))
+    assert 0 < written < 60  # noqa: PLR2004
+
+    monkeypatch.setattr(dal, "create_bookings", create_bookings)
+    code, report = _import(capsys, str(source), "--workers", "2", "--batch-size", "5")
+    assert code == 0
+    assert (report["skipped"], report["imported"], report["rejected"]) == (written, 60 - written, 0)
+    # Nothing was written twice (a second copy would also have been rejected as a conflict)
+    assert len(_stored(fake_dynamodb)) == 60  # noqa: PLR2004
+    assert not (tmp_path / "bookings.ndjson.rejects.ndjson").read_text()
+
+    _, again = _import(capsys, str(source))
+    assert (again["skipped"], again["imported"]) == (60, 0)
+    with pytest.raises(SystemExit):
+        bulk_import.main([str(tmp_path / "other.ndjson"), "--checkpoint", str(tmp_path / "bookings.ndjson.checkpoint")])
+
+
+def test_unprocessed_rows_are_resubmitted_at_a_lower_rate(fake_dynamodb, tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(dal, "_MAX_BATCH_ATTEMPTS", 1)
+    batch_write_item = fake_dynamodb.batch_write_item
+    throttled = []
+
+    def first_call_unprocessed(**params):
+        if not throttled:
+            throttled.append(params)
+            return {"UnprocessedItems": params["RequestItems"]}
+        return batch_write_item(**params)
+
+    monkeypatch.setattr(fake_dynamodb, "batch_write_item", first_call_unprocessed)
+    source = _write_ndjson(tmp_path / "bookings.ndjson", [*_rows(10), "not json"])
+    code = bulk_import.main([str(source), "--workers", "1", "--batch-size", "10", "--rate", "400"])
+    report = json.loads(capsys.readouterr().out)
+    assert code == 1
+    assert (report["imported"], report["rejected"]) == (10, 1)
+    assert len(_stored(fake_dynamodb)) == 10  # noqa: PLR2004
+    # Halved once, then one batch's worth added back
+    assert report["final_rate"] == 200 + 10
+    [reject] = (tmp_path / "bookings.ndjson.rejects.ndjson").read_text().splitlines()
+    assert json.loads(reject)["input"] == "not json"
+
+
+def test_throttled_batches_are_resubmitted_without_duplicating_written_rows(
+    fake_dynamodb, tmp_path, capsys, monkeypatch
+):
+    batch_write_item = fake_dynamodb.batch_write_item
+    throttled = []
+
+    def throttled_after_writing(**params):
+        result = batch_write_item(**params)
+        if not throttled:
+            # The first chunk went in, but the batch fails before the rest of it is written
+            throttled.append(params)
+            raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "BatchWriteItem")
+        return result
+
+    monkeypatch.setattr(fake_dynamodb, "batch_write_item", throttled_after_writing)
+    source = _write_ndjson(tmp_path / "bookings.ndjson", _rows(40))
+    code = bulk_import.main([str(source), "--workers", "1", "--batch-size", "40", "--rate", "400"])
+    report = json.loads(capsys.readouterr().out)
+    assert code == 0
+    assert (report["imported"], report["rejected"]) == (40, 0)
+    # Every row once, under the id derived from its row number, and none blocked by its own hold
+    stored = {item["booking_id"]["S"] for item in _stored(fake_dynamodb)}
+    assert stored == {bulk_import.booking_id(str(source), row) for row in range(1, 41)}
+    assert report["final_rate"] == 200 + 40
+    assert not (tmp_path / "bookings.ndjson.rejects.ndjson").read_text()
+
+
+def test_token_bucket_waits_out_its_debt_and_adapts():
+    now = [0.0]
+    slept: list[float] = []
+    bucket = bulk_import.TokenBucket(10, 25, step=5, clock=lambda: now[0], sleep=slept.append)
+    bucket.acquire(10)
+    bucket.acquire(5)
+    assert slept == [0.5]
+    now[0] += 1.5
+    bucket.acquire(10)
+    assert slept == [0.5]
+
+    bucket.throttled()
+    assert bucket.rate == 5  # noqa: PLR2004
+    for _ in range(5):
+        bucket.succeeded()
+    assert bucket.rate == 25  # noqa: PLR2004
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from app.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    events: list[str] = []
+    cache: TTLCache[int] = TTLCache(max_size=2, ttl_seconds=60, clock=FakeClock())
+    cache.listener = events.append
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3  # noqa: PLR2004
+    assert (cache.hits, cache.misses, cache.evictions) == (2, 1, 1)
+    assert events == ["Hit", "Eviction", "Miss", "Hit"]
+
+
+def test_entries_expire_after_ttl_and_can_be_invalidated():
+    clock = FakeClock()
+    cache: TTLCache[str] = TTLCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.put("a", "x")
+    cache.put("b", "y")
+    clock.now = 4.9
+    assert cache.get("a") == "x"
+    clock.now = 5.0
+    assert cache.get("a") is None
+    assert len(cache) == 1
+    cache.invalidate("b")
+    assert cache.get("b") is None
+    assert len(cache) == 0
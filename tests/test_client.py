@@ -8,8 +8,9 @@ from unittest.mock import patch
 import pytest
 from fastapi.testclient import TestClient
 
+from app import dal
 from app.api import app
-from app.models import Booking
+from app.models import Booking, BookingSeries, Recurrence
 
 
 @pytest.fixture()
@@ -71,12 +72,40 @@ def test_get_booking_route_not_found(client: TestClient) -> None:
 
 
 def test_list_bookings_route(client: TestClient) -> None:
-    with patch("app.api.dal.list_bookings_for_user") as mock_list:
-        mock_list.return_value = [booking_factory(booking_id="b1"), booking_factory(booking_id="b2")]
+    with patch("app.api.dal.list_bookings_page") as mock_list:
+        items = [booking_factory(booking_id="b1"), booking_factory(booking_id="b2")]
+        mock_list.return_value = dal.BookingPage(items, None)
         resp = client.get("/users/u-1/bookings")
         assert resp.status_code == HTTPStatus.OK
         ids = [b["booking_id"] for b in resp.json()]
         assert ids == ["b1", "b2"]
+        assert "x-next-cursor" not in resp.headers
+
+
+def test_list_bookings_route_passes_paging_and_range(client: TestClient) -> None:
+    with patch("app.api.dal.list_bookings_page") as mock_list:
+        mock_list.return_value = dal.BookingPage([booking_factory()], "next-page")
+        resp = client.get(
+            "/users/u-1/bookings",
+            params={"limit": 1, "cursor": "abc", "from": "2030-01-01T00:00:00Z", "to": "2030-02-01T00:00:00Z"},
+        )
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.headers["x-next-cursor"] == "next-page"
+        args = mock_list.call_args.args
+        assert args[:3] == ("u-1", 1, "abc")
+        assert args[3] == datetime(2030, 1, 1, tzinfo=UTC)
+
+
+def test_list_bookings_route_limit_bounded(client: TestClient) -> None:
+    resp = client.get("/users/u-1/bookings", params={"limit": 10_000})
+    assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_list_bookings_route_bad_cursor(client: TestClient) -> None:
+    with patch("app.api.dal.list_bookings_page") as mock_list:
+        mock_list.side_effect = ValueError(dal.INVALID_CURSOR)
+        resp = client.get("/users/u-1/bookings", params={"cursor": "garbage"})
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
 
 
 def test_update_booking_route_found(client: TestClient) -> None:
@@ -108,3 +137,184 @@ def test_cancel_booking_route(client: TestClient) -> None:
         resp = client.post("/bookings/b-123/cancel")
         assert resp.status_code == HTTPStatus.OK
         assert resp.json()["status"] == "cancelled"
+
+
+def test_create_booking_route_conflict(client: TestClient) -> None:
+    with patch("app.api.dal.create_booking") as mock_create:
+        mock_create.side_effect = dal.BookingConflictError(dal.BOOKING_CONFLICT)
+        payload = {
+            "user_id": "u-1",
+            "resource_id": "r-1",
+            "start_time": datetime.now(UTC).isoformat(),
+            "end_time": (datetime.now(UTC) + timedelta(hours=1)).isoformat(),
+        }
+        resp = client.post("/bookings", json=payload)
+        assert resp.status_code == HTTPStatus.CONFLICT
+        assert resp.json()["detail"] == dal.BOOKING_CONFLICT
+
+
+def test_update_booking_route_conflict(client: TestClient) -> None:
+    with patch("app.api.dal.update_booking") as mock_update:
+        mock_update.side_effect = dal.BookingConflictError(dal.BOOKING_CONFLICT)
+        resp = client.put("/bookings/b-123", json={"resource_id": "r-busy"})
+        assert resp.status_code == HTTPStatus.CONFLICT
+
+
+def test_booking_routes_reject_bookings_that_end_before_they_start(client: TestClient) -> None:
+    times = {"start_time": "2030-01-01T10:00:00Z", "end_time": "2030-01-01T10:00:00Z"}
+    with patch("app.api.dal.create_booking") as mock_create, patch("app.api.dal.update_booking") as mock_update:
+        resp = client.post("/bookings", json={"user_id": "u-1", "resource_id": "r-1", **times})
+        assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert "end_time must be after start_time" in resp.text
+        assert client.put("/bookings/b-123", json=times).status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        mock_create.assert_not_called()
+        mock_update.assert_not_called()
+        # With only one of the times given the dal compares against the stored one
+        mock_update.side_effect = ValueError("end_time must be after start_time")
+        resp = client.put("/bookings/b-123", json={"start_time": "2030-01-01T12:00:00Z"})
+        assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_cancel_booking_route_not_found(client: TestClient) -> None:
+    with patch("app.api.dal.cancel_booking") as mock_cancel:
+        mock_cancel.side_effect = KeyError("Booking not found")
+        resp = client.post("/bookings/missing/cancel")
+        assert resp.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_create_bookings_batch_route(client: TestClient) -> None:
+    with patch("app.api.dal.create_bookings") as mock_create:
+        mock_create.return_value = dal.BatchCreateResult(
+            created=[booking_factory()], errors={1: dal.BOOKING_CONFLICT}
+        )
+        item = {
+            "user_id": "u-1",
+            "resource_id": "r-1",
+            "start_time": datetime.now(UTC).isoformat(),
+            "end_time": (datetime.now(UTC) + timedelta(hours=1)).isoformat(),
+        }
+        resp = client.post("/bookings:batch", json={"bookings": [item, item]})
+        assert resp.status_code == HTTPStatus.OK
+        data = resp.json()
+        assert [b["booking_id"] for b in data["created"]] == ["b-123"]
+        assert data["errors"] == [{"index": 1, "detail": dal.BOOKING_CONFLICT}]
+        assert len(mock_create.call_args.args[0]) == 2  # noqa: PLR2004
+
+
+def test_create_bookings_batch_route_size_bounded(client: TestClient) -> None:
+    assert client.post("/bookings:batch", json={"bookings": []}).status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_get_bookings_batch_route(client: TestClient) -> None:
+    with patch("app.api.dal.get_bookings") as mock_get:
+        mock_get.return_value = dal.BatchGetResult(bookings=[booking_factory(booking_id="b-1")], not_found=["b-2"])
+        resp = client.post("/bookings:batchGet", json={"booking_ids": ["b-1", "b-2"]})
+        assert resp.status_code == HTTPStatus.OK
+        assert [b["booking_id"] for b in resp.json()["bookings"]] == ["b-1"]
+        assert resp.json()["not_found"] == ["b-2"]
+        mock_get.assert_called_once_with(["b-1", "b-2"])
+
+
+def _series_payload() -> dict[str, Any]:
+    return {
+        "user_id": "u-1",
+        "resource_id": "r-1",
+        "start_time": "2030-01-07T09:00:00+00:00",
+        "end_time": "2030-01-07T10:00:00+00:00",
+        "recurrence": {"freq": "weekly", "count": 52},
+    }
+
+
+def test_create_series_route(client: TestClient) -> None:
+    with patch("app.api.dal.create_series") as mock_create:
+        mock_create.return_value = BookingSeries(
+            series_id="s-1",
+            user_id="u-1",
+            resource_id="r-1",
+            start_time=datetime(2030, 1, 7, 9, tzinfo=UTC),
+            end_time=datetime(2030, 1, 7, 10, tzinfo=UTC),
+            recurrence=Recurrence(freq="weekly", count=52),
+        )
+        resp = client.post("/series", json=_series_payload())
+        assert resp.status_code == HTTPStatus.CREATED
+        assert resp.json()["series_id"] == "s-1"
+        assert mock_create.call_args.args[0].recurrence.count == 52  # noqa: PLR2004
+
+
+def test_create_series_route_conflict_and_validation(client: TestClient) -> None:
+    with patch("app.api.dal.create_series") as mock_create:
+        mock_create.side_effect = dal.BookingConflictError(dal.BOOKING_CONFLICT)
+        assert client.post("/series", json=_series_payload()).status_code == HTTPStatus.CONFLICT
+        payload = _series_payload()
+        payload["recurrence"] = {"freq": "weekly"}  # neither count nor until
+        assert client.post("/series", json=payload).status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_create_series_route_rejects_reminders(client: TestClient) -> None:
+    with patch("app.api.dal.create_series") as mock_create:
+        resp = client.post("/series", json={**_series_payload(), "reminder_lead_seconds": 900})
+        assert resp.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        assert "not supported for series" in resp.text
+        mock_create.assert_not_called()
+
+
+def test_get_and_delete_series_routes(client: TestClient) -> None:
+    with patch("app.api.dal.get_series") as mock_get, patch("app.api.dal.delete_series") as mock_delete:
+        mock_get.side_effect = KeyError(dal.SERIES_NOT_FOUND)
+        assert client.get("/series/missing").status_code == HTTPStatus.NOT_FOUND
+        assert client.delete("/series/s-1").status_code == HTTPStatus.NO_CONTENT
+        mock_delete.assert_called_once_with("s-1")
+
+
+def test_availability_route(client: TestClient) -> None:
+    start = datetime(2030, 1, 1, 9, tzinfo=UTC)
+    with patch("app.api.dal.find_free_slots") as mock_find:
+        mock_find.return_value = [(start, start + timedelta(hours=2))]
+        end = start + timedelta(hours=8)
+        params = {"from": start.isoformat(), "to": end.isoformat(), "min_duration_seconds": 1800}
+        resp = client.get("/resources/r-1/availability", params=params)
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.json()["free"] == [{"start_time": "2030-01-01T09:00:00Z", "end_time": "2030-01-01T11:00:00Z"}]
+        assert mock_find.call_args.args[0] == "r-1"
+        assert mock_find.call_args.args[3] == 1800  # noqa: PLR2004
+        mock_find.side_effect = ValueError("Availability window must end after it starts")
+        resp = client.get("/resources/r-1/availability", params={"from": start.isoformat(), "to": start.isoformat()})
+        assert resp.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_get_booking_route_no_cache_header(client: TestClient) -> None:
+    with patch("app.api.dal.get_booking") as mock_get:
+        mock_get.return_value = booking_factory()
+        client.get("/bookings/b-123")
+        assert mock_get.call_args.kwargs == {"consistent": False}
+        client.get("/bookings/b-123", headers={"Cache-Control": "no-cache"})
+        assert mock_get.call_args.kwargs == {"consistent": True}
+
+
+def test_export_routes_stream_ndjson(client: TestClient) -> None:
+    bookings = [booking_factory(booking_id=f"b-{i}") for i in range(3)]
+    with patch("app.api.dal.export_bookings") as mock_export:
+        mock_export.return_value = iter(bookings)
+        resp = client.get("/users/u-1/bookings/export", params={"status": "active"})
+        assert resp.status_code == HTTPStatus.OK
+        assert resp.headers["content-type"] == "application/x-ndjson"
+        assert "x-next-cursor" not in resp.headers
+        assert [Booking.model_validate_json(line) for line in resp.text.splitlines()] == bookings
+        assert mock_export.call_args.args == ("user_id", "u-1", None, None)
+        assert mock_export.call_args.kwargs == {"status": "active", "cursor": None}
+
+        mock_export.return_value = iter(bookings[:1])
+        resp = client.get("/resources/r-1/bookings/export", params={"cursor": "c-1"})
+        assert resp.text == bookings[0].model_dump_json() + "\n"
+        assert mock_export.call_args.args[:2] == ("resource_id", "r-1")
+        assert mock_export.call_args.kwargs["cursor"] == "c-1"
+        mock_export.side_effect = ValueError(dal.INVALID_CURSOR)
+        assert client.get("/users/u-1/bookings/export", params={"cursor": "bad"}).status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_routes_open_a_tracing_subsegment(client: TestClient) -> None:
+    # FastAPI must have registered the traced function, not the bare one underneath it
+    with patch("app.api.dal.get_booking") as mock_get, patch("app.api.tracer.provider.in_subsegment") as subsegment:
+        mock_get.return_value = booking_factory(booking_id="b-42")
+        assert client.get("/bookings/b-42").status_code == HTTPStatus.OK
+    assert [call.kwargs["name"] for call in subsegment.call_args_list] == ["## app.api.get_booking"]
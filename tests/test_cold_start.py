@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app import aws
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+def _loaded_modules(module: str, **env: str) -> set[str]:
+    code = f"import sys, json, {module}; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(SRC), **env},
+    )
+    return set(json.loads(proc.stdout))
+
+
+@pytest.mark.parametrize("module", ["app.stream_processor", "app.reminder_poller"])
+def test_background_handlers_never_load_web_stack_or_boto3(module: str) -> None:
+    loaded = _loaded_modules(module, POWERTOOLS_TRACE_DISABLED="true")
+    assert not {"fastapi", "pydantic", "starlette", "mangum", "app.dal", "app.api"} & loaded
+    # Clients are built on first use, and tracing is off, so neither boto3 nor the X-Ray SDK is imported
+    assert not {"boto3", "aws_xray_sdk"} & loaded
+
+
+@pytest.mark.parametrize("module", ["app.dal", "app.api_handler"])
+def test_api_modules_defer_boto3_until_first_call(module: str) -> None:
+    loaded = _loaded_modules(module, POWERTOOLS_TRACE_DISABLED="true", POWERTOOLS_METRICS_DISABLED="true")
+    assert "boto3" not in loaded
+    assert "aws_xray_sdk" not in loaded
+
+
+def test_clients_are_cached(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    aws.client.cache_clear()
+    try:
+        assert aws.client("events") is aws.client("events")
+    finally:
+        aws.client.cache_clear()
+
+
+def test_attribute_values_round_trip() -> None:
+    item = {"s": "x", "n": 5, "neg": -3, "b": True, "none": None, "m": {"l": [1, "a"]}}
+    assert aws.deserialize(aws.serialize(item)) == item
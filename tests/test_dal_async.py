@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import threading
+from collections.abc import Coroutine, Iterator
+from datetime import UTC, datetime, timedelta
+from typing import Any, TypeVar
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import api, dal, dal_async
+from app.models import BookingCreate, BookingSeriesCreate, Recurrence
+
+T = TypeVar("T")
+START = datetime(2030, 1, 1, 9, tzinfo=UTC)
+
+
+@pytest.fixture(autouse=True)
+def patch_table(fake_dynamodb):
+    return fake_dynamodb
+
+
+def _run(coro: Coroutine[Any, Any, T]) -> T:
+    # A private loop: asyncio.run would leave the main thread without the current loop Mangum expects
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _book(user_id: str, hours: int) -> str:
+    start = START + timedelta(hours=hours)
+    end = start + timedelta(minutes=30)
+    payload = BookingCreate(user_id=user_id, resource_id=f"r-{hours}", start_time=start, end_time=end)
+    return dal.create_booking(payload).booking_id
+
+
+def _series(user_id: str) -> str:
+    payload = BookingSeriesCreate(
+        user_id=user_id,
+        resource_id="room-s",
+        start_time=START + timedelta(minutes=30),
+        end_time=START + timedelta(minutes=45),
+        recurrence=Recurrence(freq="daily", count=3),
+    )
+    return dal.create_series(payload).series_id
+
+
+class InFlight:
+    """Wraps the engine, recording the most calls that were ever running at the same time."""
+
+    def __init__(self, target: Any) -> None:
+        self._target = target
+        self._lock = threading.Lock()
+        self._running = 0
+        self.peak = 0
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+
+        def call(**kwargs: Any) -> Any:
+            with self._lock:
+                self._running += 1
+                self.peak = max(self.peak, self._running)
+            try:
+                threading.Event().wait(0.01)
+                return attr(**kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        return call
+
+
+def test_reads_match_the_sync_dal():
+    ids = [_book("u-1", hours) for hours in range(5)]
+    series_id = _series("u-1")
+    occurrence = f"{series_id}@{int((START + timedelta(days=1, minutes=30)).timestamp())}"
+
+    assert _run(dal_async.get_booking(ids[0])) == dal.get_booking(ids[0])
+    assert _run(dal_async.get_booking(occurrence)) == dal.get_booking(occurrence)
+    assert _run(dal_async.get_series(series_id)) == dal.get_series(series_id)
+    for missing in ("missing", f"{series_id}@1"):
+        with pytest.raises(KeyError):
+            _run(dal_async.get_booking(missing))
+    wanted = [ids[3], "missing", ids[0], ids[3]]
+    assert _run(dal_async.get_bookings(wanted)) == dal.get_bookings(wanted)
+
+    cursor = None
+    while True:
+        page = _run(dal_async.list_bookings_page("u-1", 3, cursor))
+        assert page == dal.list_bookings_page("u-1", 3, cursor)
+        if page.next_cursor is None:
+            break
+        cursor = page.next_cursor
+    with pytest.raises(ValueError, match=dal.INVALID_CURSOR):
+        _run(dal_async.list_bookings_page("u-2", 3, cursor="garbage"))
+
+
+def test_independent_calls_run_concurrently(patch_table, monkeypatch):
+    ids = [_book("u-1", hours) for hours in range(6)]
+    _series("u-1")
+    probe = InFlight(patch_table)
+    monkeypatch.setattr(dal, "_client", probe)
+    monkeypatch.setattr(dal, "_BATCH_GET_SIZE", 2)
+
+    assert len(_run(dal_async.get_bookings(ids)).bookings) == len(ids)
+    assert probe.peak == 3  # noqa: PLR2004 - every chunk at once
+    probe.peak = 0
+    _run(dal_async.list_bookings_page("u-1", 10))
+    assert probe.peak == 2  # noqa: PLR2004 - the bookings page and the user's series
+    probe.peak = 0
+    dal.get_bookings(ids)
+    assert probe.peak == 1
+
+
+def test_writes_run_off_the_event_loop():
+    start = START + timedelta(days=2)
+    created = _run(
+        dal_async.create_booking(
+            BookingCreate(user_id="u-1", resource_id="r", start_time=start, end_time=start + timedelta(minutes=30))
+        )
+    )
+    cancelled = _run(dal_async.cancel_booking(created.booking_id))
+    assert cancelled.status == "cancelled"
+    assert dal_async.cancel_booking.__name__ == "cancel_booking"
+
+
+@pytest.fixture()
+def async_api(monkeypatch: pytest.MonkeyPatch) -> Iterator[Any]:
+    monkeypatch.setenv("ASYNC_DAL", "true")
+    yield importlib.reload(api)
+    monkeypatch.delenv("ASYNC_DAL")
+    importlib.reload(api)
+
+
+def test_async_routes_answer_like_the_sync_ones(async_api):
+    booking_id = _book("u-1", 1)
+    _book("u-1", 2)
+    series_id = _series("u-1")
+    async_client = TestClient(async_api.app)
+    endpoints = {(method, route.path): route.endpoint for route in async_api.app.routes for method in route.methods}
+    assert inspect.iscoroutinefunction(endpoints["GET", "/bookings/{booking_id}"])
+    # Writes stay sync routes: FastAPI already runs those in its threadpool
+    assert not inspect.iscoroutinefunction(endpoints["PUT", "/bookings/{booking_id}"])
+
+    sync_client = TestClient(importlib.reload(api).app)
+    requests = [
+        ("GET", f"/bookings/{booking_id}", None, {}),
+        ("GET", f"/bookings/{booking_id}", None, {"If-None-Match": '"1"'}),
+        ("GET", f"/bookings/{booking_id}", None, {"If-None-Match": '"2"'}),
+        ("GET", "/bookings/missing", None, {}),
+        ("GET", "/bookings/missing", None, {"If-None-Match": "*"}),
+        ("GET", f"/series/{series_id}", None, {}),
+        ("GET", "/users/u-1/bookings?limit=2", None, {}),
+        ("GET", "/users/u-1/bookings?cursor=garbage", None, {}),
+        ("POST", "/bookings:batchGet", {"booking_ids": [booking_id, "missing"]}, {}),
+    ]
+    for method, path, body, headers in requests:
+        expected = sync_client.request(method, path, json=body, headers=headers)
+        got = async_client.request(method, path, json=body, headers=headers)
+        assert (got.status_code, got.headers, got.content) == (expected.status_code, expected.headers, expected.content)
@@ -1,26 +1,242 @@
 from __future__ import annotations
 
+import json
 from http import HTTPStatus
 from typing import Any
 
+import pytest
+
+from app import api, api_handler, dal, idempotency
 from app.api_handler import lambda_handler
 
 
-def _http_v2_event(path: str, method: str = "GET") -> dict[str, Any]:
+def _http_v2_event(path: str, method: str = "GET", body: Any = None, query: str = "", **headers: str) -> dict[str, Any]:
     return {
         "version": "2.0",
         "rawPath": path,
-        "routeKey": f"{method} {path}",
-        "rawQueryString": "",
-        "headers": {"host": "example.com"},
+        "routeKey": "ANY /{proxy+}",
+        "rawQueryString": query,
+        "headers": {"host": "example.com", "content-type": "application/json", **headers},
         "requestContext": {"http": {"method": method, "path": path, "protocol": "HTTP/1.1"}},
+        "body": body if body is None or isinstance(body, str) else json.dumps(body),
         "isBase64Encoded": False,
     }
 
 
-def test_lambda_handler_health_ok() -> None:
+@pytest.fixture(params=["mangum", "direct"])
+def mode(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch) -> str:
+    monkeypatch.setattr(api_handler, "_DIRECT_DISPATCH", request.param == "direct")
+    return str(request.param)
+
+
+def _invoke(event: dict[str, Any], direct: bool, monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    with monkeypatch.context() as m:
+        m.setattr(api_handler, "_DIRECT_DISPATCH", direct)
+        return lambda_handler(event, context={})  # type: ignore[arg-type,no-any-return]
+
+
+def _payload(hour: int, **overrides: Any) -> dict[str, Any]:
+    return {
+        "user_id": "u-1",
+        "resource_id": "room-1",
+        "start_time": f"2030-01-01T{hour:02d}:00:00Z",
+        "end_time": f"2030-01-01T{hour:02d}:30:00Z",
+        **overrides,
+    }
+
+
+def test_lambda_handler_health_ok(mode: str) -> None:
     event = _http_v2_event("/health", "GET")
     resp = lambda_handler(event, context={})  # type: ignore[arg-type]
     assert isinstance(resp, dict)
     assert resp.get("statusCode") == HTTPStatus.OK
     assert "ok" in resp.get("body", "")
+
+
+def test_lambda_handler_booking_lifecycle(mode: str, fake_dynamodb: Any) -> None:
+    created = lambda_handler(_http_v2_event("/bookings", "POST", _payload(10)), context={})  # type: ignore[arg-type]
+    assert created["statusCode"] == HTTPStatus.CREATED
+    booking_id = json.loads(created["body"])["booking_id"]
+
+    path = f"/bookings/{booking_id}"
+    assert lambda_handler(_http_v2_event(path), context={})["body"] == created["body"]  # type: ignore[arg-type]
+    updated = lambda_handler(_http_v2_event(path, "PUT", {"reminder_lead_seconds": 120}), context={})  # type: ignore[arg-type]
+    assert json.loads(updated["body"])["reminder_lead_seconds"] == 120  # noqa: PLR2004
+    conflict = lambda_handler(_http_v2_event("/bookings", "POST", _payload(10)), context={})  # type: ignore[arg-type]
+    assert conflict["statusCode"] == HTTPStatus.CONFLICT
+    deleted = lambda_handler(_http_v2_event(path, "DELETE"), context={})  # type: ignore[arg-type]
+    assert deleted["statusCode"] == HTTPStatus.NO_CONTENT
+    missing = lambda_handler(_http_v2_event(path), context={})  # type: ignore[arg-type]
+    assert missing["statusCode"] == HTTPStatus.NOT_FOUND
+    assert missing["body"] == '{"detail":"Booking not found"}'
+
+
+@pytest.mark.parametrize(
+    ("path", "method", "body", "query", "headers"),
+    [
+        ("/health", "GET", None, "", {}),
+        ("/bookings/{id}", "GET", None, "", {}),
+        ("/bookings/{id}", "GET", None, "", {"cache-control": "no-cache"}),
+        ("/bookings/{id}", "GET", None, "", {"if-none-match": '"1"'}),
+        ("/bookings/{id}", "GET", None, "", {"if-none-match": 'W/"0", W/"1"'}),
+        ("/bookings/{id}", "GET", None, "", {"if-none-match": '"7"'}),
+        ("/bookings/missing", "GET", None, "", {"if-none-match": "*"}),
+        ("/bookings/missing", "GET", None, "", {}),
+        ("/users/u-1/bookings", "GET", None, "limit=1", {}),
+        ("/users/u-1/bookings", "GET", None, "from=2030-01-01T11:00:00Z&to=2030-01-02T00:00:00Z", {}),
+        ("/users/u-1/bookings", "GET", None, "limit=0", {}),
+        ("/users/u-1/bookings", "GET", None, "cursor=not-base64!", {}),
+        ("/users/u-1/bookings", "GET", None, "status=active&upcoming=true&limit=1", {}),
+        ("/users/u-1/bookings", "GET", None, "status=cancelled&upcoming=off", {}),
+        ("/users/u-1/bookings", "GET", None, "status=unknown", {}),
+        ("/users/u-1/bookings", "GET", None, "upcoming=maybe", {}),
+        ("/users/u-1/bookings", "GET", None, "include_archived=true&limit=1", {}),
+        ("/users/u-1/bookings", "GET", None, "include_archived=maybe", {}),
+        ("/resources/room-1/availability", "GET", None, "from=2030-01-01T00:00:00Z&to=2030-01-02T00:00:00Z", {}),
+        ("/resources/room-1/availability", "GET", None, "from=2030-01-01T00:00:00Z", {}),
+        ("/bookings:batchGet", "POST", {"booking_ids": ["{id}", "missing"]}, "", {}),
+        ("/bookings", "POST", {"user_id": "u-1"}, "", {}),
+        ("/bookings", "POST", "{not json", "", {}),
+        ("/bookings", "POST", _payload(10), "", {}),
+        ("/bookings", "POST", _payload(14), "", {"idempotency-key": "k-1"}),
+        ("/bookings", "POST", _payload(14), "", {"idempotency-key": ""}),
+        ("/bookings/missing", "PUT", {"reminder_lead_seconds": 5}, "", {}),
+        ("/bookings/missing/cancel", "POST", None, "", {}),
+        ("/bookings/{id}", "PUT", {"reminder_lead_seconds": 600}, "", {"if-match": '"9"'}),
+        ("/bookings/{id}/cancel", "POST", None, "", {"if-match": 'W/"1"'}),
+        ("/bookings/missing/cancel", "POST", None, "", {"if-match": '"1"'}),
+        ("/series/missing", "GET", None, "", {}),
+        ("/nowhere", "GET", None, "", {}),
+    ],
+)
+def test_direct_dispatch_matches_mangum(  # noqa: PLR0913, PLR0917
+    fake_dynamodb: Any,
+    monkeypatch: pytest.MonkeyPatch,
+    path: str,
+    method: str,
+    body: Any,
+    query: str,
+    headers: dict[str, str],
+) -> None:
+    existing = lambda_handler(_http_v2_event("/bookings", "POST", _payload(10)), context={})  # type: ignore[arg-type]
+    lambda_handler(_http_v2_event("/bookings", "POST", _payload(12)), context={})  # type: ignore[arg-type]
+    booking_id = json.loads(existing["body"])["booking_id"]
+    path = path.replace("{id}", booking_id)
+    body = json.loads(json.dumps(body).replace("{id}", booking_id)) if body is not None else None
+
+    responses = [
+        _invoke(_http_v2_event(path, method, body, query, **headers), direct, monkeypatch) for direct in (False, True)
+    ]
+    assert responses[0] == responses[1]
+
+
+def test_direct_dispatch_reports_unhandled_errors_like_mangum(
+    fake_dynamodb: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def broken(*args: Any, **kwargs: Any) -> Any:
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(dal, "get_booking", broken)
+    responses = [_invoke(_http_v2_event("/bookings/b-1"), direct, monkeypatch) for direct in (False, True)]
+    assert responses[0] == responses[1]
+    assert responses[1]["statusCode"] == HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+def test_throttled_batch_reads_are_reported_as_retryable(fake_dynamodb: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(dal, "_BATCH_RETRY_BASE_DELAY_SECONDS", 0)
+    monkeypatch.setattr(fake_dynamodb, "batch_get_item", lambda RequestItems: {"UnprocessedKeys": RequestItems})  # noqa: N803
+    event = _http_v2_event("/bookings:batchGet", "POST", {"booking_ids": ["b-1"]})
+    responses = [_invoke(event, direct, monkeypatch) for direct in (False, True)]
+    assert responses[0] == responses[1]
+    assert responses[1]["statusCode"] == HTTPStatus.SERVICE_UNAVAILABLE
+    assert responses[1]["headers"]["retry-after"] == "1"
+    assert json.loads(responses[1]["body"]) == {"detail": dal.BATCH_READ_UNPROCESSED}
+
+
+def _post(path: str, body: Any = None, key: str | None = None) -> dict[str, Any]:
+    headers = {"idempotency-key": key} if key is not None else {}
+    return lambda_handler(_http_v2_event(path, "POST", body, **headers), context={})  # type: ignore[arg-type,no-any-return]
+
+
+def test_idempotency_key_replays_the_stored_booking(mode: str, slow_dynamodb: Any) -> None:
+    first = _post("/bookings", _payload(10), key="k-1")
+    assert first["statusCode"] == HTTPStatus.CREATED
+    slow_dynamodb.clear()
+    # A retry on the same container is answered from the in-process cache
+    assert _post("/bookings", _payload(10), key="k-1")["body"] == first["body"]
+    assert not slow_dynamodb
+    # ...and on a cold one from the idempotency table, still without touching the bookings
+    idempotency._idempotent_run.cache_clear()
+    assert _post("/bookings", _payload(10), key="k-1")["body"] == first["body"]
+    assert "transact_write_items" not in slow_dynamodb
+    assert len(dal.list_bookings_for_user("u-1")) == 1
+
+
+def test_idempotency_key_reused_for_another_request_is_rejected(mode: str, fake_dynamodb: Any) -> None:
+    assert _post("/bookings", _payload(10), key="k-1")["statusCode"] == HTTPStatus.CREATED
+    reused = _post("/bookings", _payload(11), key="k-1")
+    assert reused["statusCode"] == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert json.loads(reused["body"]) == {"detail": api.IDEMPOTENCY_KEY_REUSED}
+    # Keys are scoped per operation
+    booking_id = json.loads(_post("/bookings", _payload(12))["body"])["booking_id"]
+    assert _post(f"/bookings/{booking_id}/cancel", key="k-1")["statusCode"] == HTTPStatus.OK
+
+
+def test_idempotency_key_does_not_store_errors(mode: str, fake_dynamodb: Any) -> None:
+    _post("/bookings", _payload(10))
+    assert _post("/bookings", _payload(10), key="k-1")["statusCode"] == HTTPStatus.CONFLICT
+    assert _post("/bookings", _payload(10), key="k-1")["statusCode"] == HTTPStatus.CONFLICT
+    assert _post("/bookings/missing/cancel", key="k-2")["statusCode"] == HTTPStatus.NOT_FOUND
+
+
+def test_idempotency_key_replays_cancel(mode: str, fake_dynamodb: Any) -> None:
+    booking_id = json.loads(_post("/bookings", _payload(10))["body"])["booking_id"]
+    cancelled = _post(f"/bookings/{booking_id}/cancel", key="k-1")
+    assert json.loads(cancelled["body"])["status"] == "cancelled"
+    assert _post(f"/bookings/{booking_id}/cancel", key="k-1") == cancelled
+
+
+def test_conditional_requests_use_the_booking_version(mode: str, fake_dynamodb: Any) -> None:
+    created = _post("/bookings", _payload(10))
+    path = f"/bookings/{json.loads(created['body'])['booking_id']}"
+    fetched = lambda_handler(_http_v2_event(path), context={})  # type: ignore[arg-type]
+    assert fetched["headers"]["etag"] == '"1"'
+
+    unchanged = lambda_handler(_http_v2_event(path, **{"if-none-match": '"1"'}), context={})  # type: ignore[arg-type]
+    assert (unchanged["statusCode"], unchanged["body"]) == (HTTPStatus.NOT_MODIFIED, "")
+    assert unchanged["headers"]["etag"] == '"1"'
+
+    update = {"reminder_lead_seconds": 120}
+    updated = lambda_handler(_http_v2_event(path, "PUT", update, **{"if-match": '"1"'}), context={})  # type: ignore[arg-type]
+    assert json.loads(updated["body"])["version"] == 2  # noqa: PLR2004
+    assert updated["headers"]["etag"] == '"2"'
+    # A second writer still holding version 1 does not overwrite the first one's change
+    lost = lambda_handler(_http_v2_event(path, "PUT", update, **{"if-match": '"1"'}), context={})  # type: ignore[arg-type]
+    assert lost["statusCode"] == HTTPStatus.PRECONDITION_FAILED
+    assert json.loads(lost["body"]) == {"detail": dal.BOOKING_VERSION_MISMATCH}
+    stale = lambda_handler(_http_v2_event(path, **{"if-none-match": '"1"'}), context={})  # type: ignore[arg-type]
+    assert stale["statusCode"] == HTTPStatus.OK
+    assert stale["headers"]["etag"] == '"2"'
+
+    # Each write hands back the ETag the next conditional write needs
+    cancel = _http_v2_event(f"{path}/cancel", "POST", **{"if-match": updated["headers"]["etag"]})
+    cancelled = lambda_handler(cancel, context={})  # type: ignore[arg-type]
+    assert json.loads(cancelled["body"])["status"] == "cancelled"
+    assert cancelled["headers"]["etag"] == '"3"'
+
+
+def test_export_under_lambda_comes_in_chunks(mode: str, fake_dynamodb: Any, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(api, "EXPORT_CHUNK_SIZE", 2)
+    created = [json.loads(_post("/bookings", _payload(hour))["body"]) for hour in (12, 10, 11)]
+    exported: list[dict[str, Any]] = []
+    query = ""
+    while True:
+        resp = lambda_handler(_http_v2_event("/users/u-1/bookings/export", query=query), context={})  # type: ignore[arg-type]
+        assert resp["headers"]["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in resp["body"].splitlines()]
+        assert len(lines) <= 2  # noqa: PLR2004
+        exported.extend(lines)
+        if "x-next-cursor" not in resp["headers"]:
+            break
+        query = f"cursor={resp['headers']['x-next-cursor']}"
+    assert exported == sorted(created, key=lambda booking: booking["start_time"])
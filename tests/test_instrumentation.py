@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import importlib
+import json
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.stream_processor as sp
+from app import api, api_handler, dal, instrumentation
+from app.memory_backend import MemoryDynamoDB
+
+
+class FakeMetrics:
+    """Collects what would have been flushed as EMF records."""
+
+    def __init__(self) -> None:
+        self.records: list[dict[str, Any]] = []
+        self._pending: dict[str, Any] = {}
+
+    def add_dimension(self, name: str, value: str) -> None:
+        self._pending[name] = value
+
+    def add_metric(self, name: str, unit: str, value: float) -> None:
+        self._pending[name] = value
+
+    def add_metadata(self, key: str, value: Any) -> None:
+        self._pending[key] = value
+
+    def flush_metrics(self) -> None:
+        self.records.append(self._pending)
+        self._pending = {}
+
+
+@pytest.fixture()
+def metrics(fake_dynamodb: MemoryDynamoDB, monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeMetrics]:
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    monkeypatch.setattr(instrumentation, "_cold", True)
+    monkeypatch.setattr(dal, "_client", instrumentation.instrument(fake_dynamodb, "dynamodb"))
+    fake = FakeMetrics()
+    # The middleware is only added with instrumentation on
+    importlib.reload(api)
+    importlib.reload(api_handler)
+    # The handler flushes the same Metrics the routes add business metrics to
+    monkeypatch.setattr(api, "metrics", fake)
+    monkeypatch.setattr(api_handler, "metrics", fake)
+    yield fake
+    monkeypatch.undo()
+    importlib.reload(api)
+    importlib.reload(api_handler)
+
+
+def _request(path: str, method: str = "GET", body: Any = None) -> dict[str, Any]:
+    event = {
+        "version": "2.0",
+        "rawPath": path,
+        "routeKey": "ANY /{proxy+}",
+        "rawQueryString": "",
+        "headers": {"host": "example.com", "content-type": "application/json"},
+        "requestContext": {"http": {"method": method, "path": path, "protocol": "HTTP/1.1"}},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+    return api_handler.lambda_handler(event, context={})  # type: ignore[arg-type,no-any-return]
+
+
+@pytest.mark.parametrize("direct", [False, True])
+def test_each_invocation_emits_one_record_named_after_its_route(metrics, monkeypatch, direct):
+    monkeypatch.setattr(api_handler, "_DIRECT_DISPATCH", direct)
+    payload = {
+        "user_id": "u-1",
+        "resource_id": "room-1",
+        "start_time": "2030-01-01T10:00:00Z",
+        "end_time": "2030-01-01T11:00:00Z",
+    }
+    booking_id = json.loads(_request("/bookings", "POST", payload)["body"])["booking_id"]
+    _request(f"/bookings/{booking_id}")
+    _request("/nowhere")
+
+    created, fetched, unmatched = metrics.records
+    assert created["route"] == "POST /bookings"
+    assert created["ColdStart"] == 1
+    # The schedule buckets are read, then written with the booking in one transaction
+    assert created["calls"] == {"dynamodb.batch_get_item": 1, "dynamodb.transact_write_items": 1}
+    assert created["DynamoDBCalls"] == 2  # noqa: PLR2004
+    assert created["CreateBooking"] == 1
+    assert fetched["route"] == "GET /bookings/{booking_id}"
+    assert (fetched["ColdStart"], fetched["calls"], fetched["EventBridgeCalls"]) == (0, {"dynamodb.get_item": 1}, 0)
+    assert fetched["Latency"] > 0
+    assert (unmatched["route"], unmatched["DynamoDBCalls"]) == (instrumentation.UNMATCHED, 0)
+
+
+def test_business_metrics_go_out_with_the_invocation_that_added_them():
+    metrics = FakeMetrics()
+
+    def other_request() -> None:
+        with instrumentation.invocation(metrics, "GET /health"):  # type: ignore[arg-type]
+            pass
+
+    with instrumentation.invocation(metrics, "POST /bookings"):  # type: ignore[arg-type]
+        instrumentation.add_metric(metrics, "CreateBooking", "Count", 1)  # type: ignore[arg-type]
+        # A concurrent request under an ASGI server (its own context) finishes first, through the same Metrics
+        contextvars.Context().run(other_request)
+    health, created = metrics.records
+    assert (health["route"], "CreateBooking" in health) == ("GET /health", False)
+    assert (created["route"], created["CreateBooking"]) == ("POST /bookings", 1)
+
+    # Outside an invocation the metric goes straight to Metrics, as with instrumentation off
+    instrumentation.add_metric(metrics, "CreateBooking", "Count", 2)  # type: ignore[arg-type]
+    assert metrics._pending == {"CreateBooking": 2}
+
+
+class CapacityReportingClient:
+    def __init__(self) -> None:
+        self.params: list[dict[str, Any]] = []
+
+    def get_item(self, **params: Any) -> dict[str, Any]:
+        self.params.append(params)
+        return {"ConsumedCapacity": {"TableName": "bookings", "CapacityUnits": 0.5}}
+
+    def transact_write_items(self, **params: Any) -> dict[str, Any]:
+        self.params.append(params)
+        return {"ConsumedCapacity": [{"TableName": "bookings", "CapacityUnits": 2.0}, {"CapacityUnits": 4.0}]}
+
+    async def query(self, **params: Any) -> dict[str, Any]:
+        self.params.append(params)
+        return {"Items": [], "ConsumedCapacity": {"TableName": "bookings", "CapacityUnits": 1.5}}
+
+
+def test_consumed_capacity_is_requested_and_summed(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    target = CapacityReportingClient()
+    client = instrumentation.instrument(target, "dynamodb")
+    client.get_item(TableName="bookings")
+    assert target.params[-1] == {"TableName": "bookings"}
+
+    fake = FakeMetrics()
+    with instrumentation.invocation(fake, "test"):
+        client.get_item(TableName="bookings")
+        client.get_item(TableName="bookings")
+        client.transact_write_items(TransactItems=[])
+        asyncio.run(client.query(TableName="bookings"))
+    assert all(params["ReturnConsumedCapacity"] == "TOTAL" for params in target.params[1:])
+    [record] = fake.records
+    assert (record["ConsumedReadCapacity"], record["ConsumedWriteCapacity"]) == (2.5, 6.0)
+    assert record["calls"] == {"dynamodb.get_item": 2, "dynamodb.query": 1, "dynamodb.transact_write_items": 1}
+
+
+def test_stream_processor_counts_eventbridge_calls(monkeypatch):
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    events = MagicMock()
+    events.put_events.return_value = {"FailedEntryCount": 0, "Entries": [{"EventId": "e-1"}]}
+    monkeypatch.setattr(sp, "_events", instrumentation.instrument(events, "events"))
+    fake = FakeMetrics()
+    monkeypatch.setattr(sp, "_metrics", lambda: fake)
+    removal = {
+        "eventName": "REMOVE",
+        "userIdentity": {"type": "Service", "principalId": "dynamodb.amazonaws.com"},
+        "dynamodb": {
+            "SequenceNumber": "1",
+            "OldImage": {"booking_id": {"S": "b-1"}, "user_id": {"S": "u-1"}, "ttl": {"N": "1893456000"}},
+        },
+    }
+    sp.lambda_handler({"Records": [removal]}, context=MagicMock())
+    [record] = fake.records
+    assert (record["route"], record["EventBridgeCalls"], record["DynamoDBCalls"]) == ("StreamProcessor", 1, 0)
+
+
+def test_disabled_instrumentation_wraps_nothing(fake_dynamodb):
+    assert not instrumentation.ENABLED
+    assert instrumentation.instrument(fake_dynamodb, "dynamodb") is fake_dynamodb
+    assert not any(m.cls is instrumentation.RouteMiddleware for m in api.app.user_middleware)
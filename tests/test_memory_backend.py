@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+import app.stream_processor as sp
+from app import dal
+from app.aws import deserialize, serialize
+from app.memory_backend import TTL_USER_IDENTITY, MemoryDynamoDB, TableSchema
+from app.models import BookingCreate
+
+_TABLE = "things"
+
+
+@pytest.fixture()
+def engine() -> MemoryDynamoDB:
+    schema = TableSchema(key=("id",), indexes={"by_owner": ("owner", "rank")}, ttl_attribute="ttl", stream=True)
+    return MemoryDynamoDB({_TABLE: schema}, ttl_sweep_interval=None)
+
+
+def _put(engine: MemoryDynamoDB, **item: Any) -> None:
+    engine.put_item(TableName=_TABLE, Item=serialize(item))
+
+
+def _get(engine: MemoryDynamoDB, key: str) -> dict[str, Any] | None:
+    resp = engine.get_item(TableName=_TABLE, Key=serialize({"id": key}))
+    return deserialize(resp["Item"]) if "Item" in resp else None
+
+
+def _code(exc: pytest.ExceptionInfo[ClientError]) -> str:
+    return exc.value.response["Error"]["Code"]
+
+
+def test_conditions_cover_comparisons_functions_and_boolean_logic(engine):
+    _put(engine, id="a", owner="o", rank=3, tags=["x", "y"], name="alpha")
+    cases = {
+        "#r BETWEEN :lo AND :hi AND begins_with(#n, :p)": True,
+        "#r IN (:lo, :hi) OR contains(tags, :t)": True,
+        "NOT (#r >= :lo) OR size(tags) <> :two": False,
+        "attribute_not_exists(missing) AND #r < :hi": True,
+    }
+    values = serialize({":lo": 1, ":hi": 5, ":p": "al", ":t": "y", ":two": 2})
+    for condition, holds in cases.items():
+        params = {
+            "TableName": _TABLE,
+            "Key": serialize({"id": "a"}),
+            "UpdateExpression": "SET touched = :lo",
+            "ConditionExpression": condition,
+            "ExpressionAttributeNames": {"#r": "rank", "#n": "name"},
+            "ExpressionAttributeValues": values,
+        }
+        if holds:
+            engine.update_item(**params)
+        else:
+            with pytest.raises(ClientError) as exc:
+                engine.update_item(**params)
+            assert _code(exc) == "ConditionalCheckFailedException"
+
+
+def test_update_expression_clauses_see_the_old_item(engine):
+    _put(engine, id="a", n=1, items=[1], tags={"x"}, gone="yes")
+    resp = engine.update_item(
+        TableName=_TABLE,
+        Key=serialize({"id": "a"}),
+        UpdateExpression=(
+            "SET n = n + :one, copy = n, items = list_append(items, :more), fresh = if_not_exists(fresh, :one) "
+            "REMOVE gone ADD tags :tag, counter :one"
+        ),
+        ExpressionAttributeValues=serialize({":one": 1, ":more": [2]}) | {":tag": {"SS": ["y"]}},
+        ReturnValues="ALL_NEW",
+    )
+    assert deserialize(resp["Attributes"]) == {
+        "id": "a",
+        "n": 2,
+        "copy": 1,
+        "items": [1, 2],
+        "fresh": 1,
+        "tags": {"x", "y"},
+        "counter": 1,
+    }
+
+
+def test_reserved_words_need_an_attribute_name_alias(engine):
+    _put(engine, id="a", ttl=5)
+    with pytest.raises(ClientError) as exc:
+        engine.update_item(TableName=_TABLE, Key=serialize({"id": "a"}), UpdateExpression="REMOVE ttl")
+    assert _code(exc) == "ValidationException"
+    engine.update_item(
+        TableName=_TABLE,
+        Key=serialize({"id": "a"}),
+        UpdateExpression="SET #t = #t + :one",
+        ExpressionAttributeNames={"#t": "ttl"},
+        ExpressionAttributeValues=serialize({":one": 1}),
+    )
+    assert _get(engine, "a") == {"id": "a", "ttl": 6}
+
+
+@pytest.mark.parametrize(
+    "name", ["exceptions", "duration", "count", "until", "interval", "day", "minute", "last", "bucket"]
+)
+def test_unaliased_reserved_words_are_rejected_in_every_expression(engine, name):
+    _put(engine, id="a", **{name: 1})
+    one = serialize({":one": 1})
+    for params in (
+        {"UpdateExpression": f"SET {name} = :one", "ExpressionAttributeValues": one},
+        {"UpdateExpression": f"REMOVE {name}"},
+        {"UpdateExpression": "REMOVE #n", "ConditionExpression": f"attribute_exists({name})"},
+    ):
+        with pytest.raises(ClientError) as exc:
+            engine.update_item(
+                TableName=_TABLE, Key=serialize({"id": "a"}), ExpressionAttributeNames={"#n": name}, **params
+            )
+        assert "reserved keyword" in exc.value.response["Error"]["Message"]
+    assert _get(engine, "a") == {"id": "a", name: 1}
+
+
+def test_conditional_failure_can_return_the_current_item(engine):
+    _put(engine, id="a", v=1)
+    with pytest.raises(ClientError) as exc:
+        engine.put_item(
+            TableName=_TABLE,
+            Item=serialize({"id": "a", "v": 2}),
+            ConditionExpression="attribute_not_exists(id)",
+            ReturnValuesOnConditionCheckFailure="ALL_OLD",
+        )
+    assert deserialize(exc.value.response["Item"]) == {"id": "a", "v": 1}  # type: ignore[typeddict-item]
+
+
+def test_index_query_is_sorted_sparse_and_pages_with_limit_before_filter(engine):
+    for i, rank in enumerate([5, 1, 4, 2, 3]):
+        _put(engine, id=f"i{i}", owner="o", rank=rank, odd=rank % 2 == 1)
+    _put(engine, id="unranked", owner="o")
+    _put(engine, id="other", owner="p", rank=1)
+    params = {
+        "TableName": _TABLE,
+        "IndexName": "by_owner",
+        "KeyConditionExpression": "#o = :o AND #r >= :min",
+        "FilterExpression": "odd = :t",
+        "ExpressionAttributeNames": {"#o": "owner", "#r": "rank"},
+        "ExpressionAttributeValues": serialize({":o": "o", ":min": 2, ":t": True}),
+        "Limit": 2,
+    }
+    pages = []
+    while True:
+        resp = engine.query(**params)
+        pages.append([deserialize(it)["rank"] for it in resp["Items"]])
+        if "LastEvaluatedKey" not in resp:
+            break
+        params["ExclusiveStartKey"] = resp["LastEvaluatedKey"]
+    # Ranks 2..5 are read two per page; the filter then drops the even ones
+    assert pages == [[3], [5], []]
+    backwards = engine.query(**{**params, "ExclusiveStartKey": None, "Limit": None, "ScanIndexForward": False})
+    assert [deserialize(it)["rank"] for it in backwards["Items"]] == [5, 3]
+
+
+def test_transaction_is_all_or_nothing(engine):
+    _put(engine, id="a", v=1)
+    with pytest.raises(ClientError) as exc:
+        engine.transact_write_items(
+            TransactItems=[
+                {"Put": {"TableName": _TABLE, "Item": serialize({"id": "b", "v": 1})}},
+                {
+                    "ConditionCheck": {
+                        "TableName": _TABLE,
+                        "Key": serialize({"id": "a"}),
+                        "ConditionExpression": "v = :two",
+                        "ExpressionAttributeValues": serialize({":two": 2}),
+                    }
+                },
+            ]
+        )
+    assert _code(exc) == "TransactionCanceledException"
+    assert [r["Code"] for r in exc.value.response["CancellationReasons"]] == ["None", "ConditionalCheckFailed"]  # type: ignore[typeddict-item]
+    assert _get(engine, "b") is None
+
+
+def test_ttl_expiry_deletes_items_and_feeds_the_change_stream(engine):
+    _put(engine, id="a", ttl=100)
+    _put(engine, id="b", ttl=300)
+    engine.delete_item(TableName=_TABLE, Key=serialize({"id": "b"}))
+    assert engine.expire_items(now=200) == 1
+    assert _get(engine, "a") is None
+    changes = engine.read_changes(_TABLE)
+    assert [c["eventName"] for c in changes] == ["INSERT", "INSERT", "REMOVE", "REMOVE"]
+    assert "userIdentity" not in changes[2]
+    assert changes[3]["userIdentity"] == TTL_USER_IDENTITY
+    assert engine.read_changes(_TABLE, after=changes[1]["eventID"], limit=1) == [changes[2]]
+
+
+def test_change_feed_keeps_only_the_most_recent_records():
+    engine = MemoryDynamoDB({_TABLE: TableSchema(key=("id",), stream=True)}, change_retention=3)
+    for i in range(5):
+        _put(engine, id=str(i))
+    changes = engine.read_changes(_TABLE)
+    assert [deserialize(c["dynamodb"]["Keys"])["id"] for c in changes] == ["2", "3", "4"]
+    # A reader that fell behind the retained records resumes at the oldest one left
+    assert engine.read_changes(_TABLE, after=f"{1:021d}") == changes
+    assert engine.read_changes(_TABLE, after=changes[0]["eventID"], limit=1) == [changes[1]]
+    assert engine.read_changes(_TABLE, after=changes[-1]["eventID"]) == []
+
+
+def test_automatic_sweep_uses_the_clock():
+    now = [1000.0]
+    schema = TableSchema(key=("id",), ttl_attribute="ttl")
+    engine = MemoryDynamoDB({_TABLE: schema}, clock=lambda: now[0], ttl_sweep_interval=10)
+    _put(engine, id="a", ttl=1005)
+    now[0] = 1006
+    # Within the sweep interval of the last sweep the item is still visible, as with DynamoDB's lagging TTL
+    assert _get(engine, "a") is not None
+    now[0] = 1011
+    assert _get(engine, "a") is None
+
+
+def test_expired_bookings_reach_the_reminder_stream(fake_dynamodb, monkeypatch):
+    start = datetime(2030, 1, 1, 12, tzinfo=UTC)
+    booking = dal.create_booking(
+        BookingCreate(user_id="u-1", resource_id="room-1", start_time=start, end_time=start + timedelta(hours=1))
+    )
+    assert booking.ttl is not None
+    fake_dynamodb.expire_items(now=booking.ttl)
+    events = MagicMock()
+    events.put_events.return_value = {"FailedEntryCount": 0, "Entries": [{"EventId": "e"}]}
+    monkeypatch.setattr(sp, "_events", events)
+    sp.lambda_handler({"Records": fake_dynamodb.read_changes(dal._TABLE_NAME)}, context=MagicMock())
+    [entry] = events.put_events.call_args.kwargs["Entries"]
+    assert booking.booking_id in entry["Detail"]
+
+
+def test_dal_selects_the_memory_backend_from_the_environment(monkeypatch):
+    monkeypatch.setattr(dal, "_client", None)
+    monkeypatch.setattr(dal, "_STORAGE_BACKEND", "memory")
+    assert isinstance(dal._ddb(), MemoryDynamoDB)
+    monkeypatch.setattr(dal, "_client", None)
+    monkeypatch.setattr(dal, "_STORAGE_BACKEND", "sqlite")
+    with pytest.raises(ValueError, match="STORAGE_BACKEND"):
+        dal._ddb()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import pytest
+
+from app import recurrence
+
+DAY = 24 * 60 * 60
+WEEK = 7 * DAY
+
+
+def test_build_rule_from_count_and_until():
+    by_count = recurrence.build_rule(1000, 1000 + 3600, "weekly", 2, 3, None)
+    assert by_count["period"] == 2 * WEEK
+    assert by_count["last"] == 1000 + 4 * WEEK
+    by_until = recurrence.build_rule(1000, 1000 + 3600, "weekly", 2, None, 1000 + 5 * WEEK)
+    assert by_until["last"] == by_count["last"]
+
+
+@pytest.mark.parametrize(
+    ("end", "count", "until", "match"),
+    [
+        (1000, 3, None, "end after"),
+        (1000 + 2 * DAY, 3, None, "overlap"),
+        (1000 + 60, None, 999, "before"),
+        (1000 + 60, recurrence.MAX_OCCURRENCES + 1, None, "more than"),
+    ],
+)
+def test_build_rule_rejects(end, count, until, match):
+    with pytest.raises(ValueError, match=match):
+        recurrence.build_rule(1000, end, "daily", 1, count, until)
+
+
+def test_occurrences_jump_to_window_and_skip_exceptions():
+    rule = recurrence.build_rule(0, 3600, "daily", 1, 10, None)
+    rule["exceptions"] = [3 * DAY]
+    assert list(recurrence.occurrences(rule, 2 * DAY - 1, 5 * DAY)) == [2 * DAY, 4 * DAY, 5 * DAY]
+    assert list(recurrence.occurrences(rule, 20 * DAY)) == []
+    assert recurrence.is_occurrence(rule, 4 * DAY)
+    assert not recurrence.is_occurrence(rule, 3 * DAY)
+    assert not recurrence.is_occurrence(rule, 4 * DAY + 1)
+
+
+def test_overlapping_matches_intervals_not_just_starts():
+    rule = recurrence.build_rule(0, 3600, "daily", 1, 3, None)
+    assert list(recurrence.overlapping(rule, DAY + 3599, DAY + 7200)) == [DAY]
+    assert list(recurrence.overlapping(rule, DAY + 3600, DAY + 7200)) == []
+    assert list(recurrence.overlapping(rule, -100, 0)) == []
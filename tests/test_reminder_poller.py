@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+import app.reminder_poller as poller
+import app.stream_processor as sp
+from app import aws, dal, reminders
+from app.memory_backend import MemoryDynamoDB
+from app.models import BookingCreate, BookingUpdate
+
+START = datetime(2030, 1, 1, 12, tzinfo=UTC)
+LEAD = 900
+DUE = int(START.timestamp()) - LEAD
+
+
+@pytest.fixture(autouse=True)
+def scheduled(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Before fake_dynamodb builds its tables, so bookings get no TTL
+    monkeypatch.setattr(reminders, "SCHEDULED", True)
+
+
+@pytest.fixture()
+def engine(scheduled: None, fake_dynamodb: MemoryDynamoDB, monkeypatch: pytest.MonkeyPatch) -> MemoryDynamoDB:
+    monkeypatch.setattr(poller, "_client", fake_dynamodb)
+    return fake_dynamodb
+
+
+@pytest.fixture()
+def events(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    events = MagicMock()
+    events.put_events.return_value = {"FailedEntryCount": 0, "Entries": []}
+    monkeypatch.setattr(sp, "_events", events)
+    monkeypatch.setattr(sp, "_RETRY_BASE_DELAY_SECONDS", 0)
+    return events
+
+
+def _book(resource_id: str = "room-1", start: datetime = START, lead: int | None = LEAD) -> str:
+    payload = BookingCreate(
+        user_id="u-1", resource_id=resource_id, start_time=start, end_time=start + timedelta(minutes=30)
+    )
+    payload.reminder_lead_seconds = lead
+    return dal.create_booking(payload).booking_id
+
+
+def _sent(events: MagicMock) -> list[dict[str, Any]]:
+    return [json.loads(e["Detail"]) for call in events.put_events.call_args_list for e in call.kwargs["Entries"]]
+
+
+def test_reminder_fires_when_due_and_the_booking_survives(engine, events):
+    booking_id = _book()
+    assert poller.drain(DUE - 1).sent == 0
+    assert poller.drain(DUE) == poller.DrainResult(1, 0, 0, reminders.minute(DUE) - 1)
+    assert _sent(events) == [
+        {"version": "1.0", "type": "ReminderDue", "booking_id": booking_id, "user_id": "u-1", "ttl": DUE}
+    ]
+    assert poller.drain(DUE + 600).sent == 0
+    engine.expire_items(now=DUE + 10**6)
+    assert dal.get_booking(booking_id).ttl == DUE
+
+
+def test_changed_cancelled_and_deleted_reminders_are_dropped(engine, events):
+    poller.drain(DUE - 1800)
+    moved = _book("room-1")
+    dal.update_booking(moved, BookingUpdate(reminder_lead_seconds=LEAD * 2))
+    dal.cancel_booking(_book("room-2"))
+    dal.delete_booking(_book("room-3"))
+    result = poller.drain(DUE + 60)
+    assert (result.sent, result.dropped) == (1, 3)
+    assert _sent(events)[0]["ttl"] == DUE - LEAD
+    assert engine.scan(TableName=reminders.TABLE_NAME)["Items"] == [
+        {"bucket": {"S": "poller"}, "booking_id": {"S": "cursor"}, "minute": {"N": str(reminders.minute(DUE))}}
+    ]
+
+
+def test_unchanged_reminder_lead_files_no_reminder(engine, events, slow_dynamodb):
+    booking_id = _book()
+    calls = slow_dynamodb
+    calls.clear()
+    updated = dal.update_booking(booking_id, BookingUpdate(reminder_lead_seconds=LEAD))
+    assert (updated.ttl, updated.version) == (DUE, 2)
+    # The in-place write declines a lead that did not change; the fallback write leaves the schedule alone
+    assert calls == {"update_item": 2}
+    assert poller.drain(DUE).sent == 1
+
+
+def test_busy_minute_is_spread_over_shards_and_sent_in_batches(engine, events, slow_dynamodb, monkeypatch):
+    for i in range(25):
+        _book(f"room-{i}")
+    assert len({item["bucket"]["S"] for item in engine.scan(TableName=reminders.TABLE_NAME)["Items"]}) > 1
+    monkeypatch.setattr(poller, "_client", dal._client)
+    calls = slow_dynamodb
+    calls.clear()
+    assert poller.drain(DUE + 30).sent == 25  # noqa: PLR2004
+    # Only the due minute and the overlap behind it, once per shard; the bookings checked in one batch
+    assert calls["query"] == (poller._OVERLAP_MINUTES + 1) * reminders.SHARDS
+    assert calls["batch_get_item"] == 1
+    assert [len(call.kwargs["Entries"]) for call in events.put_events.call_args_list] == [10, 10, 5]
+
+
+def test_rejected_events_are_kept_for_the_next_run(engine, events):
+    booking_id = _book()
+    events.put_events.return_value = {"FailedEntryCount": 1, "Entries": [{"ErrorCode": "ThrottlingException"}]}
+    assert poller.drain(DUE + 120) == poller.DrainResult(0, 0, 1, reminders.minute(DUE) - 1)
+    events.put_events.reset_mock(return_value=True)
+    events.put_events.return_value = {"FailedEntryCount": 0, "Entries": []}
+    assert poller.drain(DUE + 600).sent == 1
+    assert _sent(events)[0]["booking_id"] == booking_id
+
+
+def test_catches_up_after_an_outage_a_bounded_stretch_per_run(engine, events, monkeypatch):
+    monkeypatch.setattr(poller, "_MAX_MINUTES_PER_RUN", 30)
+    poller.drain(DUE - 3600)
+    _book()
+    _book("room-2", start=START + timedelta(minutes=30))
+    # Two hours behind, 30 minutes (plus the overlap) per run: the reminders go out in the runs covering them
+    runs = [poller.drain(DUE + 3600) for _ in range(5)]
+    assert [run.sent for run in runs] == [0, 0, 1, 1, 0]
+    assert runs[-1].drained_through == reminders.minute(DUE + 3600) - 1
+
+
+def test_overdue_reminder_is_filed_under_the_current_minute(engine, events):
+    start = datetime.now(UTC) + timedelta(minutes=5)
+    _book(start=start, lead=3600)
+    assert poller.drain(time.time()).sent == 1
+
+
+def test_lambda_handler_uses_the_clock(engine, events, monkeypatch):
+    _book()
+    monkeypatch.setattr(poller, "_clock", lambda: float(DUE))
+    assert poller.lambda_handler({}, context=MagicMock())["sent"] == 1
+
+
+def test_backfill_files_the_reminders_of_bookings_made_before_the_switch(engine, events, monkeypatch):
+    monkeypatch.setattr(reminders, "SCHEDULED", False)
+    pending = _book("room-1")
+    dal.cancel_booking(_book("room-2"))
+    _book("room-3", lead=None)
+    overdue = _book("room-4", start=datetime.now(UTC) - timedelta(hours=1))
+    assert engine.scan(TableName=reminders.TABLE_NAME)["Items"] == []
+
+    monkeypatch.setattr(reminders, "SCHEDULED", True)
+    assert dal.backfill_reminder_schedule() == 2  # noqa: PLR2004
+    # The overdue one was filed under the current minute
+    now = time.time()
+    assert poller.drain(now).sent == 1
+    assert [event["booking_id"] for event in _sent(events)] == [overdue]
+    # The other one waits under its due minute
+    filed = [aws.deserialize(item) for item in engine.scan(TableName=reminders.TABLE_NAME)["Items"]]
+    assert [(item["bucket"], item["due"]) for item in filed if item["booking_id"] == pending] == [
+        (reminders.bucket(reminders.minute(DUE), reminders.shard(pending)), DUE)
+    ]
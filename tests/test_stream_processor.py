@@ -17,6 +17,10 @@ def make_ddb_attr_n(val: int) -> dict[str, Any]:
     return {"N": str(val)}
 
 
+# What DynamoDB puts on stream records of items its TTL process deleted
+TTL_IDENTITY = {"type": "Service", "principalId": "dynamodb.amazonaws.com"}
+
+
 def test_stream_processor_emits_event_for_ttl_remove(monkeypatch: pytest.MonkeyPatch) -> None:
     fake_events = MagicMock()
     monkeypatch.setattr(sp, "_events", fake_events)
@@ -25,6 +29,7 @@ def test_stream_processor_emits_event_for_ttl_remove(monkeypatch: pytest.MonkeyP
         "Records": [
             {
                 "eventName": "REMOVE",
+                "userIdentity": TTL_IDENTITY,
                 "dynamodb": {
                     "OldImage": {
                         "booking_id": make_ddb_attr_s("b-1"),
@@ -66,9 +71,121 @@ def test_stream_processor_skips_missing_fields(monkeypatch: pytest.MonkeyPatch)
         "Records": [
             {
                 "eventName": "REMOVE",
+                "userIdentity": TTL_IDENTITY,
                 "dynamodb": {"OldImage": {"booking_id": make_ddb_attr_s("b-1"), "user_id": make_ddb_attr_s("u-1")}},
             }
         ]
     }
     sp.lambda_handler(event, context=MagicMock())  # type: ignore[arg-type]
     fake_events.put_events.assert_not_called()
+
+
+def test_stream_processor_skips_user_deletes(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_events = MagicMock()
+    monkeypatch.setattr(sp, "_events", fake_events)
+
+    deleted = _remove_record("b-1", "1")
+    # A DeleteItem through the API: no userIdentity at all
+    del deleted["userIdentity"]
+    # Some other service principal is not the TTL process either
+    other = {**_remove_record("b-2", "2"), "userIdentity": {"type": "Service", "principalId": "backup.amazonaws.com"}}
+    sp.lambda_handler({"Records": [deleted, other]}, context=MagicMock())  # type: ignore[arg-type]
+    fake_events.put_events.assert_not_called()
+
+
+def test_decode_reminders_keeps_only_ttl_removals_with_a_reminder() -> None:
+    modify = {**_remove_record("b-3", "3"), "eventName": "MODIFY"}
+    series = _remove_record("s-1", "4")
+    del series["dynamodb"]["OldImage"]["ttl"]
+    decoded = sp.decode_reminders([_remove_record("b-1", "1"), modify, series, _remove_record("b-2", "5")])
+    assert decoded == [
+        sp.ReminderRecord("1", "b-1", "u-1", 1700000000),
+        sp.ReminderRecord("5", "b-2", "u-1", 1700000000),
+    ]
+
+
+def _remove_record(booking_id: str, seq: str) -> dict[str, Any]:
+    return {
+        "eventName": "REMOVE",
+        "userIdentity": TTL_IDENTITY,
+        "dynamodb": {
+            "SequenceNumber": seq,
+            "OldImage": {
+                "booking_id": make_ddb_attr_s(booking_id),
+                "user_id": make_ddb_attr_s("u-1"),
+                "ttl": make_ddb_attr_n(1700000000),
+            },
+        },
+    }
+
+
+def test_stream_processor_batches_put_events(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_events = MagicMock()
+    fake_events.put_events.return_value = {"FailedEntryCount": 0, "Entries": []}
+    monkeypatch.setattr(sp, "_events", fake_events)
+
+    event = {"Records": [_remove_record(f"b-{i}", str(i)) for i in range(15)]}
+    resp = sp.lambda_handler(event, context=MagicMock())  # type: ignore[arg-type]
+
+    sizes = [len(call.kwargs["Entries"]) for call in fake_events.put_events.call_args_list]
+    assert sizes == [10, 5]
+    assert resp == {"batchItemFailures": []}
+
+
+def test_stream_processor_chunks_by_payload_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_events = MagicMock()
+    fake_events.put_events.return_value = {"FailedEntryCount": 0, "Entries": []}
+    monkeypatch.setattr(sp, "_events", fake_events)
+    # Roughly 100 KB per entry -> at most two entries fit under 256 KB
+    big_id = "b" * 100_000
+
+    event = {"Records": [_remove_record(f"{big_id}{i}", str(i)) for i in range(5)]}
+    sp.lambda_handler(event, context=MagicMock())  # type: ignore[arg-type]
+
+    sizes = [len(call.kwargs["Entries"]) for call in fake_events.put_events.call_args_list]
+    assert sizes == [2, 2, 1]
+
+
+def test_stream_processor_retries_only_failed_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_events = MagicMock()
+    fake_events.put_events.side_effect = [
+        {"FailedEntryCount": 1, "Entries": [{"EventId": "e1"}, {"ErrorCode": "ThrottlingException"}]},
+        {"FailedEntryCount": 0, "Entries": [{"EventId": "e2"}]},
+    ]
+    monkeypatch.setattr(sp, "_events", fake_events)
+    monkeypatch.setattr(sp, "_RETRY_BASE_DELAY_SECONDS", 0)
+
+    event = {"Records": [_remove_record("b-1", "1"), _remove_record("b-2", "2")]}
+    resp = sp.lambda_handler(event, context=MagicMock())  # type: ignore[arg-type]
+
+    retried = fake_events.put_events.call_args_list[1].kwargs["Entries"]
+    assert [json.loads(e["Detail"])["booking_id"] for e in retried] == ["b-2"]
+    assert resp == {"batchItemFailures": []}
+
+
+def test_stream_processor_reports_partial_batch_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_events = MagicMock()
+    fake_events.put_events.return_value = {
+        "FailedEntryCount": 1,
+        "Entries": [{"ErrorCode": "InternalFailure"}],
+    }
+    monkeypatch.setattr(sp, "_events", fake_events)
+    monkeypatch.setattr(sp, "_RETRY_BASE_DELAY_SECONDS", 0)
+
+    event = {"Records": [_remove_record("b-1", "111")]}
+    resp = sp.lambda_handler(event, context=MagicMock())  # type: ignore[arg-type]
+
+    assert fake_events.put_events.call_count == sp._MAX_PUT_ATTEMPTS
+    assert resp == {"batchItemFailures": [{"itemIdentifier": "111"}]}
+
+
+def test_stream_processor_leaves_scheduled_reminders_to_the_poller(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_events = MagicMock()
+    monkeypatch.setattr(sp, "_events", fake_events)
+    monkeypatch.setattr(sp.reminders, "SCHEDULED", True)
+    old_image = {"booking_id": make_ddb_attr_s("b-1"), "user_id": make_ddb_attr_s("u-1"), "ttl": make_ddb_attr_n(1)}
+    sp.lambda_handler(
+        {"Records": [{"eventName": "REMOVE", "userIdentity": TTL_IDENTITY, "dynamodb": {"OldImage": old_image}}]},
+        context=MagicMock(),
+    )  # type: ignore[arg-type]
+    fake_events.put_events.assert_not_called()
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import importlib
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.stream_processor as sp
+from app import api, archive, dal, user_summary
+from app.memory_backend import MemoryDynamoDB
+from app.models import BookingCreate, BookingUpdate
+
+START = datetime(2030, 1, 1, 9, tzinfo=UTC)
+NOW = START.timestamp() - 3600
+
+
+@pytest.fixture()
+def engine(fake_dynamodb: MemoryDynamoDB, monkeypatch: pytest.MonkeyPatch) -> MemoryDynamoDB:
+    monkeypatch.setattr(user_summary, "ENABLED", True)
+    monkeypatch.setattr(sp, "_dynamodb", fake_dynamodb)
+    monkeypatch.setattr(sp, "_events", MagicMock())
+    monkeypatch.setattr(sp, "_clock", lambda: NOW)
+    return fake_dynamodb
+
+
+@pytest.fixture()
+def client(engine: MemoryDynamoDB, monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    # The route is only registered with the summary enabled
+    yield TestClient(importlib.reload(api).app)
+    monkeypatch.undo()
+    importlib.reload(api)
+
+
+Stream = Callable[..., dict[str, Any]]
+
+
+@pytest.fixture()
+def stream(engine: MemoryDynamoDB) -> Stream:
+    """Runs the stream processor, in batches of 10, over the given records or else everything not yet streamed."""
+    seen: list[str] = []
+
+    def run(records: list[dict[str, Any]] | None = None) -> dict[str, Any]:
+        if records is None:
+            records = engine.read_changes(dal._TABLE_NAME, after=seen[-1] if seen else None)
+        seen.extend(record["eventID"] for record in records)
+        failures: list[dict[str, str]] = []
+        for start in range(0, len(records), 10):
+            resp = sp.lambda_handler({"Records": records[start : start + 10]}, context=MagicMock())  # type: ignore[arg-type]
+            failures.extend(resp["batchItemFailures"])
+        return {"batchItemFailures": failures}
+
+    return run
+
+
+def _book(user_id: str, hours: int) -> str:
+    start = START + timedelta(hours=hours)
+    end = start + timedelta(minutes=30)
+    payload = BookingCreate(user_id=user_id, resource_id=f"r-{user_id}-{hours}", start_time=start, end_time=end)
+    return dal.create_booking(payload).booking_id
+
+
+def _summary(engine: MemoryDynamoDB, user_id: str, now: float = NOW) -> tuple[int, int, list[str]]:
+    summary = user_summary.read(engine, user_id, now)
+    return summary.active, summary.cancelled, [booking_id for _, booking_id in summary.upcoming]
+
+
+def test_summary_follows_creates_cancels_moves_and_deletes(engine, stream):
+    first, second, third = _book("u-1", 1), _book("u-1", 2), _book("u-1", 3)
+    _book("u-2", 1)
+    stream()
+    assert _summary(engine, "u-1") == (3, 0, [first, second, third])
+
+    dal.cancel_booking(first)
+    dal.update_booking(third, BookingUpdate(start_time=START, end_time=START + timedelta(minutes=30)))
+    dal.delete_booking(second)
+    stream()
+    assert _summary(engine, "u-1") == (1, 1, [third])
+    assert _summary(engine, "u-2")[:2] == (1, 0)
+    assert _summary(engine, "u-unknown") == (0, 0, [])
+
+
+def test_archived_bookings_stay_counted(engine, stream, tmp_path, monkeypatch):
+    monkeypatch.setattr(archive, "ARCHIVE_PATH", str(tmp_path))
+    archive.store.cache_clear()
+    dal.cancel_booking(_book("u-1", 1))
+    _book("u-1", 2)
+    stream()
+    assert dal.archive_bookings(30, now=START + timedelta(days=60)) == 2  # noqa: PLR2004
+    try:
+        stream()
+    finally:
+        archive.store.cache_clear()
+    assert _summary(engine, "u-1")[:2] == (1, 1)
+    # A booking the user deletes still leaves the counts
+    third = _book("u-1", 3)
+    stream()
+    assert _summary(engine, "u-1")[:2] == (2, 1)
+    dal.delete_booking(third)
+    stream()
+    assert _summary(engine, "u-1")[:2] == (1, 1)
+
+
+def test_retried_batches_are_not_counted_twice(engine, stream):
+    _book("u-1", 1)
+    _book("u-1", 2)
+    records = engine.read_changes(dal._TABLE_NAME)
+    assert stream(records) == {"batchItemFailures": []}
+    stream(records)
+    assert _summary(engine, "u-1")[:2] == (2, 0)
+
+
+def test_upcoming_list_is_refilled_from_the_index(engine, stream):
+    ids = [_book("u-1", hours) for hours in range(1, 14)]
+    stream()
+    item = engine.get_item(TableName=user_summary.TABLE_NAME, Key={"user_id": {"S": "u-1"}})["Item"]
+    assert len(item["upcoming"]["L"]) == user_summary._KEPT
+    assert item["upcoming_complete"] == {"BOOL": False}
+
+    # Dropping below UPCOMING makes the stream processor read the next ones from the index
+    for booking_id in ids[:7]:
+        dal.cancel_booking(booking_id)
+    stream()
+    assert _summary(engine, "u-1") == (6, 7, ids[7:12])
+    item = engine.get_item(TableName=user_summary.TABLE_NAME, Key={"user_id": {"S": "u-1"}})["Item"]
+    assert item["upcoming_complete"] == {"BOOL": True}
+
+
+def test_bookings_that_have_started_leave_the_upcoming_list(engine, stream):
+    ids = [_book("u-1", hours) for hours in range(1, 4)]
+    stream()
+    assert _summary(engine, "u-1", now=(START + timedelta(hours=2)).timestamp()) == (3, 0, ids[2:])
+
+
+def test_concurrent_updates_to_one_summary_are_retried(engine, stream, monkeypatch):
+    _book("u-1", 1)
+    _book("u-1", 2)
+    first, second = [[record] for record in engine.read_changes(dal._TABLE_NAME)]
+
+    class Racing:
+        """Lets another shard's batch land between our read and our conditional write, once."""
+
+        def __init__(self) -> None:
+            self.raced = False
+
+        def __getattr__(self, name: str) -> Any:
+            return getattr(engine, name)
+
+        def put_item(self, **params: Any) -> dict[str, Any]:
+            if not self.raced:
+                self.raced = True
+                user_summary.update(engine, user_summary.decode_changes(second), NOW)
+            return engine.put_item(**params)
+
+    monkeypatch.setattr(sp, "_dynamodb", Racing())
+    assert stream(first) == {"batchItemFailures": []}
+    assert _summary(engine, "u-1")[:2] == (2, 0)
+
+
+def test_unapplied_changes_are_reported_as_batch_failures(engine, stream, monkeypatch):
+    _book("u-1", 1)
+    monkeypatch.setattr(user_summary, "_MAX_ATTEMPTS", 0)
+    [record] = engine.read_changes(dal._TABLE_NAME)
+    assert stream([record]) == {"batchItemFailures": [{"itemIdentifier": record["dynamodb"]["SequenceNumber"]}]}
+
+
+def test_summary_endpoint(client, stream):
+    booking_id = _book("u-1", 1)
+    stream()
+    resp = client.get("/users/u-1/bookings/summary")
+    assert resp.status_code == 200  # noqa: PLR2004
+    assert resp.json() == {
+        "user_id": "u-1",
+        "active": 1,
+        "cancelled": 0,
+        "upcoming": [{"booking_id": booking_id, "start_time": "2030-01-01T10:00:00Z"}],
+    }
@@ -0,0 +1,296 @@
+"""Latency and load benchmark for the two Lambda handlers.
+
+Drives ``app.api_handler.lambda_handler`` with synthetic API Gateway HTTP API (v2.0) events and
+``app.stream_processor.lambda_handler`` with synthetic DynamoDB stream batches, in-process, against the in-memory
+storage engine and a fake EventBridge client that each sleep a fixed time per call to stand in for the network.
+Requests run one after another, as a single Lambda execution environment would serve them.
+
+Reports per route: throughput, p50/p95/p99 latency, DynamoDB and EventBridge calls per request and peak bytes
+allocated per request (measured in a separate tracemalloc pass so tracing does not skew the timings). Results
+are written as JSON; ``--compare`` checks them against an earlier run and fails on regressions.
+
+Usage: uv run python tools/dev/bench.py [--requests 200] [--output bench.json] [--compare baseline.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess  # nosec B404 - only asks git for the current commit
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+# Set before the app is imported: the handlers read these at import time
+os.environ.setdefault("POWERTOOLS_TRACE_DISABLED", "true")
+os.environ.setdefault("POWERTOOLS_METRICS_DISABLED", "true")
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+os.environ.setdefault("AWS_DEFAULT_REGION", "eu-west-1")
+sys.path.insert(0, str(SRC))
+
+from app import api_handler, dal, stream_processor  # noqa: E402
+from app.aws import serialize  # noqa: E402
+from app.memory_backend import LatencyProxy, MemoryDynamoDB  # noqa: E402
+
+# A route's p95 may grow by this fraction over the baseline before --compare fails
+DEFAULT_MAX_REGRESSION = 0.25
+_STREAM_ROUTE = "stream REMOVE batch"
+_EPOCH = datetime(2030, 1, 1, tzinfo=UTC)
+
+
+class _Context:
+    function_name = "bench"
+    aws_request_id = "bench"
+
+
+class _EventBridge:
+    def put_events(self, Entries: list[dict[str, Any]]) -> dict[str, Any]:  # noqa: N803
+        return {"FailedEntryCount": 0, "Entries": [{"EventId": str(i)} for i in range(len(Entries))]}
+
+
+def _event(method: str, path: str, body: Any = None, query: str = "") -> dict[str, Any]:
+    return {
+        "version": "2.0",
+        "routeKey": "$default",
+        "rawPath": path,
+        "rawQueryString": query,
+        "headers": {"host": "bench.local", "content-type": "application/json"},
+        "requestContext": {"http": {"method": method, "path": path, "protocol": "HTTP/1.1"}},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def _iso(value: datetime) -> str:
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def _api_scenario(i: int) -> list[tuple[str, Callable[[dict[str, Any]], dict[str, Any]]]]:
+    """One user journey; each step builds its event from the state earlier steps left behind."""
+    start = _EPOCH + timedelta(hours=i)
+    user, resource = f"u-{i % 20}", f"room-{i % 10}"
+
+    def create(state: dict[str, Any]) -> dict[str, Any]:
+        payload = {
+            "user_id": user,
+            "resource_id": resource,
+            "start_time": _iso(start),
+            "end_time": _iso(start + timedelta(minutes=30)),
+        }
+        return _event("POST", "/bookings", payload)
+
+    def by_id(method: str, suffix: str = "", body: Any = None) -> Callable[[dict[str, Any]], dict[str, Any]]:
+        return lambda state: _event(method, f"/bookings/{state['booking_id']}{suffix}", body)
+
+    window = f"from={_iso(start - timedelta(hours=12))}&to={_iso(start + timedelta(hours=12))}"
+    return [
+        ("GET /health", lambda state: _event("GET", "/health")),
+        ("POST /bookings", create),
+        ("GET /bookings/{booking_id}", by_id("GET")),
+        ("PUT /bookings/{booking_id}", by_id("PUT", body={"reminder_lead_seconds": 600})),
+        ("GET /users/{user_id}/bookings", lambda state: _event("GET", f"/users/{user}/bookings", query="limit=50")),
+        (
+            "GET /resources/{resource_id}/availability",
+            lambda state: _event("GET", f"/resources/{resource}/availability", query=window),
+        ),
+        ("POST /bookings/{booking_id}/cancel", by_id("POST", "/cancel")),
+    ]
+
+
+def _stream_batches(count: int, size: int) -> list[dict[str, Any]]:
+    """REMOVE batches as the TTL process would produce them, taken from the memory engine's change feed."""
+    engine = MemoryDynamoDB(dal.memory_schemas(), ttl_sweep_interval=None)
+    for i in range(count * size):
+        item = {"booking_id": f"b-{i}", "user_id": f"u-{i % 20}", "start_time": _iso(_EPOCH), "ttl": 1000 + i}
+        engine.put_item(TableName=dal._TABLE_NAME, Item=serialize(item))
+    engine.expire_items(now=10**9)
+    removes = [r for r in engine.read_changes(dal._TABLE_NAME) if r["eventName"] == "REMOVE"]
+    return [{"Records": removes[i : i + size]} for i in range(0, len(removes), size)]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.timings: dict[str, list[float]] = {}
+        self.calls: dict[str, Counter[str]] = {}
+        self.errors: Counter[str] = Counter()
+        self.allocations: dict[str, list[int]] = {}
+        self.elapsed = 0.0
+
+    def run(self, route: str, invoke: Callable[[], Any], calls: Counter[str], *, measure_alloc: bool) -> Any:
+        before = Counter(calls)
+        if measure_alloc:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            result = invoke()
+            self.allocations.setdefault(route, []).append(tracemalloc.get_traced_memory()[1] - baseline)
+            return result
+        started = time.perf_counter()
+        result = invoke()
+        took = time.perf_counter() - started
+        self.elapsed += took
+        self.timings.setdefault(route, []).append(took)
+        self.calls.setdefault(route, Counter()).update(calls - before)
+        return result
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    calls: Counter[str] = Counter()
+    recorder = Recorder()
+    context: Any = _Context()
+
+    def api_pass(first: int, count: int, *, measure_alloc: bool) -> None:
+        for i in range(first, first + count):
+            state: dict[str, Any] = {}
+            for route, build in _api_scenario(i):
+                event = build(state)
+                invoke = partial(api_handler.lambda_handler, event, context)
+                resp = recorder.run(route, invoke, calls, measure_alloc=measure_alloc)
+                if resp["statusCode"] >= 400:  # noqa: PLR2004
+                    recorder.errors[route] += 1
+                if route == "POST /bookings" and resp["statusCode"] < 400:  # noqa: PLR2004
+                    state["booking_id"] = json.loads(resp["body"])["booking_id"]
+
+    def stream_pass(batches: list[dict[str, Any]], *, measure_alloc: bool) -> None:
+        for batch in batches:
+            invoke = partial(stream_processor.lambda_handler, batch, context)
+            resp = recorder.run(_STREAM_ROUTE, invoke, calls, measure_alloc=measure_alloc)
+            if resp.get("batchItemFailures"):
+                recorder.errors[_STREAM_ROUTE] += 1
+
+    api_handler._DIRECT_DISPATCH = args.direct
+    engine = MemoryDynamoDB(dal.memory_schemas(), ttl_sweep_interval=None)
+    dal._client = LatencyProxy(engine, args.ddb_latency_ms / 1000, calls, count_as="dynamodb")  # type: ignore[assignment]
+    events = LatencyProxy(_EventBridge(), args.events_latency_ms / 1000, calls, count_as="eventbridge")
+    stream_processor._events = events  # type: ignore[assignment]
+    batches = _stream_batches(args.stream_batches, args.batch_size)
+
+    # Warm up imports, pydantic validators and parser caches, then time, then measure allocations
+    api_pass(0, args.warmup, measure_alloc=False)
+    stream_pass(batches[:1], measure_alloc=False)
+    recorder = Recorder()
+    api_pass(args.warmup, args.requests, measure_alloc=False)
+    stream_pass(batches, measure_alloc=False)
+    tracemalloc.start()
+    try:
+        alloc_runs = max(1, args.requests // 10)
+        api_pass(args.warmup + args.requests, alloc_runs, measure_alloc=True)
+        stream_pass(batches[: max(1, len(batches) // 10)], measure_alloc=True)
+    finally:
+        tracemalloc.stop()
+
+    routes = {}
+    for route, samples in recorder.timings.items():
+        n = len(samples)
+        per_request = recorder.calls[route]
+        routes[route] = {
+            "requests": n,
+            "errors": recorder.errors[route],
+            "throughput_rps": n / sum(samples),
+            "p50_ms": _percentile(samples, 50) * 1000,
+            "p95_ms": _percentile(samples, 95) * 1000,
+            "p99_ms": _percentile(samples, 99) * 1000,
+            "dynamodb_calls_per_request": per_request["dynamodb"] / n,
+            "eventbridge_calls_per_request": per_request["eventbridge"] / n,
+            "peak_alloc_kib_per_request": statistics.mean(recorder.allocations.get(route, [0])) / 1024,
+        }
+    total = sum(len(s) for s in recorder.timings.values())
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": datetime.now(UTC).isoformat(),
+            "python": platform.python_version(),
+            "ddb_latency_ms": args.ddb_latency_ms,
+            "events_latency_ms": args.events_latency_ms,
+            "stream_batch_size": args.batch_size,
+            "direct_dispatch": args.direct,
+            "throughput_rps": total / recorder.elapsed,
+        },
+        "routes": routes,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        proc = subprocess.run(  # nosec B603 B607
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=SRC
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return proc.stdout.strip()
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Regressions of ``current`` against ``baseline``: slower p95 beyond the allowance, or more backend calls."""
+    problems = []
+    for route, old in baseline["routes"].items():
+        new = current["routes"].get(route)
+        if new is None:
+            continue
+        if new["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            problems.append(f"{route}: p95 {old['p95_ms']:.2f} -> {new['p95_ms']:.2f} ms")
+        for metric in ("dynamodb_calls_per_request", "eventbridge_calls_per_request"):
+            # Call counts are deterministic, so any increase is a real change
+            if new[metric] > old[metric] + 1e-9:
+                problems.append(f"{route}: {metric} {old[metric]:.2f} -> {new[metric]:.2f}")
+        if new["errors"] > old["errors"]:
+            problems.append(f"{route}: errors {old['errors']} -> {new['errors']}")
+    return problems
+
+
+def _print(results: dict[str, Any]) -> None:
+    meta = results["meta"]
+    overall = f"overall {meta['throughput_rps']:.0f} req/s"
+    print(f"commit {meta['commit']}  {overall}  (ddb {meta['ddb_latency_ms']} ms/call)")
+    print(f"{'route':44} {'req/s':>8} {'p50':>7} {'p95':>7} {'p99':>7} {'ddb':>5} {'eb':>5} {'KiB':>7} {'err':>4}")
+    for route, r in results["routes"].items():
+        print(
+            f"{route:44} {r['throughput_rps']:8.0f} {r['p50_ms']:7.2f} {r['p95_ms']:7.2f} {r['p99_ms']:7.2f} "
+            f"{r['dynamodb_calls_per_request']:5.1f} {r['eventbridge_calls_per_request']:5.1f} "
+            f"{r['peak_alloc_kib_per_request']:7.1f} {r['errors']:4d}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="timed journeys through every API route")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--stream-batches", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=100, help="records per stream batch")
+    parser.add_argument("--ddb-latency-ms", type=float, default=2.0)
+    parser.add_argument("--events-latency-ms", type=float, default=5.0)
+    parser.add_argument("--direct", action="store_true", help="serve API routes with app.direct instead of Mangum")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="earlier --output to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=DEFAULT_MAX_REGRESSION)
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    _print(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        problems = compare(results, json.loads(args.compare.read_text()), args.max_regression)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Import-time budget for the Lambda entry points.
+
+Imports each handler module in a fresh interpreter under ``python -X importtime`` (with tracing and metrics
+disabled, so only our own import graph is measured), takes the median of several runs and fails when a
+handler exceeds its budget or pulls in a module it must not load.
+
+Usage: uv run python tools/dev/import_budget.py [--runs 5] [--top 10]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess  # nosec B404 - runs this interpreter on a fixed module list
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+# handler module -> (budget in ms, modules it must never import)
+BUDGETS: dict[str, tuple[float, tuple[str, ...]]] = {
+    "app.stream_processor": (150.0, ("fastapi", "pydantic", "starlette", "mangum", "boto3", "aws_xray_sdk")),
+    "app.reminder_poller": (150.0, ("fastapi", "pydantic", "starlette", "mangum", "boto3", "aws_xray_sdk")),
+    "app.api_handler": (800.0, ("boto3", "aws_xray_sdk")),
+}
+
+ENV = {
+    **os.environ,
+    "PYTHONPATH": str(SRC),
+    "POWERTOOLS_TRACE_DISABLED": "true",
+    "POWERTOOLS_METRICS_DISABLED": "true",
+    "AWS_DEFAULT_REGION": os.environ.get("AWS_DEFAULT_REGION", "eu-west-1"),
+}
+
+
+def measure(module: str) -> tuple[float, dict[str, float]]:
+    """Cumulative import time of ``module`` in ms, plus the self time of every module it loaded."""
+    proc = subprocess.run(  # nosec B603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=ENV,
+        check=True,
+    )
+    total = 0.0
+    loaded: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.removeprefix("import time:").split("|"))
+        loaded[name] = int(self_us) / 1000
+        if name == module:
+            total = int(cumulative_us) / 1000
+    return total, loaded
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest modules to list per handler")
+    args = parser.parse_args()
+
+    failed = False
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        samples = [measure(module) for _ in range(args.runs)]
+        median = statistics.median(total for total, _ in samples)
+        loaded = samples[-1][1]
+        leaked = sorted(name for name in forbidden if name in loaded)
+        ok = median <= budget_ms and not leaked
+        failed |= not ok
+        print(f"{'OK  ' if ok else 'FAIL'} {module}: {median:.1f} ms (budget {budget_ms:.0f} ms)")
+        if leaked:
+            print(f"     imports forbidden modules: {', '.join(leaked)}")
+        for name, self_ms in sorted(loaded.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+            print(f"     {self_ms:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
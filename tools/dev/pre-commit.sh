@@ -16,6 +16,9 @@ uv run mypy .
 purple "Running security checks with bandit..."
 uv run bandit -rq src -x tests,.venv
 
+purple "Checking handler import-time budgets..."
+uv run python tools/dev/import_budget.py
+
 purple "Running unit tests with pytest..."
 uv run pytest
 